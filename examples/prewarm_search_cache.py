@@ -0,0 +1,58 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import argparse
+from pathlib import Path
+import asyncio
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.logger import logger
+from src.config import config
+from src.tools.search.cache import get_search_cache
+from src.tools.web_searcher import WebSearcherTool
+from src.utils import assemble_project_path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fill the search cache with the results of a list of queries.")
+    parser.add_argument("queries", type=str, help="Text file with one query per line")
+    parser.add_argument("--config", type=str, default="configs/config_gaia.toml", help="Config whose [searcher_tool] and [search_cache] to use")
+    parser.add_argument("--filter-year", type=int, default=None, help="Year to filter the results on")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of searches in flight")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    config.init_config(config_path=assemble_project_path(args.config))
+    logger.init_logger(config.log_path)
+
+    search_cache = get_search_cache()
+    if search_cache is None:
+        logger.error(f"The search cache is disabled in {args.config}")
+        return
+
+    with open(args.queries, encoding="utf-8") as f:
+        queries = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+    web_searcher = WebSearcherTool()
+    web_searcher.fetch_content = False
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def prewarm(query: str) -> bool:
+        async with semaphore:
+            response = await web_searcher.forward(query, filter_year=args.filter_year)
+            return not response.error
+
+    start_time = time.perf_counter()
+    succeeded = await asyncio.gather(*[prewarm(query) for query in queries])
+    logger.info(f"Prewarmed {sum(succeeded)}/{len(queries)} queries in {time.perf_counter() - start_time:.1f}s")
+    logger.info(f"Search cache stats: {search_cache.stats()}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
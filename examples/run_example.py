@@ -23,6 +23,8 @@ async def main():
 
     # Registed models
     model_manager.init_models(use_local_proxy=config.use_local_proxy)
+    if config.warmup.enabled:
+        await model_manager.warmup(config.warmup.connections_per_host, config.warmup.timeout_seconds)
     logger.info("Registed models: %s", ", ".join(model_manager.registed_models.keys()))
     
     # Create agent
@@ -15,13 +15,18 @@ import threading
 root = str(Path(__file__).resolve().parents[1])
 sys.path.append(root)
 
-from src.logger import logger
+from src.logger import logger, usage_tracker
 from src.config import config
 from src.models import model_manager
+from src.proxy import CONNECTION_STATS
+from src.tools.web_searcher import search_latency_stats
+from src.tools.search.cache import get_search_cache
+from src.tools.search.health import engine_health
 from src.metric import question_scorer
 from src.agent import create_agent, prepare_response
+from src.agent.transcript import get_step_record
 from src.dataset import GAIADataset
-from src.utils import assemble_project_path
+from src.utils import assemble_project_path, make_json_serializable, json_repair_stats
 
 append_answer_lock = threading.Lock()
 
@@ -92,17 +97,18 @@ async def answer_single_question(example, answers_file):
         question += prompt_use_files
 
     start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    transcript_steps = None
     try:
         # Run agent 🚀
         final_result = await agent.run(task=question)
 
-        agent_memory = agent.write_memory_to_messages(summary_mode=True)
-
-        final_result = prepare_response(question, agent_memory, reformulation_model=model_manager.registed_models["o3"])
+        final_result = await prepare_response(question, agent.memory,
+                                              reformulation_model=model_manager.get_call_site_model("reformulate", "o3"),
+                                              token_budget=config.reformulation.transcript_token_budget)
+        if config.reformulation.record_transcript_steps:
+            transcript_steps = [record for record in map(get_step_record, agent.memory.steps) if record is not None]
 
         output = str(final_result)
-        for memory_step in agent.memory.steps:
-            memory_step.model_input_messages = None
         intermediate_steps = [str(step) for step in agent.memory.steps]
 
         # Check for parsing errors which indicate the LLM failed to follow the required format
@@ -136,6 +142,8 @@ async def answer_single_question(example, answers_file):
         "task_id": example["task_id"],
         "true_answer": example["true_answer"],
     }
+    if transcript_steps is not None:
+        annotated_example["transcript_steps"] = make_json_serializable(transcript_steps)
     append_answer(annotated_example, answers_file)
 
 async def main():
@@ -147,6 +155,8 @@ async def main():
 
     # Registed models
     model_manager.init_models(use_local_proxy=config.use_local_proxy)
+    if config.warmup.enabled:
+        await model_manager.warmup(config.warmup.connections_per_host, config.warmup.timeout_seconds)
     logger.info("Registed models: %s", ", ".join(model_manager.registed_models.keys()))
     
     # Load dataset
@@ -168,5 +178,33 @@ async def main():
         await asyncio.gather(*[answer_single_question(task, config.save_path) for task in batch])
         logger.info(f"Batch {i // batch_size + 1} done.")
 
+    if model_manager.response_cache is not None:
+        logger.info(f"LLM response cache stats: {model_manager.response_cache.stats()}")
+    if model_manager.request_coalescer is not None:
+        logger.info(f"LLM request coalescing stats: {model_manager.request_coalescer.stats()}")
+    if model_manager.cassette is not None:
+        logger.info(f"Model cassette stats: {model_manager.cassette.stats()}")
+    if model_manager.rate_limiter is not None:
+        logger.info(f"Model rate limiter stats: {model_manager.rate_limiter.stats()}")
+    if model_manager.hedge_policy is not None:
+        logger.info(f"Model hedging stats: {model_manager.hedge_policy.stats()}")
+    if model_manager.load_balancers:
+        logger.info(f"Model load balancer stats: {model_manager.load_balancer_stats()}")
+    if model_manager.circuit_breakers:
+        logger.info(f"Model circuit breaker stats: {model_manager.circuit_breaker_stats()}")
+    if model_manager.context_budgeter is not None:
+        logger.info(f"Model context budget stats: {model_manager.context_budgeter.stats()}")
+    logger.info(f"Tool call JSON repair stats: {json_repair_stats.stats()}")
+    logger.info(f"Search latency per strategy: {search_latency_stats.stats()}")
+    logger.info(f"Search engine health: {engine_health.stats()}")
+    search_cache = get_search_cache()
+    if search_cache is not None:
+        logger.info(f"Search cache stats: {search_cache.stats()}")
+    logger.info(f"HTTP connection stats: {CONNECTION_STATS.stats()}")
+    for usage in usage_tracker.summary():
+        logger.info(f"Model usage: {usage}")
+    for usage in usage_tracker.call_site_summary():
+        logger.info(f"Call site usage: {usage}")
+
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
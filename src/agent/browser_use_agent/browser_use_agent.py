@@ -70,6 +70,7 @@ class BrowserUseAgent(AsyncMultiStepAgent):
             description=description,
             provide_run_summary=provide_run_summary,
             final_answer_checks=final_answer_checks,
+            stream_outputs=self.config.stream_outputs,
         )
 
         template_path = assemble_project_path(self.config.template_path)
@@ -192,10 +193,11 @@ class BrowserUseAgent(AsyncMultiStepAgent):
         input_messages = memory_messages.copy()
 
         # Add new step in logs
-        memory_step.model_input_messages = input_messages
+        memory_step.model_input_messages = self.memory.reference_messages()
 
         try:
-            chat_message: ChatMessage = await self.model(
+            chat_message: ChatMessage = await self.generate_action(
+                memory_step,
                 input_messages,
                 stop_sequences=["Observation:", "Calling tools:"],
                 tools_to_call_from=list(self.tools.values()),
@@ -215,7 +217,7 @@ class BrowserUseAgent(AsyncMultiStepAgent):
 
         if chat_message.tool_calls is None or len(chat_message.tool_calls) == 0:
             try:
-                chat_message = self.model.parse_tool_calls(chat_message)
+                chat_message = self.model.parse_tool_calls(chat_message, list(self.tools.values()))
             except Exception as e:
                 raise AgentParsingError(f"Error while parsing tool call from model output: {e}", self.logger)
         else:
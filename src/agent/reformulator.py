@@ -1,10 +1,23 @@
-import copy
+import inspect
 
+from src.agent.transcript import DEFAULT_TRANSCRIPT_TOKEN_BUDGET, TRANSCRIPT_COMPRESSOR
+from src.memory import AgentMemory
 from src.models import MessageRole, Model
-from src.logger import logger
+from src.logger import logger, usage_scope
 
 
-async def prepare_response(original_task: str, inner_messages, reformulation_model: Model) -> str:
+async def prepare_response(
+    original_task: str,
+    inner_messages,
+    reformulation_model: Model,
+    token_budget: int = DEFAULT_TRANSCRIPT_TOKEN_BUDGET,
+) -> str:
+    """
+    Extract the final answer to `original_task` from the work of the agents.
+
+    `inner_messages` is either the agent's `AgentMemory`, whose steps are then condensed into a transcript of
+    at most `token_budget` tokens, or a list of memory messages sent as they are.
+    """
     messages = [
         {
             "role": MessageRole.SYSTEM,
@@ -25,16 +38,24 @@ Your team then worked diligently to address that request. Read below a transcrip
     # if len(inner_messages) > 1:
     #    del inner_messages[0]
 
-    # copy them to this context
-    try:
-        for message in inner_messages:
-            if not message.get("content"):
-                continue
-            message = copy.deepcopy(message)
-            message["role"] = MessageRole.USER
-            messages.append(message)
-    except Exception:
-        messages += [{"role": MessageRole.ASSISTANT, "content": str(inner_messages)}]
+    # `write_memory_to_messages` of the async agents is a coroutine
+    if inspect.isawaitable(inner_messages):
+        inner_messages = await inner_messages
+
+    if isinstance(inner_messages, AgentMemory):
+        transcript = TRANSCRIPT_COMPRESSOR.build(
+            inner_messages.steps, token_budget=token_budget, model_id=reformulation_model.model_id
+        )
+        messages.append({"role": MessageRole.USER, "content": [{"type": "text", "text": transcript}]})
+    else:
+        # copy them to this context
+        try:
+            for message in inner_messages:
+                if not message.get("content"):
+                    continue
+                messages.append({**message, "role": MessageRole.USER})
+        except Exception:
+            messages += [{"role": MessageRole.ASSISTANT, "content": str(inner_messages)}]
 
     # ask for the final answer
     messages.append(
@@ -63,7 +84,8 @@ ADDITIONALLY, your FINAL ANSWER MUST adhere to any formatting instructions speci
         }
     )
 
-    response = await reformulation_model(messages)
+    with usage_scope(call_site="reformulate"):
+        response = await reformulation_model(messages)
     response = response.content
 
     final_answer = response.split("FINAL ANSWER: ")[-1].strip()
@@ -0,0 +1,181 @@
+import json
+import re
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+from src.memory import ActionStep, TaskStep
+from src.models.context_budget import ContextBudgeter
+from src.utils.token_utils import TokenCounter
+
+DEFAULT_TRANSCRIPT_TOKEN_BUDGET = 16000
+MANAGED_AGENT_ANSWER = re.compile(r"^Here is the final answer from your managed agent '([^']+)'")
+MAX_ARGUMENTS_CHARS = 300
+MAX_ERROR_CHARS = 300
+
+
+def get_step_record(step: Any) -> Optional[Dict[str, Any]]:
+    """
+    The parts of a memory step the reformulation needs, as a JSON-serializable dict (`None` for other steps).
+    Runs can be recorded as these records and condensed again later, see `tests/test_transcript.py`.
+    """
+    if isinstance(step, TaskStep):
+        return {"kind": "task", "task": step.task}
+    if isinstance(step, ActionStep):
+        return {
+            "kind": "action",
+            "step": step.step_number,
+            "tool_calls": [
+                {"name": tool_call.name, "arguments": tool_call.arguments} for tool_call in step.tool_calls or []
+            ],
+            "observations": step.observations,
+            "error": str(step.error) if step.error is not None else None,
+            "action_output": step.action_output if isinstance(step.action_output, (str, int, float)) else None,
+        }
+    return None
+
+
+def render_full_step(record: Dict[str, Any]) -> str:
+    """A step as the whole transcript used to show it (summary mode memory messages), for comparison."""
+    if record["kind"] == "task":
+        return f"New task:\n{record['task']}"
+    parts = []
+    if record["tool_calls"]:
+        parts.append("Calling tools:\n" + str([
+            {"type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+            for call in record["tool_calls"]
+        ]))
+    if record["observations"] is not None:
+        parts.append(f"Observation:\n{record['observations']}")
+    if record["error"] is not None:
+        parts.append(f"Error:\n{record['error']}")
+    return "\n".join(parts)
+
+
+class TranscriptCompressor:
+    """
+    Builds a bounded transcript of an agent run for the answer reformulation.
+
+    Every step is condensed once (and cached while the step object lives): tool call names with their
+    shortened arguments, the head and tail of long observations, errors, and in full the final answers
+    and the answers of managed agents, which carry the results the reformulation extracts. If the
+    condensed steps still exceed the token budget, the oldest steps are replaced by a one-line list of
+    the tools they called, keeping the steps with answers for as long as possible.
+
+    Args:
+        max_observation_tokens (`int`, default `1500`): Size an observation is truncated to.
+        max_answer_tokens (`int`, default `4000`): Size a managed agent answer is truncated to.
+    """
+
+    def __init__(self, max_observation_tokens: int = 1500, max_answer_tokens: int = 4000):
+        self.max_observation_tokens = max_observation_tokens
+        self.max_answer_tokens = max_answer_tokens
+        self.counter = TokenCounter()
+        self.steps: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def shorten(self, text: str, max_tokens: int, model_id: str) -> str:
+        tokens = self.counter.count(text, model_id)
+        if tokens <= max_tokens:
+            return text
+        return ContextBudgeter.truncate_text(text, tokens, max_tokens)
+
+    def condense_record(self, record: Dict[str, Any], model_id: str) -> Dict[str, Any]:
+        """Condensed text, token count, tool names and whether the step holds an answer."""
+        if record["kind"] == "task":
+            text = "Task: " + self.shorten(record["task"], self.max_observation_tokens, model_id)
+            return {"text": text, "tokens": self.counter.count(text, model_id), "tools": [], "has_answer": False}
+
+        lines = [f"Step {record['step']}:"]
+        tools = []
+        has_answer = False
+        for call in record["tool_calls"]:
+            tools.append(call["name"])
+            arguments = json.dumps(call["arguments"], ensure_ascii=False, default=str)
+            if call["name"] == "final_answer":
+                has_answer = True
+            elif len(arguments) > MAX_ARGUMENTS_CHARS:
+                arguments = arguments[:MAX_ARGUMENTS_CHARS] + "...\""
+            lines.append(f"Called {call['name']}({arguments})")
+
+        observations = record["observations"]
+        if observations:
+            if MANAGED_AGENT_ANSWER.match(observations):
+                has_answer = True
+                lines.append("Answer: " + self.shorten(observations, self.max_answer_tokens, model_id))
+            else:
+                lines.append("Observation: " + self.shorten(observations, self.max_observation_tokens, model_id))
+        if record["error"]:
+            lines.append("Error: " + record["error"][:MAX_ERROR_CHARS])
+        if has_answer and record["action_output"] is not None and "final_answer" in tools:
+            lines.append(f"Final answer: {record['action_output']}")
+
+        text = "\n".join(lines)
+        return {"text": text, "tokens": self.counter.count(text, model_id), "tools": tools, "has_answer": has_answer}
+
+    def condense_step(self, step: Any, model_id: str) -> Optional[Dict[str, Any]]:
+        known = self.steps.get(id(step))
+        if known is not None and known[0]() is step and known[1] == model_id:
+            self.hits += 1
+            return known[2]
+
+        record = get_step_record(step)
+        if record is None:
+            return None
+        condensed = self.condense_record(record, model_id)
+        step_id = id(step)
+        with self._lock:
+            self.misses += 1
+            reference = weakref.ref(step, lambda _: self.steps.pop(step_id, None))
+            self.steps[step_id] = (reference, model_id, condensed)
+        return condensed
+
+    def build(
+        self,
+        steps: List[Any],
+        token_budget: int = DEFAULT_TRANSCRIPT_TOKEN_BUDGET,
+        model_id: str = "gpt-4o",
+    ) -> str:
+        """Transcript of memory steps (or step records) within `token_budget` tokens."""
+        condensed = []
+        for step in steps:
+            item = self.condense_record(step, model_id) if isinstance(step, dict) else self.condense_step(step, model_id)
+            if item is not None:
+                condensed.append(item)
+
+        # Drop the oldest steps without an answer first, then the oldest ones with an answer; always keep the last.
+        total = sum(item["tokens"] for item in condensed)
+        kept = [True] * len(condensed)
+        for keep_answers in (True, False):
+            for index, item in enumerate(condensed[:-1]):
+                if total <= token_budget:
+                    break
+                if kept[index] and not (keep_answers and item["has_answer"]):
+                    kept[index] = False
+                    total -= item["tokens"]
+
+        parts = []
+        omitted_tools, omitted_steps = [], 0
+        for item, keep in zip(condensed, kept):
+            if not keep:
+                omitted_steps += 1
+                omitted_tools += item["tools"]
+                continue
+            if omitted_steps:
+                parts.append(self._omission_note(omitted_steps, omitted_tools))
+                omitted_tools, omitted_steps = [], 0
+            parts.append(item["text"])
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def _omission_note(num_steps: int, tools: List[str]) -> str:
+        called = ", ".join(dict.fromkeys(tools)) or "no tools"
+        return f"({num_steps} earlier steps omitted for brevity; they called: {called})"
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "cached_steps": len(self.steps)}
+
+
+TRANSCRIPT_COMPRESSOR = TranscriptCompressor()
@@ -43,6 +43,7 @@ from src.logger import (
     AgentLogger,
     LogLevel,
     Monitor,
+    usage_scope,
 )
 
 from src.tools import AsyncTool
@@ -174,6 +175,7 @@ class AsyncMultiStepAgent(ABC):
         description (`str`, *optional*): Necessary for a managed agent only - the description of this agent.
         provide_run_summary (`bool`, *optional*): Whether to provide a run summary when called as a managed agent.
         final_answer_checks (`list`, *optional*): List of Callables to run before returning a final answer for checking validity.
+        stream_outputs (`bool`, default `False`): Whether to stream model outputs, so that a step's tool call is available as soon as its arguments are complete.
     """
 
     def __init__(
@@ -192,6 +194,7 @@ class AsyncMultiStepAgent(ABC):
         description: str | None = None,
         provide_run_summary: bool = False,
         final_answer_checks: list[Callable] | None = None,
+        stream_outputs: bool = False,
     ):
         self.agent_name = self.__class__.__name__
         self.model = model
@@ -217,6 +220,7 @@ class AsyncMultiStepAgent(ABC):
         self.description = description
         self.provide_run_summary = provide_run_summary
         self.final_answer_checks = final_answer_checks
+        self.stream_outputs = stream_outputs
 
         self._setup_managed_agents(managed_agents)
         self._setup_tools(tools, add_base_tools)
@@ -230,7 +234,7 @@ class AsyncMultiStepAgent(ABC):
 
         self.logger = logger
 
-        self.monitor = Monitor(self.model, self.logger)
+        self.monitor = Monitor(self.model, self.logger, agent_id=id(self))
         self.step_callbacks = step_callbacks if step_callbacks is not None else []
         self.step_callbacks.append(self.monitor.update_metrics)
 
@@ -357,9 +361,10 @@ You have been provided with these additional arguments, that you can access usin
             if self.planning_interval is not None and (
                 self.step_number == 1 or (self.step_number - 1) % self.planning_interval == 0
             ):
-                planning_step = await self._generate_planning_step(
-                    task, is_first_step=(self.step_number == 1), step=self.step_number
-                )
+                with self._usage_scope():
+                    planning_step = await self._generate_planning_step(
+                        task, is_first_step=(self.step_number == 1), step=self.step_number
+                    )
                 self.memory.steps.append(planning_step)
                 yield planning_step
             action_step = ActionStep(
@@ -380,17 +385,23 @@ You have been provided with these additional arguments, that you can access usin
                 self.step_number += 1
 
         if final_answer is None and self.step_number == max_steps + 1:
-            final_answer = self._handle_max_steps_reached(task, images, step_start_time)
+            with self._usage_scope():
+                final_answer = await self._handle_max_steps_reached(task, images, step_start_time)
             yield action_step
         yield FinalAnswerStep(final_answer)
 
     async def _execute_step(self, task: str, memory_step: ActionStep) -> None | Any:
         self.logger.log_rule(f"Step {self.step_number}", level=LogLevel.INFO)
-        final_answer = await self.step(memory_step)
+        with self._usage_scope():
+            final_answer = await self.step(memory_step)
         if final_answer is not None and self.final_answer_checks:
             self._validate_final_answer(final_answer)
         return final_answer
 
+    def _usage_scope(self):
+        """Attribute the model calls made within the block to this agent and its current step."""
+        return usage_scope(agent=self.name, agent_id=id(self), step=self.step_number, tool=None)
+
     def _validate_final_answer(self, final_answer: Any):
         for check_function in self.final_answer_checks:
             try:
@@ -407,8 +418,8 @@ You have been provided with these additional arguments, that you can access usin
                 memory_step, agent=self
             )
 
-    def _handle_max_steps_reached(self, task: str, images: list["PIL.Image.Image"], step_start_time: float) -> Any:
-        final_answer = self.provide_final_answer(task, images)
+    async def _handle_max_steps_reached(self, task: str, images: list["PIL.Image.Image"], step_start_time: float) -> Any:
+        final_answer = await self.provide_final_answer(task, images)
         final_memory_step = ActionStep(
             step_number=self.step_number, error=AgentMaxStepsError("Reached max steps.", self.logger)
         )
@@ -438,7 +449,8 @@ You have been provided with these additional arguments, that you can access usin
                     ],
                 }
             ]
-            plan_message = self.model(input_messages, stop_sequences=["<end_plan>"])
+            plan_message = await self.model(input_messages, stop_sequences=["<end_plan>"])
+            model_input_messages = input_messages
             plan = textwrap.dedent(
                 f"""Here are the facts I know and the plan of action that I will follow to solve the task:\n```\n{plan_message.content}\n```"""
             )
@@ -475,14 +487,17 @@ You have been provided with these additional arguments, that you can access usin
                 ],
             }
             input_messages = [plan_update_pre] + memory_messages + [plan_update_post]
-            plan_message = self.model(input_messages, stop_sequences=["<end_plan>"])
+            plan_message = await self.model(input_messages, stop_sequences=["<end_plan>"])
+            model_input_messages = self.memory.reference_messages(
+                summary_mode=True, prefix=[plan_update_pre], suffix=[plan_update_post]
+            )
             plan = textwrap.dedent(
                 f"""I still need to solve the task I was given:\n```\n{self.task}\n```\n\nHere are the facts I know and my new/updated plan of action to solve the task:\n```\n{plan_message.content}\n```"""
             )
         log_headline = "Initial plan" if is_first_step else "Updated plan"
         self.logger.log(Rule(f"[bold]{log_headline}", style="orange"), Text(plan), level=LogLevel.INFO)
         return PlanningStep(
-            model_input_messages=input_messages,
+            model_input_messages=model_input_messages,
             plan=plan,
             model_output_message=plan_message,
         )
@@ -577,7 +592,7 @@ You have been provided with these additional arguments, that you can access usin
         ]
         if images:
             messages[0]["content"].append({"type": "image"})
-        messages += await self.write_memory_to_messages()[1:]
+        messages += (await self.write_memory_to_messages())[1:]
         messages += [
             {
                 "role": MessageRole.USER,
@@ -592,11 +607,48 @@ You have been provided with these additional arguments, that you can access usin
             }
         ]
         try:
-            chat_message: ChatMessage = self.model(messages)
+            chat_message: ChatMessage = await self.model(messages)
             return chat_message.content
         except Exception as e:
             return f"Error in generating final LLM output:\n{e}"
 
+    async def generate_action(
+        self,
+        memory_step: ActionStep,
+        input_messages: list[dict],
+        stop_sequences: list[str] | None = None,
+        tools_to_call_from: list[Any] | None = None,
+    ) -> ChatMessage:
+        """
+        Ask the model for the next action and record the step's time to first action.
+
+        With `stream_outputs`, the output is streamed and cut off as soon as the first tool call is complete
+        or a stop sequence shows up, since a step only executes its first tool call.
+        """
+        if not (self.stream_outputs and hasattr(self.model, "stream")):
+            chat_message = await self.model(
+                input_messages,
+                stop_sequences=stop_sequences,
+                tools_to_call_from=tools_to_call_from,
+            )
+            memory_step.time_to_first_action = time.time() - memory_step.start_time
+            return chat_message
+
+        chat_message = None
+        async for delta in self.model.stream(
+            input_messages,
+            stop_sequences=stop_sequences,
+            tools_to_call_from=tools_to_call_from,
+            max_tool_calls=1 if tools_to_call_from else None,
+        ):
+            if delta.completed_tool_calls and memory_step.time_to_first_action is None:
+                memory_step.time_to_first_action = time.time() - memory_step.start_time
+            if delta.message is not None:
+                chat_message = delta.message
+        if memory_step.time_to_first_action is None:
+            memory_step.time_to_first_action = time.time() - memory_step.start_time
+        return chat_message
+
     @abstractmethod
     async def step(self, memory_step: ActionStep) -> None | Any:
         """To be implemented in children classes. Should return either None if the step is not final."""
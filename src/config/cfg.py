@@ -19,6 +19,14 @@ class SearcherToolConfig(BaseModel):
     num_results: int = Field(default=5, description="Number of search results to return")
     fetch_content: bool = Field(default=False, description="Whether to fetch content from the search results")
     max_length: int = Field(default=50000, description="Maximum character length for the content to be fetched")
+    strategy: str = Field(default="sequential", description="How engines are queried: sequential, race (first non-empty results of the top engines) or fan-out-merge (fused results of the top engines)")
+    concurrent_engines: int = Field(default=2, description="Number of engines queried at once by the race and fan-out-merge strategies")
+    merge_deadline_seconds: float = Field(default=8.0, description="Time fan-out-merge waits for the engines before fusing the results it has")
+    max_retry_delay: int = Field(default=60, description="Longest wait before retrying all engines; waits grow exponentially from retry_delay with full jitter")
+    engine_retries: int = Field(default=1, description="Retries of an engine after a timeout or dropped connection (never after a rate limit)")
+    engine_cooldown_seconds: int = Field(default=60, description="Time an engine is skipped after a rate limit or repeated failures, doubled on each consecutive cooldown")
+    max_engine_cooldown_seconds: int = Field(default=900, description="Longest time an engine is skipped")
+    engine_failure_threshold: int = Field(default=3, description="Failures in a row that put an engine in cooldown")
 
 class DeepResearcherToolConfig(BaseModel):
     model_id: str = Field(default="claude37-sonnet-thinking", description="Model ID for the LLM to use")
@@ -61,6 +69,8 @@ class AgentConfig(BaseModel):
                             description="List of tools the agent can use")
     managed_agents: List[str] = Field(default_factory=lambda: [], 
                                       description="List of agents the agent can manage")
+    stream_outputs: bool = Field(default=False,
+                                 description="Whether to stream model outputs and act on the first complete tool call")
 
 class HierarchicalAgentConfig(BaseModel):
     name: str = Field(default="agentscope", description="Name of the hierarchical agent")
@@ -99,6 +109,78 @@ class HierarchicalAgentConfig(BaseModel):
         tools=["deep_researcher", "python_interpreter"],
     ))
 
+class LLMCacheConfig(BaseModel):
+    mode: str = Field(default="off", description="Response cache mode: off, read_write, read_only or write_only")
+    path: str = Field(default=assemble_project_path("workdir/cache/llm_cache.sqlite"), description="Path to the SQLite cache file")
+    ttl_seconds: int = Field(default=7 * 24 * 3600, description="Seconds before a cached response expires")
+    max_size_mb: int = Field(default=1024, description="Maximum size of the cache before least recently used responses are evicted")
+    coalesce_in_flight: bool = Field(default=True, description="Whether identical requests in flight at the same time share one provider call")
+
+class SearchCacheConfig(BaseModel):
+    enabled: bool = Field(default=True, description="Whether to cache the results of web searches")
+    path: str = Field(default=assemble_project_path("workdir/cache/search_cache.sqlite"), description="Path to the SQLite cache file")
+    ttl_seconds: int = Field(default=24 * 3600, description="Seconds before cached search results expire")
+    engine_ttl_seconds: Dict[str, int] = Field(default_factory=dict, description="Seconds before the cached results of each engine expire, overriding ttl_seconds")
+    stale_seconds: int = Field(default=7 * 24 * 3600, description="Seconds after expiry during which results are still served while the search is refreshed in the background")
+    max_size_mb: int = Field(default=256, description="Maximum size of the cache before least recently used results are evicted")
+
+class CassetteConfig(BaseModel):
+    mode: str = Field(default="off", description="Record/replay mode for every model call: off, record or replay")
+    path: str = Field(default=assemble_project_path("workdir/cassettes/cassette.jsonl.gz"), description="Path to the cassette file")
+    replay_latency: Optional[float] = Field(default=None, description="Fixed synthetic latency in seconds for replayed responses, None to use the recorded latency")
+    latency_scale: float = Field(default=1.0, description="Multiplier applied to the synthetic replay latency")
+
+class RateLimitConfig(BaseModel):
+    enabled: bool = Field(default=False, description="Whether to throttle model calls per provider endpoint")
+    requests_per_minute: int = Field(default=500, description="Default requests per minute of a provider endpoint")
+    tokens_per_minute: int = Field(default=400000, description="Default tokens per minute of a provider endpoint")
+    max_in_flight: int = Field(default=16, description="Default number of concurrent requests per model")
+    max_retries: int = Field(default=3, description="Retries of a rate-limited (429) request after backing off")
+    endpoints: Dict[str, Dict[str, int]] = Field(default_factory=dict, description="Per-endpoint limits keyed by base URL or provider name")
+    models: Dict[str, int] = Field(default_factory=dict, description="Per-model max in-flight requests keyed by model id")
+
+class HedgingConfig(BaseModel):
+    enabled: bool = Field(default=False, description="Whether to hedge model requests that are slower than usual")
+    percentile: float = Field(default=0.95, description="Latency percentile of a model after which its request is hedged")
+    min_samples: int = Field(default=20, description="Latencies to observe before trusting the percentile, max_delay is used until then")
+    min_delay: float = Field(default=5.0, description="Lower bound of the hedge delay in seconds")
+    max_delay: float = Field(default=120.0, description="Upper bound of the hedge delay in seconds")
+    budget: float = Field(default=0.05, description="Fraction of extra requests that may be spent on hedges")
+    alternate_endpoints: Dict[str, str] = Field(default_factory=dict, description="Alternate API base for hedges, as environment variable names: primary -> alternate")
+
+class CircuitBreakerConfig(BaseModel):
+    enabled: bool = Field(default=False, description="Whether to guard models with circuit breakers and fallback chains")
+    failure_rate_threshold: float = Field(default=0.5, description="Failure rate over the window that opens a breaker")
+    slow_call_seconds: Optional[float] = Field(default=120.0, description="Calls slower than this count as failures, None to disable")
+    window: int = Field(default=20, description="Number of recent calls the failure rate is computed on")
+    min_calls: int = Field(default=5, description="Calls to observe before a breaker may open")
+    cooldown_seconds: float = Field(default=60.0, description="Time a breaker stays open before a probe call")
+    fallbacks: Dict[str, List[str]] = Field(default_factory=dict, description="Fallback chain of each model name, tried in order")
+
+class LoadBalancerConfig(BaseModel):
+    max_failures: int = Field(default=3, description="Consecutive failures (connection errors, timeouts, 5xx) that eject a replica")
+    ejection_seconds: float = Field(default=30.0, description="Time an ejected replica receives no requests")
+
+class WarmupConfig(BaseModel):
+    enabled: bool = Field(default=True, description="Whether to open pooled connections to every model endpoint before running tasks")
+    connections_per_host: int = Field(default=2, description="Connections opened to each endpoint")
+    timeout_seconds: float = Field(default=10.0, description="Time to wait for each warmup connection")
+
+class ContextBudgetConfig(BaseModel):
+    enabled: bool = Field(default=False, description="Whether to trim requests to the context window of their model")
+    output_headroom: int = Field(default=4096, description="Tokens kept for the output when a request sets no max_tokens")
+    keep_last_messages: int = Field(default=2, description="Number of most recent messages that are never dropped")
+    min_content_tokens: int = Field(default=1024, description="Size a text content is never truncated below")
+    default_context_limit: int = Field(default=128000, description="Context window of the models missing from context_limits")
+    context_limits: Dict[str, int] = Field(default_factory=dict, description="Context window of each model name, in tokens")
+
+class ModelRoutingConfig(BaseModel):
+    routes: Dict[str, str] = Field(default_factory=dict, description="Model name of each named call site (optimize_query, extract_insights, follow_ups, summary, reformulate); the others use the model their code defaults to")
+
+class ReformulationConfig(BaseModel):
+    transcript_token_budget: int = Field(default=16000, description="Size of the condensed run transcript the final answer is extracted from, in tokens")
+    record_transcript_steps: bool = Field(default=True, description="Whether to save the condensable step records of each run with its answer")
+
 class DatasetConfig(BaseModel):
     name: str = Field(default="2023_all", description="Dataset name")
     path: str = Field(default=assemble_project_path("data/GAIA"), description="Path to the dataset")
@@ -121,6 +203,19 @@ class Config(BaseModel):
     browser_tool: BrowserToolConfig = Field(default_factory=BrowserToolConfig)
     deep_analyzer_tool: DeepAnalyzerToolConfig = Field(default_factory=DeepAnalyzerToolConfig)
     
+    # Model Config
+    llm_cache: LLMCacheConfig = Field(default_factory=LLMCacheConfig)
+    search_cache: SearchCacheConfig = Field(default_factory=SearchCacheConfig)
+    cassette: CassetteConfig = Field(default_factory=CassetteConfig)
+    rate_limits: RateLimitConfig = Field(default_factory=RateLimitConfig)
+    hedging: HedgingConfig = Field(default_factory=HedgingConfig)
+    circuit_breaker: CircuitBreakerConfig = Field(default_factory=CircuitBreakerConfig)
+    context_budget: ContextBudgetConfig = Field(default_factory=ContextBudgetConfig)
+    load_balancer: LoadBalancerConfig = Field(default_factory=LoadBalancerConfig)
+    warmup: WarmupConfig = Field(default_factory=WarmupConfig)
+    model_routing: ModelRoutingConfig = Field(default_factory=ModelRoutingConfig)
+    reformulation: ReformulationConfig = Field(default_factory=ReformulationConfig)
+    
     # Agent Config
     agent: HierarchicalAgentConfig = Field(default_factory=HierarchicalAgentConfig)
     
@@ -156,6 +251,22 @@ class Config(BaseModel):
         self.browser_tool = BrowserToolConfig(**config["browser_tool"])
         self.deep_analyzer_tool = DeepAnalyzerToolConfig(**config["deep_analyzer_tool"])
 
+        # Model Config
+        self.llm_cache = LLMCacheConfig(**config.get("llm_cache", {}))
+        self.llm_cache.path = assemble_project_path(self.llm_cache.path)
+        self.search_cache = SearchCacheConfig(**config.get("search_cache", {}))
+        self.search_cache.path = assemble_project_path(self.search_cache.path)
+        self.cassette = CassetteConfig(**config.get("cassette", {}))
+        self.cassette.path = assemble_project_path(self.cassette.path)
+        self.rate_limits = RateLimitConfig(**config.get("rate_limits", {}))
+        self.hedging = HedgingConfig(**config.get("hedging", {}))
+        self.circuit_breaker = CircuitBreakerConfig(**config.get("circuit_breaker", {}))
+        self.context_budget = ContextBudgetConfig(**config.get("context_budget", {}))
+        self.load_balancer = LoadBalancerConfig(**config.get("load_balancer", {}))
+        self.warmup = WarmupConfig(**config.get("warmup", {}))
+        self.model_routing = ModelRoutingConfig(**config.get("model_routing", {}))
+        self.reformulation = ReformulationConfig(**config.get("reformulation", {}))
+
         # Agent Config
         planning_agent_config = AgentConfig(**config["agent"]["planning_agent_config"])
         planning_agent_config.template_path = assemble_project_path(config["agent"]["planning_agent_config"]["template_path"])
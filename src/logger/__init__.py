@@ -1,4 +1,6 @@
 from src.logger.logger import logger, LogLevel, AgentLogger, YELLOW_HEX
 from src.logger.monitor import Monitor
+from src.logger.usage import TokenUsage, UsageScope, usage_scope, usage_tracker
 
-__all__ = ["logger", "LogLevel", "AgentLogger", "Monitor", "YELLOW_HEX"]
\ No newline at end of file
+__all__ = ["logger", "LogLevel", "AgentLogger", "Monitor", "YELLOW_HEX",
+           "TokenUsage", "UsageScope", "usage_scope", "usage_tracker"]
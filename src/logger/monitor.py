@@ -1,24 +1,39 @@
 from rich.text import Text
 
+from src.logger.usage import usage_tracker
+
 class Monitor:
-    def __init__(self, tracked_model, logger):
+    def __init__(self, tracked_model, logger, agent_id=None):
         self.step_durations = []
+        self.first_action_times = []
         self.tracked_model = tracked_model
         self.logger = logger
-        if getattr(self.tracked_model, "last_input_token_count", "Not found") != "Not found":
-            self.total_input_token_count = 0
-            self.total_output_token_count = 0
+        # Token counts are taken from the usage tracker, for the model calls attributed to this agent's steps
+        self.agent_id = agent_id
+        self.total_input_token_count = 0
+        self.total_output_token_count = 0
+        self.total_cached_input_token_count = 0
 
     def get_total_token_counts(self):
         return {
             "input": self.total_input_token_count,
             "output": self.total_output_token_count,
+            "cached_input": self.total_cached_input_token_count,
         }
 
+    def get_mean_time_to_first_action(self):
+        if not self.first_action_times:
+            return None
+        return sum(self.first_action_times) / len(self.first_action_times)
+
     def reset(self):
         self.step_durations = []
+        self.first_action_times = []
         self.total_input_token_count = 0
         self.total_output_token_count = 0
+        self.total_cached_input_token_count = 0
+        if self.agent_id is not None:
+            usage_tracker.discard_agent(self.agent_id)
 
     def update_metrics(self, step_log):
         """Update the metrics of the monitor.
@@ -30,11 +45,34 @@ class Monitor:
         self.step_durations.append(step_duration)
         console_outputs = f"[Step {len(self.step_durations)}: Duration {step_duration:.2f} seconds"
 
-        if getattr(self.tracked_model, "last_input_token_count", None) is not None:
+        time_to_first_action = getattr(step_log, "time_to_first_action", None)
+        if time_to_first_action is not None:
+            self.first_action_times.append(time_to_first_action)
+            console_outputs += f" | First action: {time_to_first_action:.2f} seconds"
+
+        circuit_breaker = getattr(self.tracked_model, "circuit_breaker", None)
+        if circuit_breaker is not None and (circuit_breaker.state != "closed" or circuit_breaker.rerouted):
+            console_outputs += f" | Breaker: {circuit_breaker.state.value}, {circuit_breaker.rerouted} rerouted"
+
+        step_number = getattr(step_log, "step_number", None)
+        if self.agent_id is not None and step_number is not None:
+            step_usage = usage_tracker.pop_step_usage(self.agent_id, step_number)
+            if step_usage.calls:
+                self.total_input_token_count += step_usage.input_tokens
+                self.total_output_token_count += step_usage.output_tokens
+                self.total_cached_input_token_count += step_usage.cached_input_tokens
+                console_outputs += (
+                    f" | Model calls: {step_usage.calls} ({step_usage.latency:.2f} seconds)"
+                    f" | Input tokens: {self.total_input_token_count:,} | Output tokens: {self.total_output_token_count:,}"
+                )
+                if self.total_cached_input_token_count:
+                    console_outputs += f" | Cached input tokens: {self.total_cached_input_token_count:,}"
+        elif getattr(self.tracked_model, "last_input_token_count", None) is not None:
+            # Monitors without an agent id (synchronous agents) still read the model's latest call
             self.total_input_token_count += self.tracked_model.last_input_token_count
             self.total_output_token_count += self.tracked_model.last_output_token_count
             console_outputs += (
-                f"| Input tokens: {self.total_input_token_count:,} | Output tokens: {self.total_output_token_count:,}"
+                f" | Input tokens: {self.total_input_token_count:,} | Output tokens: {self.total_output_token_count:,}"
             )
         console_outputs += "]"
         self.logger.log(Text(console_outputs, style="dim"), level=1)
\ No newline at end of file
@@ -0,0 +1,172 @@
+import contextlib
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class TokenUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0  # Input tokens served from the provider's prompt cache
+    cache_write_tokens: int = 0  # Input tokens written to the prompt cache (Anthropic)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+@dataclass(frozen=True)
+class UsageScope:
+    """
+    Who a model call is made for: the agent (name and instance id), its step, the tool running it and the
+    named call site (e.g. `optimize_query`) it is routed for.
+    """
+
+    agent: Optional[str] = None
+    agent_id: Optional[int] = None
+    step: Optional[int] = None
+    tool: Optional[str] = None
+    call_site: Optional[str] = None
+
+
+@dataclass
+class UsageRecord:
+    model_id: str
+    input_tokens: int
+    output_tokens: int
+    latency: float
+    scope: UsageScope
+    cached_input_tokens: int = 0
+    cache_write_tokens: int = 0
+
+
+@dataclass
+class UsageTotals:
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    cache_write_tokens: int = 0
+    latency: float = 0.0
+
+    def add(self, record: UsageRecord):
+        self.calls += 1
+        self.input_tokens += record.input_tokens
+        self.output_tokens += record.output_tokens
+        self.cached_input_tokens += record.cached_input_tokens
+        self.cache_write_tokens += record.cache_write_tokens
+        self.latency += record.latency
+
+
+_current_scope: ContextVar[UsageScope] = ContextVar("usage_scope", default=UsageScope())
+
+
+def get_usage_scope() -> UsageScope:
+    return _current_scope.get()
+
+
+@contextlib.contextmanager
+def usage_scope(**fields):
+    """
+    Attribute the model calls made within the block to the given agent, agent_id, step, tool or call_site.
+
+    Fields that are not given are inherited from the enclosing scope. The scope lives in a context
+    variable, so concurrent asyncio tasks each keep their own attribution.
+    """
+    token = _current_scope.set(replace(_current_scope.get(), **fields))
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+
+class UsageTracker:
+    """
+    Aggregates the token usage and latency of every model call by the scope it was made in.
+
+    Totals are kept per (agent, tool, call site, model) for the whole process, and per (agent instance, step)
+    until the agent's monitor consumes them with `pop_step_usage`. Sinks are called with every record.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[Tuple[Optional[str], Optional[str], Optional[str], str], UsageTotals] = {}
+        self.step_totals: Dict[Tuple[int, int], UsageTotals] = {}
+        self.sinks: List[Callable[[UsageRecord], Any]] = []
+
+    def record(self, model_id: str, usage: Optional[TokenUsage], latency: float) -> UsageRecord:
+        scope = get_usage_scope()
+        record = UsageRecord(
+            model_id=model_id,
+            input_tokens=usage.input_tokens if usage is not None else 0,
+            output_tokens=usage.output_tokens if usage is not None else 0,
+            latency=latency,
+            scope=scope,
+            cached_input_tokens=usage.cached_input_tokens if usage is not None else 0,
+            cache_write_tokens=usage.cache_write_tokens if usage is not None else 0,
+        )
+        with self._lock:
+            self.totals.setdefault((scope.agent, scope.tool, scope.call_site, model_id), UsageTotals()).add(record)
+            if scope.agent_id is not None and scope.step is not None:
+                self.step_totals.setdefault((scope.agent_id, scope.step), UsageTotals()).add(record)
+        for sink in self.sinks:
+            sink(record)
+        return record
+
+    def pop_step_usage(self, agent_id: int, step: int) -> UsageTotals:
+        with self._lock:
+            return self.step_totals.pop((agent_id, step), None) or UsageTotals()
+
+    def discard_agent(self, agent_id: int):
+        with self._lock:
+            for key in [key for key in self.step_totals if key[0] == agent_id]:
+                del self.step_totals[key]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "agent": agent,
+                    "tool": tool,
+                    "call_site": call_site,
+                    "model_id": model_id,
+                    "calls": totals.calls,
+                    "input_tokens": totals.input_tokens,
+                    "output_tokens": totals.output_tokens,
+                    "cached_input_tokens": totals.cached_input_tokens,
+                    "cache_write_tokens": totals.cache_write_tokens,
+                    "mean_latency": round(totals.latency / totals.calls, 3),
+                }
+                for (agent, tool, call_site, model_id), totals in self.totals.items()
+            ]
+
+    def call_site_summary(self) -> List[Dict[str, Any]]:
+        """Usage of each named call site and the model it was routed to, whichever agent or tool made the calls."""
+        by_call_site: Dict[Tuple[str, str], UsageTotals] = {}
+        with self._lock:
+            for (_, _, call_site, model_id), totals in self.totals.items():
+                if call_site is None:
+                    continue
+                merged = by_call_site.setdefault((call_site, model_id), UsageTotals())
+                merged.calls += totals.calls
+                merged.input_tokens += totals.input_tokens
+                merged.output_tokens += totals.output_tokens
+                merged.cached_input_tokens += totals.cached_input_tokens
+                merged.cache_write_tokens += totals.cache_write_tokens
+                merged.latency += totals.latency
+        return [
+            {
+                "call_site": call_site,
+                "model_id": model_id,
+                "calls": totals.calls,
+                "input_tokens": totals.input_tokens,
+                "output_tokens": totals.output_tokens,
+                "mean_latency": round(totals.latency / totals.calls, 3),
+            }
+            for (call_site, model_id), totals in sorted(by_call_site.items())
+        ]
+
+
+usage_tracker = UsageTracker()
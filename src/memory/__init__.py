@@ -1,6 +1,7 @@
 from src.memory.memory import (
     AgentMemory,
     MemoryStep,
+    MemoryMessages,
     TaskStep,
     ActionStep,
     PlanningStep,
@@ -14,6 +15,7 @@ from src.memory.memory import (
 __all__ = [
     "AgentMemory",
     "MemoryStep",
+    "MemoryMessages",
     "TaskStep",
     "ActionStep",
     "PlanningStep",
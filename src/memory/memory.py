@@ -1,5 +1,6 @@
+from collections.abc import Sequence
 from dataclasses import asdict, dataclass
-from typing import TYPE_CHECKING, Any, Dict, List, TypedDict, Union, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Tuple, TypedDict, Union, Optional
 
 from src.models import ChatMessage, MessageRole
 from src.exception import AgentError
@@ -16,7 +17,7 @@ class Message(TypedDict):
     content: str | list[dict]
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolCall:
     name: str
     arguments: Any
@@ -33,7 +34,7 @@ class ToolCall:
         }
 
 
-@dataclass
+@dataclass(slots=True, weakref_slot=True)
 class MemoryStep:
     def dict(self):
         return asdict(self)
@@ -42,15 +43,69 @@ class MemoryStep:
         raise NotImplementedError
 
 
-@dataclass
+class MemoryMessages(Sequence):
+    """
+    The model input of a step, kept as references to the memory steps it was written from.
+
+    A step used to keep its own copy of the whole memory written to messages, so a run held a number of
+    messages quadratic in its steps. The messages are now written again from the referenced steps
+    when they are read. Past steps are not modified once appended to the memory, so this gives the
+    messages that were sent (before the model cleaned them up or fitted them to its context window).
+
+    Args:
+        steps (`tuple[MemoryStep, ...]`): The steps, system and user prompt included, the input was written from.
+        summary_mode (`bool`, default `False`): Whether the input was written in summary mode.
+        prefix (`tuple[Message, ...]`, default `()`): Messages sent before the memory.
+        suffix (`tuple[Message, ...]`, default `()`): Messages sent after the memory.
+    """
+
+    __slots__ = ("steps", "summary_mode", "prefix", "suffix")
+
+    def __init__(
+        self,
+        steps: Tuple[MemoryStep, ...],
+        summary_mode: bool = False,
+        prefix: Tuple[Message, ...] = (),
+        suffix: Tuple[Message, ...] = (),
+    ):
+        self.steps = steps
+        self.summary_mode = summary_mode
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def render(self) -> List[Message]:
+        messages = list(self.prefix)
+        for step in self.steps:
+            messages.extend(step.to_messages(summary_mode=self.summary_mode))
+        messages.extend(self.suffix)
+        return messages
+
+    def __getitem__(self, index):
+        return self.render()[index]
+
+    def __len__(self) -> int:
+        return len(self.render())
+
+    def __iter__(self):
+        return iter(self.render())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, (list, MemoryMessages)) and list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"MemoryMessages(steps={len(self.steps)}, summary_mode={self.summary_mode})"
+
+
+@dataclass(slots=True)
 class ActionStep(MemoryStep):
-    model_input_messages: List[Message] | None = None
+    model_input_messages: MemoryMessages | List[Message] | None = None
     tool_calls: List[ToolCall] | None = None
     start_time: float | None = None
     end_time: float | None = None
     step_number: int | None = None
     error: AgentError | None = None
     duration: float | None = None
+    time_to_first_action: float | None = None
     model_output_message: ChatMessage = None
     model_output: str | None = None
     observations: str | None = None
@@ -60,13 +115,14 @@ class ActionStep(MemoryStep):
     def dict(self):
         # We overwrite the method to parse the tool_calls and action_output manually
         return {
-            "model_input_messages": self.model_input_messages,
+            "model_input_messages": list(self.model_input_messages) if self.model_input_messages is not None else None,
             "tool_calls": [tc.dict() for tc in self.tool_calls] if self.tool_calls else [],
             "start_time": self.start_time,
             "end_time": self.end_time,
             "step": self.step_number,
             "error": self.error.dict() if self.error else None,
             "duration": self.duration,
+            "time_to_first_action": self.time_to_first_action,
             "model_output_message": self.model_output_message,
             "model_output": self.model_output,
             "observations": self.observations,
@@ -136,12 +192,19 @@ class ActionStep(MemoryStep):
         return messages
 
 
-@dataclass
+@dataclass(slots=True)
 class PlanningStep(MemoryStep):
-    model_input_messages: List[Message]
+    model_input_messages: MemoryMessages | List[Message]
     model_output_message: ChatMessage
     plan: str
 
+    def dict(self):
+        return {
+            "model_input_messages": list(self.model_input_messages),
+            "model_output_message": asdict(self.model_output_message),
+            "plan": self.plan,
+        }
+
     def to_messages(self, summary_mode: bool, **kwargs) -> List[Message]:
         if summary_mode:
             return []
@@ -152,7 +215,7 @@ class PlanningStep(MemoryStep):
         ]
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskStep(MemoryStep):
     task: str
     task_images: List["PIL.Image.Image"] | None = None
@@ -166,7 +229,7 @@ class TaskStep(MemoryStep):
         return [Message(role=MessageRole.USER, content=content)]
 
 
-@dataclass
+@dataclass(slots=True)
 class SystemPromptStep(MemoryStep):
     system_prompt: str
 
@@ -175,7 +238,7 @@ class SystemPromptStep(MemoryStep):
             return []
         return [Message(role=MessageRole.SYSTEM, content=[{"type": "text", "text": self.system_prompt}])]
     
-@dataclass
+@dataclass(slots=True)
 class UserPromptStep(MemoryStep):
     user_prompt: str
 
@@ -185,7 +248,7 @@ class UserPromptStep(MemoryStep):
         return [Message(role=MessageRole.USER, content=[{"type": "text", "text": self.user_prompt}])]
 
     
-@dataclass
+@dataclass(slots=True)
 class FinalAnswerStep(MemoryStep):
     final_answer: Any
 
@@ -199,6 +262,20 @@ class AgentMemory:
     def reset(self):
         self.steps = []
 
+    def reference_messages(
+        self,
+        summary_mode: bool = False,
+        prefix: Iterable[Message] = (),
+        suffix: Iterable[Message] = (),
+    ) -> MemoryMessages:
+        """The memory written to messages like `write_memory_to_messages` does, as references to the current steps."""
+        return MemoryMessages(
+            (self.system_prompt, *self.steps, self.user_prompt),
+            summary_mode=summary_mode,
+            prefix=tuple(prefix),
+            suffix=tuple(suffix),
+        )
+
     def get_succinct_steps(self) -> list[dict]:
         return [
             {key: value for key, value in step.dict().items() if key != "model_input_messages"} for step in self.steps
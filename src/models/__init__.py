@@ -1,5 +1,6 @@
 from src.models.base import (
                             ChatMessage,
+                            ChatMessageStreamDelta,
                             MessageRole,
                             Model,
                             parse_json_if_needed
@@ -15,6 +16,7 @@ __all__ = [
     "Model",
     "LiteLLMModel",
     "ChatMessage",
+    "ChatMessageStreamDelta",
     "MessageRole",
     "OpenAIServerModel",
     "parse_json_if_needed",
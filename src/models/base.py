@@ -11,22 +11,33 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import contextlib
+import functools
+import inspect
 import json
 import logging
 import os
 import re
+import time
 import uuid
 import warnings
 from copy import deepcopy
 from dataclasses import asdict, dataclass
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Union
 
 from src.utils import (_is_package_available,
                        encode_image_base64,
                        make_image_url,
-                       parse_json_blob)
+                       extract_json_blob,
+                       JsonRepairStats,
+                       json_repair_stats)
+from src.utils.json_repair import CODE_FENCE, load_json_blob
 from src.logger import logger
+from src.logger.usage import TokenUsage, usage_tracker
+from src.models.cache import get_request_key, is_reused, mark_reused
+from src.models.circuit_breaker import CircuitOpenError, is_provider_failure
+from src.models.streaming import StopSequenceDetector, StreamAccumulator
 
 
 if TYPE_CHECKING:
@@ -48,6 +59,42 @@ DEFAULT_CODEAGENT_REGEX_GRAMMAR = {
 }
 
 
+def get_token_usage(usage: Dict[str, Any]) -> TokenUsage:
+    """Token usage of a provider `usage` dict, with the prompt-cache counts of OpenAI and Anthropic responses."""
+    prompt_tokens_details = usage.get("prompt_tokens_details") or {}
+    return TokenUsage(
+        input_tokens=usage.get("prompt_tokens") or 0,
+        output_tokens=usage.get("completion_tokens") or 0,
+        cached_input_tokens=prompt_tokens_details.get("cached_tokens") or usage.get("cache_read_input_tokens") or 0,
+        cache_write_tokens=usage.get("cache_creation_input_tokens") or 0,
+    )
+
+
+RAW_SUMMARY_KEYS = ("id", "model", "created")
+
+
+def get_raw_summary(response: Any) -> Optional[Dict[str, Any]]:
+    """
+    The identifying fields of a provider response: id, model, creation time and finish reason.
+
+    Messages keep this summary rather than the whole response, which lives on in the agent memory.
+    """
+
+    def get_field(obj: Any, key: str) -> Any:
+        return obj.get(key) if isinstance(obj, dict) else getattr(obj, key, None)
+
+    if response is None:
+        return None
+    summary = {key: get_field(response, key) for key in RAW_SUMMARY_KEYS}
+    choices = get_field(response, "choices")
+    if choices:
+        summary["finish_reason"] = get_field(choices[0], "finish_reason")
+    else:
+        summary["finish_reason"] = get_field(response, "stopReason")  # Amazon Bedrock
+    summary = {key: value for key, value in summary.items() if value is not None}
+    return summary or None
+
+
 def get_dict_from_nested_dataclasses(obj, ignore_key=None):
     def convert(obj):
         if hasattr(obj, "__dataclass_fields__"):
@@ -91,12 +138,14 @@ class ChatMessageToolCall:
         return cls(**asdict(tool_call))
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     role: str
     content: Optional[str] = None
     tool_calls: Optional[List[ChatMessageToolCall]] = None
-    raw: Optional[Any] = None  # Stores the raw output from the API
+    raw: Optional[Any] = None  # Summary of the raw output from the API (the whole output with `keep_raw_responses`)
+    token_usage: Optional[TokenUsage] = None  # Usage of the call that produced this message
+    latency: Optional[float] = None  # Wall-clock seconds of that call
 
     def model_dump_json(self):
         return json.dumps(get_dict_from_nested_dataclasses(self, ignore_key="raw"))
@@ -126,6 +175,22 @@ class ChatMessage:
         return cls.from_dict(asdict(message), raw=raw)
 
 
+@dataclass
+class ToolCallStreamDelta:
+    index: int
+    id: Optional[str] = None
+    name: Optional[str] = None
+    arguments: Optional[str] = None  # Fragment of the arguments JSON
+
+
+@dataclass
+class ChatMessageStreamDelta:
+    content: Optional[str] = None
+    tool_calls: Optional[List[ToolCallStreamDelta]] = None
+    completed_tool_calls: Optional[List[ChatMessageToolCall]] = None  # Tool calls whose arguments just became complete
+    message: Optional[ChatMessage] = None  # The assembled message, set on the last delta only
+
+
 def parse_json_if_needed(arguments: Union[str, dict]) -> Union[str, dict]:
     if isinstance(arguments, dict):
         return arguments
@@ -243,18 +308,123 @@ def get_clean_message_list(
     return output_message_list
 
 
-def get_tool_call_from_text(text: str, tool_name_key: str, tool_arguments_key: str) -> ChatMessageToolCall:
+JSON_SCHEMA_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": (list, tuple),
+    "object": dict,
+    "null": type(None),
+}
+
+
+def validate_tool_arguments(tool: Any, arguments: Any) -> Optional[str]:
+    """Check tool call arguments against the inputs of the tool: returns what is wrong, or `None` if they are valid."""
+    inputs = tool.inputs
+    if not isinstance(arguments, dict):
+        # A tool with a single input can be called with the bare value
+        return None if len(inputs) == 1 else f"Tool '{tool.name}' expects a dictionary of arguments, got {arguments!r}"
+
+    unknown = [key for key in arguments if key not in inputs]
+    if unknown:
+        return f"Tool '{tool.name}' got unexpected arguments {unknown}, expected arguments in {list(inputs)}"
+    for key, schema in inputs.items():
+        if key not in arguments:
+            if not schema.get("nullable"):
+                return f"Tool '{tool.name}' is missing the required argument '{key}'"
+            continue
+        value = arguments[key]
+        expected = JSON_SCHEMA_TYPES.get(schema["type"])
+        if value is None and schema.get("nullable") or expected is None:
+            continue
+        if not isinstance(value, expected) or isinstance(value, bool) and schema["type"] in ("integer", "number"):
+            return f"Argument '{key}' of tool '{tool.name}' should be of type {schema['type']}, got {type(value).__name__}"
+    return None
+
+
+def parse_tool_arguments(arguments: Any) -> tuple[Any, List[str]]:
+    """
+    Parse tool call arguments given as a string, repairing broken JSON.
+
+    Returns the arguments and the repairs they needed. Strings that hold no JSON object are returned as they are.
+    """
+    if not isinstance(arguments, str):
+        return arguments, []
+    try:
+        return json.loads(arguments), []
+    except ValueError:
+        pass
+    try:
+        # Raw newlines and tabs in strings
+        parsed = json.loads(arguments, strict=False)
+        if isinstance(parsed, dict):
+            return parsed, ["newline"]
+    except ValueError:
+        pass
+    try:
+        parsed, _, fixes = load_json_blob(arguments)
+    except ValueError:
+        return arguments, []
+    if not isinstance(parsed, dict):
+        return arguments, []
+    if not fixes:
+        fixes = ["code_fence" if CODE_FENCE.search(arguments) else "surrounding_text"]
+    return parsed, fixes
+
+
+def check_tool_call(
+    name: str,
+    arguments: Any,
+    fixes: List[str],
+    tools_to_call_from: Optional[List[Any]],
+    stats: Optional[JsonRepairStats] = json_repair_stats,
+):
+    """Count a parsed tool call. A repaired one must match the schema of its tool, or `ValueError` is raised."""
+    if not fixes:
+        if stats is not None:
+            stats.record("parsed")
+        return
+    tool = next((tool for tool in tools_to_call_from or [] if tool.name == name), None)
+    error = validate_tool_arguments(tool, arguments) if tool is not None else None
+    if error is not None:
+        if stats is not None:
+            stats.record("rejected", fixes)
+        raise ValueError(f"The tool call was repaired ({', '.join(fixes)}) but is invalid: {error}")
+    if stats is not None:
+        stats.record("repaired", fixes)
+    logger.info(f"Repaired the tool call to '{name}' ({', '.join(fixes)}) instead of retrying")
+
+
+def get_tool_call_from_text(
+    text: str,
+    tool_name_key: str,
+    tool_arguments_key: str,
+    tools_to_call_from: Optional[List[Any]] = None,
+    stats: Optional[JsonRepairStats] = json_repair_stats,
+) -> ChatMessageToolCall:
+    """
+    Parse a tool call written as a JSON blob in the model output, repairing broken JSON locally.
 
-    tool_call_dictionary, _ = parse_json_blob(text)
+    Repaired tool calls are validated against the schema of their tool in `tools_to_call_from`, and counted in `stats`.
+    """
+    try:
+        tool_call_dictionary, _, fixes = extract_json_blob(text)
+    except ValueError:
+        if stats is not None:
+            stats.record("failed")
+        raise
     try:
         tool_name = tool_call_dictionary[tool_name_key]
     except Exception as e:
+        if stats is not None:
+            stats.record("failed")
         raise ValueError(
             f"Key {tool_name_key=} not found in the generated tool call. Got keys: {list(tool_call_dictionary.keys())} instead"
         ) from e
 
-    tool_arguments = tool_call_dictionary.get(tool_arguments_key, None)
-    tool_arguments = parse_json_if_needed(tool_arguments)
+    tool_arguments, argument_fixes = parse_tool_arguments(tool_call_dictionary.get(tool_arguments_key, None))
+    check_tool_call(tool_name, tool_arguments, fixes + argument_fixes, tools_to_call_from, stats)
 
     return ChatMessageToolCall(
         id=str(uuid.uuid4()),
@@ -287,15 +457,37 @@ class Model:
         flatten_messages_as_text: bool = False,
         tool_name_key: str = "name",
         tool_arguments_key: str = "arguments",
+        keep_raw_responses: bool = False,
         **kwargs,
     ):
         self.flatten_messages_as_text = flatten_messages_as_text
         self.tool_name_key = tool_name_key
         self.tool_arguments_key = tool_arguments_key
+        self.keep_raw_responses = keep_raw_responses
         self.kwargs = kwargs
         self.last_input_token_count = None
         self.last_output_token_count = None
 
+    def get_raw(self, response: Any) -> Any:
+        """What the messages keep of a provider response: a summary, or all of it with `keep_raw_responses`."""
+        return response if self.keep_raw_responses else get_raw_summary(response)
+
+    def parse_tool_calls(self, message: ChatMessage, tools_to_call_from: Optional[List[Any]] = None) -> ChatMessage:
+        """Parse the tool call written in the content of a message without tool calls, or raise a `ValueError`."""
+        message.role = MessageRole.ASSISTANT
+        if not message.tool_calls:
+            if not message.content:
+                raise ValueError("The model output contains no content and no tool calls.")
+            # Already counted when the message was post-processed
+            message.tool_calls = [
+                get_tool_call_from_text(
+                    message.content, self.tool_name_key, self.tool_arguments_key, tools_to_call_from, stats=None
+                )
+            ]
+        for tool_call in message.tool_calls:
+            tool_call.function.arguments = parse_json_if_needed(tool_call.function.arguments)
+        return message
+
     def _prepare_completion_kwargs(
         self,
         messages: List[Dict[str, str]],
@@ -532,7 +724,7 @@ class VLLMModel(Model):
         chat_message = ChatMessage(
             role=MessageRole.ASSISTANT,
             content=output_text,
-            raw={"out": output_text, "completion_kwargs": completion_kwargs},
+            raw=self.get_raw({"out": output_text, "completion_kwargs": completion_kwargs}),
         )
         if tools_to_call_from:
             chat_message.tool_calls = [
@@ -638,7 +830,9 @@ class MLXModel(Model):
                 break
 
         chat_message = ChatMessage(
-            role=MessageRole.ASSISTANT, content=text, raw={"out": text, "completion_kwargs": completion_kwargs}
+            role=MessageRole.ASSISTANT,
+            content=text,
+            raw=self.get_raw({"out": text, "completion_kwargs": completion_kwargs}),
         )
         if tools_to_call_from:
             chat_message.tool_calls = [get_tool_call_from_text(text, self.tool_name_key, self.tool_arguments_key)]
@@ -843,7 +1037,7 @@ class TransformersModel(Model):
         chat_message = ChatMessage(
             role=MessageRole.ASSISTANT,
             content=output_text,
-            raw={"out": output_text, "completion_kwargs": completion_kwargs},
+            raw=self.get_raw({"out": output_text, "completion_kwargs": completion_kwargs}),
         )
         if tools_to_call_from:
             chat_message.tool_calls = [
@@ -867,21 +1061,379 @@ class ApiModel(Model):
             Mapping to convert  between internal role names and API-specific role names. Defaults to None.
         client (`Any`, **optional**):
             Pre-configured API client instance. If not provided, a default client will be created. Defaults to None.
+        response_cache (`ResponseCache`, **optional**):
+            Cache of provider responses keyed on the request content. Defaults to None (no caching).
+        cassette (`Cassette`, **optional**):
+            Records every request/response pair, or replays them offline. Defaults to None.
+        rate_limiter (`RateLimiter`, **optional**):
+            Process-wide rate limiter and concurrency governor shared by all models. Defaults to None (no limits).
+        hedge_policy (`HedgePolicy`, **optional**):
+            Sends a duplicate of requests that are slower than usual and keeps the first response. Defaults to None.
+        hedge_client (`Any`, **optional**):
+            Client of an alternate endpoint for hedged requests. Defaults to None (hedge to the same endpoint).
+        circuit_breaker (`CircuitBreaker`, **optional**):
+            Tracks failures and slow calls of this model; while it is open, calls go to `fallback_models`. Defaults to None.
+        fallback_models (`list[ApiModel]`, **optional**):
+            Models tried in order when this model fails or its circuit breaker is open. Defaults to None.
+        context_budgeter (`ContextBudgeter`, **optional**):
+            Trims the messages of requests that would not fit `context_limit`. Defaults to None (no trimming).
+        context_limit (`int`, **optional**):
+            Context window of the model, in tokens. Required for `context_budgeter` to apply.
+        request_coalescer (`RequestCoalescer`, **optional**):
+            Shares one provider call between identical requests in flight at the same time. Defaults to None.
+        load_balancer (`LoadBalancer`, **optional**):
+            Spreads the requests over several replicas of the model, least loaded first. Defaults to None.
         **kwargs: Additional keyword arguments to pass to the parent class.
     """
 
     def __init__(
-        self, model_id: str, custom_role_conversions: dict[str, str] | None = None, client: Any | None = None, **kwargs
+        self,
+        model_id: str,
+        custom_role_conversions: dict[str, str] | None = None,
+        client: Any | None = None,
+        response_cache: Any | None = None,
+        cassette: Any | None = None,
+        rate_limiter: Any | None = None,
+        hedge_policy: Any | None = None,
+        hedge_client: Any | None = None,
+        circuit_breaker: Any | None = None,
+        fallback_models: List[Any] | None = None,
+        context_budgeter: Any | None = None,
+        context_limit: int | None = None,
+        request_coalescer: Any | None = None,
+        load_balancer: Any | None = None,
+        **kwargs,
     ):
         super().__init__(**kwargs)
         self.model_id = model_id
         self.custom_role_conversions = custom_role_conversions or {}
         self.client = client or self.create_client()
+        self.response_cache = response_cache
+        self.cassette = cassette
+        self.rate_limiter = rate_limiter
+        self.hedge_policy = hedge_policy
+        self.hedge_client = hedge_client
+        self.circuit_breaker = circuit_breaker
+        self.fallback_models = fallback_models or []
+        self.context_budgeter = context_budgeter
+        self.context_limit = context_limit
+        self.request_coalescer = request_coalescer
+        self.load_balancer = load_balancer
+
+    @property
+    def endpoint(self) -> str:
+        """The provider endpoint this model talks to (base URL, or provider name), used to share rate limits."""
+        for client in (getattr(self, "http_client", None), self.client):
+            base_url = getattr(client, "base_url", None)
+            if base_url:
+                return str(base_url)
+        api_base = getattr(self, "api_base", None)
+        if api_base:
+            return api_base
+        return self.model_id.split("/")[0] if "/" in self.model_id else self.model_id
 
     def create_client(self):
         """Create the API client for the specific service."""
         raise NotImplementedError("Subclasses must implement this method to create a client")
 
+    async def __call__(
+        self,
+        messages: List[Dict[str, str]],
+        stop_sequences: Optional[List[str]] = None,
+        grammar: Optional[str] = None,
+        tools_to_call_from: Optional[List[Any]] = None,
+        **kwargs,
+    ) -> ChatMessage:
+        """
+        Generate the next message. With a circuit breaker, calls are rerouted to the first available
+        fallback model while the breaker is open, and a failed call is retried on the fallbacks. If the
+        breaker is open and no fallback is available, `CircuitOpenError` is raised without calling the model.
+
+        The returned message carries the call's own `token_usage` and `latency`, which are also recorded
+        in the usage tracker under the current usage scope (agent, step, tool). A response reused from the
+        response cache or a coalesced request is recorded as spending no tokens.
+        """
+        kwargs.update(stop_sequences=stop_sequences, grammar=grammar, tools_to_call_from=tools_to_call_from)
+        start_time = time.perf_counter()
+        message, model_id = await self._route(messages, **kwargs)
+        message.latency = time.perf_counter() - start_time
+        usage_tracker.record(model_id, message.token_usage, message.latency)
+        return message
+
+    async def _route(self, messages: List[Dict[str, str]], **kwargs) -> tuple[ChatMessage, str]:
+        """Generate with this model or its fallbacks, and return the message with the id of the model that answered."""
+        if self.circuit_breaker is None:
+            return await self._generate(messages, **kwargs), self.model_id
+
+        error = None
+        is_open = not self.circuit_breaker.allow_request()
+        if not is_open:
+            try:
+                return await self._guarded_generate(messages, **kwargs), self.model_id
+            except Exception as e:
+                # The fallbacks would reject a bad request just the same
+                if not self.fallback_models or not is_provider_failure(e):
+                    raise
+                logger.warning(f"Model {self.model_id} failed, falling back: {e}")
+                error = e
+
+        rerouted = False
+        for fallback in self.fallback_models:
+            if fallback.circuit_breaker is not None and not fallback.circuit_breaker.allow_request():
+                continue
+            if is_open and not rerouted:
+                self.circuit_breaker.record_reroute()
+                rerouted = True
+            try:
+                message = await fallback._guarded_generate(messages, **kwargs)
+            except Exception as e:
+                if not is_provider_failure(e):
+                    raise
+                error = e
+                continue
+            self.last_input_token_count = fallback.last_input_token_count
+            self.last_output_token_count = fallback.last_output_token_count
+            return message, fallback.model_id
+
+        if error is not None:
+            raise error
+        raise CircuitOpenError(
+            f"Circuit breaker of {self.model_id} is open and no fallback is available, "
+            f"next probe in {self.circuit_breaker.retry_in:.0f}s"
+        )
+
+    async def _guarded_generate(self, messages: List[Dict[str, str]], **kwargs) -> ChatMessage:
+        """`_generate`, with its outcome and duration recorded by the circuit breaker."""
+        start_time = time.perf_counter()
+        try:
+            message = await self._generate(messages, **kwargs)
+        except Exception as e:
+            if self.circuit_breaker is not None:
+                if is_provider_failure(e):
+                    self.circuit_breaker.record(False, time.perf_counter() - start_time)
+                else:
+                    self.circuit_breaker.release_probe()
+            raise
+        except BaseException:
+            # Cancelled: no outcome to record, but a half-open breaker must not wait on this probe forever.
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.release_probe()
+            raise
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(True, time.perf_counter() - start_time)
+        return message
+
+    async def _generate(
+        self,
+        messages: List[Dict[str, str]],
+        stop_sequences: Optional[List[str]] = None,
+        grammar: Optional[str] = None,
+        tools_to_call_from: Optional[List[Any]] = None,
+        **kwargs,
+    ) -> ChatMessage:
+        """Prepare the request for the provider, send it and build the resulting message."""
+        raise NotImplementedError("Subclasses must implement this method to generate a message")
+
+    async def _completion(self, completion_kwargs: Dict[str, Any], client: Any | None = None) -> Dict[str, Any]:
+        """Send one completion request to the provider (through `client` instead of the model's own when given) and return the response as a plain dict."""
+        raise NotImplementedError("Subclasses must implement this method to call the provider")
+
+    async def _send(self, completion_kwargs: Dict[str, Any], client: Any | None = None) -> Dict[str, Any]:
+        """Send one request, to the least loaded replica and within the shared rate limits when set."""
+        if client is None and self.load_balancer is not None:
+            return await self.load_balancer.run(lambda replica_client: self._send(completion_kwargs, client=replica_client))
+        if self.rate_limiter is None:
+            return await self._completion(completion_kwargs, client=client)
+        endpoint = str(client.base_url) if client is not None else self.endpoint
+        return await self.rate_limiter.run(
+            endpoint, self.model_id, functools.partial(self._completion, client=client), completion_kwargs
+        )
+
+    async def _call_provider(self, completion_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the provider, hedging slow requests when a hedge policy is set."""
+        if self.hedge_policy is None:
+            return await self._send(completion_kwargs)
+        return await self.hedge_policy.run(
+            self.model_id,
+            lambda: self._send(completion_kwargs),
+            lambda: self._send(completion_kwargs, client=self.hedge_client),
+        )
+
+    def _fit_context(self, completion_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Trim the request to the model's context window when a context budgeter is set."""
+        if self.context_budgeter is None or self.context_limit is None:
+            return completion_kwargs
+        return self.context_budgeter.fit(completion_kwargs, self.context_limit, self.model_id)
+
+    async def _dispatch(self, completion_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Serve the request from the cassette or the response cache when possible, otherwise call the provider.
+        Identical requests already in flight are awaited instead of being sent again.
+        """
+        completion_kwargs = self._fit_context(completion_kwargs)
+        cache = self.response_cache
+        cassette = self.cassette
+        use_cache = cache is not None and cache.enabled
+        if not use_cache and cassette is None and self.request_coalescer is None:
+            return await self._call_provider(completion_kwargs)
+
+        key = get_request_key(completion_kwargs)
+        if cassette is not None and cassette.replaying:
+            return await cassette.replay(key, self.model_id)
+        if self.request_coalescer is None:
+            return await self._fetch(key, completion_kwargs)
+        return await self.request_coalescer.run(key, lambda: self._fetch(key, completion_kwargs))
+
+    async def _fetch(self, key: str, completion_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Look the request up in the response cache, call the provider on a miss, and record it on the cassette."""
+        cache = self.response_cache
+        cassette = self.cassette
+        use_cache = cache is not None and cache.enabled
+
+        start_time = time.perf_counter()
+        response = await cache.get(key) if use_cache else None
+        cache_hit = response is not None
+        if not cache_hit:
+            response = await self._call_provider(completion_kwargs)
+            if use_cache:
+                await cache.set(key, response, latency=time.perf_counter() - start_time)
+
+        if cassette is not None and cassette.recording:
+            await cassette.record(key, self.model_id, response, latency=time.perf_counter() - start_time)
+        return mark_reused(response) if cache_hit else response
+
+    @property
+    def can_stream(self) -> bool:
+        """
+        Whether `stream` talks to the provider directly. Circuit breakers, fallbacks, the response cache, the
+        cassette, coalescing and hedging all work on complete responses: with any of them set, `stream` goes
+        through `__call__` and yields the whole message at once.
+        """
+        return not (
+            self.circuit_breaker is not None
+            or self.fallback_models
+            or (self.response_cache is not None and self.response_cache.enabled)
+            or self.cassette is not None
+            or self.request_coalescer is not None
+            or self.hedge_policy is not None
+        )
+
+    async def _stream_from_call(
+        self,
+        messages: List[Dict[str, str]],
+        max_tool_calls: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[ChatMessageStreamDelta]:
+        """Generate the message with `__call__` and yield it as a single delta, for models that cannot stream."""
+        message = await self(messages, **kwargs)
+        if max_tool_calls is not None and message.tool_calls:
+            message.tool_calls = message.tool_calls[:max_tool_calls]
+        yield ChatMessageStreamDelta(
+            content=message.content if isinstance(message.content, str) else None,
+            completed_tool_calls=message.tool_calls or None,
+            message=message,
+        )
+
+    async def _stream_completion(self, completion_kwargs: Dict[str, Any], client: Any | None = None) -> Any:
+        """Start a streamed completion request (through `client` instead of the model's own when given) and return the async iterator of its chunks."""
+        raise NotImplementedError("Subclasses must implement this method to stream from the provider")
+
+    async def _stream(
+        self,
+        completion_kwargs: Dict[str, Any],
+        tools_to_call_from: Optional[List[Any]] = None,
+        stop_sequences: Optional[List[str]] = None,
+        max_tool_calls: Optional[int] = None,
+    ) -> AsyncIterator[ChatMessageStreamDelta]:
+        """
+        Stream a completion as `ChatMessageStreamDelta`s. The stream is aborted as soon as a stop sequence
+        shows up in the text (also for models that do not accept `stop`) or `max_tool_calls` tool calls are
+        complete. The last delta carries the assembled message.
+        """
+        start_time = time.perf_counter()
+        completion_kwargs = self._fit_context(completion_kwargs)
+        stop_detector = StopSequenceDetector(stop_sequences)
+        accumulator = StreamAccumulator()
+        async with contextlib.AsyncExitStack() as stack:
+            replica = None
+            if self.load_balancer is not None:
+                replica = await stack.enter_async_context(self.load_balancer.slot())
+            if self.rate_limiter is not None:
+                endpoint = replica.api_base if replica is not None else self.endpoint
+                reported_usage = await stack.enter_async_context(
+                    self.rate_limiter.limit(endpoint, self.model_id, completion_kwargs)
+                )
+            else:
+                reported_usage = {}
+
+            stream = await self._stream_completion(
+                completion_kwargs, client=replica.client if replica is not None else None
+            )
+            try:
+                async for chunk in stream:
+                    chunk = chunk.model_dump() if hasattr(chunk, "model_dump") else chunk
+                    text, tool_call_deltas, completed = accumulator.add(chunk)
+                    text = stop_detector.feed(text) if text else ""
+                    accumulator.add_content(text)
+                    if text or tool_call_deltas:
+                        yield ChatMessageStreamDelta(
+                            content=text or None,
+                            tool_calls=[ToolCallStreamDelta(**delta) for delta in tool_call_deltas] or None,
+                            completed_tool_calls=ChatMessage.from_dict(
+                                {"role": "assistant", "tool_calls": completed}
+                            ).tool_calls or None,
+                        )
+                    if stop_detector.stopped or (
+                        max_tool_calls is not None and len(accumulator.completed) >= max_tool_calls
+                    ):
+                        break
+            finally:
+                close = getattr(stream, "aclose", None) or getattr(stream, "close", None)
+                if close is not None:
+                    result = close()
+                    if inspect.isawaitable(result):
+                        await result
+
+            remaining = stop_detector.flush() if not stop_detector.stopped else ""
+            accumulator.add_content(remaining)
+            if remaining:
+                yield ChatMessageStreamDelta(content=remaining)
+
+            usage = accumulator.usage
+            if usage is None:
+                # Aborted streams end before the provider reports usage: estimate it (4 characters per token).
+                message_dict = accumulator.to_message_dict()
+                usage = {
+                    "prompt_tokens": len(json.dumps(completion_kwargs.get("messages"), default=str)) // 4,
+                    "completion_tokens": len(json.dumps(message_dict, default=str)) // 4,
+                }
+            reported_usage.update(usage)
+
+        response = {
+            "choices": [{"message": accumulator.to_message_dict(), "finish_reason": accumulator.finish_reason}],
+            "usage": usage,
+        }
+        message = self._build_chat_message(response, tools_to_call_from)
+        message.latency = time.perf_counter() - start_time
+        usage_tracker.record(self.model_id, message.token_usage, message.latency)
+        yield ChatMessageStreamDelta(message=message)
+
+    def _build_chat_message(self, response: Dict[str, Any], tools_to_call_from) -> ChatMessage:
+        """Turn a provider response into a `ChatMessage` carrying its own token usage."""
+        usage = response.get("usage") or {}
+        # Only reflect the latest call of this model, whatever the caller: kept for serialization.
+        self.last_input_token_count = usage.get("prompt_tokens")
+        self.last_output_token_count = usage.get("completion_tokens")
+
+        message = response["choices"][0]["message"]
+        first_message = ChatMessage.from_dict(
+            {key: message.get(key) for key in ("role", "content", "tool_calls")},
+            raw=self.get_raw(response),
+        )
+        # A response reused from the cache or a coalesced request cost no tokens this time
+        first_message.token_usage = TokenUsage() if is_reused(response) else get_token_usage(usage)
+        return self.postprocess_message(first_message, tools_to_call_from)
+
     def postprocess_message(self, message: ChatMessage, tools_to_call_from) -> ChatMessage:
         """Sometimes APIs fail to properly parse a tool call: this function tries to parse."""
         message.role = MessageRole.ASSISTANT  # Overwrite role if needed
@@ -890,13 +1442,22 @@ class ApiModel(Model):
             if not message.tool_calls:
                 try:
                     tool_calls = [
-                        get_tool_call_from_text(message.content, self.tool_name_key, self.tool_arguments_key)
+                        get_tool_call_from_text(
+                            message.content, self.tool_name_key, self.tool_arguments_key, tools_to_call_from
+                        )
                     ]
-                except:
+                except Exception:
                     tool_calls = []
                 message.tool_calls = tool_calls
-            for tool_call in message.tool_calls:
-                tool_call.function.arguments = parse_json_if_needed(tool_call.function.arguments)
+            else:
+                for tool_call in message.tool_calls:
+                    arguments, fixes = parse_tool_arguments(tool_call.function.arguments)
+                    try:
+                        check_tool_call(tool_call.function.name, arguments, fixes, tools_to_call_from)
+                    except ValueError as e:
+                        logger.warning(str(e))
+                        continue
+                    tool_call.function.arguments = arguments
         return message
 
 
@@ -988,7 +1549,7 @@ class LiteLLMModel(ApiModel):
         self.last_output_token_count = response.usage.completion_tokens
         first_message = ChatMessage.from_dict(
             response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
-            raw=response,
+            raw=self.get_raw(response),
         )
         return self.postprocess_message(first_message, tools_to_call_from)
 
@@ -1100,7 +1661,7 @@ class InferenceClientModel(ApiModel):
 
         self.last_input_token_count = response.usage.prompt_tokens
         self.last_output_token_count = response.usage.completion_tokens
-        first_message = ChatMessage.from_dict(asdict(response.choices[0].message), raw=response)
+        first_message = ChatMessage.from_dict(asdict(response.choices[0].message), raw=self.get_raw(response))
         return self.postprocess_message(first_message, tools_to_call_from)
 
 
@@ -1198,7 +1759,7 @@ class OpenAIServerModel(ApiModel):
 
         first_message = ChatMessage.from_dict(
             response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
-            raw=response,
+            raw=self.get_raw(response),
         )
         return self.postprocess_message(first_message, tools_to_call_from)
 
@@ -1426,7 +1987,7 @@ class AmazonBedrockServerModel(ApiModel):
 
         # Get first message
         response["output"]["message"]["content"] = response["output"]["message"]["content"][0]["text"]
-        first_message = ChatMessage.from_dict(response["output"]["message"], raw=response)
+        first_message = ChatMessage.from_dict(response["output"]["message"], raw=self.get_raw(response))
 
         return self.postprocess_message(first_message, tools_to_call_from)
 
@@ -1447,4 +2008,6 @@ __all__ = [
     "AzureOpenAIServerModel",
     "AmazonBedrockServerModel",
     "ChatMessage",
+    "ChatMessageStreamDelta",
+    "ToolCallStreamDelta",
 ]
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+from copy import deepcopy
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.utils import DiskCache
+from src.logger import logger
+
+# Transport settings of the completion kwargs: they do not change the provider's answer and are left out
+# of the request key. Every other field (max_tokens, response_format, reasoning_effort, top_p...) is hashed.
+TRANSPORT_FIELDS = frozenset({
+    "client",
+    "http_client",
+    "api_key",
+    "api_base",
+    "base_url",
+    "timeout",
+    "extra_headers",
+    "max_retries",
+    "num_retries",
+})
+
+
+class CacheMode(str, Enum):
+    OFF = "off"
+    READ_WRITE = "read_write"
+    READ_ONLY = "read_only"
+    WRITE_ONLY = "write_only"
+
+    @property
+    def readable(self) -> bool:
+        return self in (CacheMode.READ_WRITE, CacheMode.READ_ONLY)
+
+    @property
+    def writable(self) -> bool:
+        return self in (CacheMode.READ_WRITE, CacheMode.WRITE_ONLY)
+
+
+def get_request_key(completion_kwargs: Dict[str, Any]) -> str:
+    """Canonical content hash of a completion request."""
+    request = {field: value for field, value in completion_kwargs.items() if field not in TRANSPORT_FIELDS}
+    if request.get("tools"):
+        # Compiled tool schemas carry their serialized JSON, no need to serialize them again.
+        request["tools"] = [getattr(tool, "json", tool) for tool in request["tools"]]
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of provider responses, shared by every `ApiModel`.
+
+    Responses are stored as JSON in a `DiskCache`, keyed on `get_request_key`. Disk access runs in a
+    worker thread so cache lookups never block the event loop.
+
+    Args:
+        path (`str`): Path of the SQLite database file.
+        mode (`str` or `CacheMode`, default `"read_write"`): One of `off`, `read_write`, `read_only`, `write_only`.
+        ttl_seconds (`float`, *optional*): Time to live of a cached response. `None` keeps responses forever.
+        max_size_bytes (`int`, *optional*): Size budget of the store, enforced with LRU eviction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str | CacheMode = CacheMode.READ_WRITE,
+        ttl_seconds: Optional[float] = None,
+        max_size_bytes: Optional[int] = None,
+    ):
+        self.mode = CacheMode(mode)
+        self.store = DiskCache(path, max_size_bytes=max_size_bytes, default_ttl=ttl_seconds, table="llm_responses")
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.saved_latency = 0.0
+        self.saved_input_tokens = 0
+        self.saved_output_tokens = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != CacheMode.OFF
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.mode.readable:
+            return None
+        value = await asyncio.to_thread(self.store.get, key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        entry = json.loads(value)
+        self.hits += 1
+        self.saved_latency += entry.get("latency", 0.0)
+        usage = entry["response"].get("usage") or {}
+        self.saved_input_tokens += usage.get("prompt_tokens") or 0
+        self.saved_output_tokens += usage.get("completion_tokens") or 0
+        return entry["response"]
+
+    async def set(self, key: str, response: Dict[str, Any], latency: float = 0.0):
+        if not self.mode.writable:
+            return
+        try:
+            value = json.dumps({"response": response, "latency": latency}, ensure_ascii=False, default=str)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Response cache skipped an unserializable response: {e}")
+            return
+        await asyncio.to_thread(self.store.set, key, value.encode("utf-8"))
+        self.writes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode.value,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.store.evictions,
+            "entries": len(self.store),
+            "size_bytes": self.store.size_bytes,
+            "saved_latency_seconds": round(self.saved_latency, 2),
+            "saved_input_tokens": self.saved_input_tokens,
+            "saved_output_tokens": self.saved_output_tokens,
+        }
+
+
+# Marks a response served by the response cache or shared by a coalesced request: its tokens were not spent again
+REUSED_RESPONSE_KEY = "_reused"
+
+
+def mark_reused(response: Dict[str, Any]) -> Dict[str, Any]:
+    return {**response, REUSED_RESPONSE_KEY: True}
+
+
+def is_reused(response: Dict[str, Any]) -> bool:
+    return bool(response.get(REUSED_RESPONSE_KEY))
+
+
+class RequestCoalescer:
+    """
+    Single-flight deduplication of identical in-flight requests, shared by every `ApiModel`.
+
+    The first caller of a request key runs the request; callers arriving with the same key while it is
+    in flight await the same result (or exception) instead of calling the provider again. The request
+    runs as its own task, so a cancelled caller does not fail the others. The responses of the callers
+    that joined are marked as reused, so that their tokens are not counted as spent again.
+    """
+
+    def __init__(self):
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.saved_input_tokens = 0
+        self.saved_output_tokens = 0
+
+    async def run(self, key: str, request: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            response = await asyncio.shield(task)
+            if not is_reused(response):
+                usage = response.get("usage") or {}
+                self.saved_input_tokens += usage.get("prompt_tokens") or 0
+                self.saved_output_tokens += usage.get("completion_tokens") or 0
+            # Callers get their own copy: the leader's response may be modified while building its message
+            return mark_reused(deepcopy(response))
+
+        self.requests += 1
+        task = asyncio.ensure_future(request())
+        self.in_flight[key] = task
+        task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.requests + self.coalesced
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / calls if calls else 0.0,
+            "in_flight": len(self.in_flight),
+            "saved_input_tokens": self.saved_input_tokens,
+            "saved_output_tokens": self.saved_output_tokens,
+        }
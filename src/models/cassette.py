@@ -0,0 +1,202 @@
+import asyncio
+import atexit
+import gzip
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional
+
+from src.logger import logger
+
+
+class CassetteMode(str, Enum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode when the cassette holds no response for a request."""
+
+
+def _compact(obj: Any) -> Any:
+    """Drop `None` fields so recorded provider payloads stay small."""
+    if isinstance(obj, dict):
+        return {key: _compact(value) for key, value in obj.items() if value is not None}
+    if isinstance(obj, list):
+        return [_compact(value) for value in obj]
+    return obj
+
+
+class Cassette:
+    """
+    Record/replay store for every request made through the registered models.
+
+    In record mode each provider response is appended to a gzip-compressed JSON-lines file together
+    with its request key, model and latency. Records are buffered and written `flush_every` at a time
+    to a single gzip stream, synced after each write so that a crashed run still leaves a readable
+    cassette. In replay mode the file is loaded up front and every recorded response is served once:
+    first by exact request key, then, if the request drifted (different observations, timestamps...),
+    by the order in which that model was called during recording.
+
+    Args:
+        path (`str`): Path of the cassette file (`.jsonl.gz`).
+        mode (`str` or `CassetteMode`): `off`, `record` or `replay`.
+        replay_latency (`float`, *optional*): Fixed synthetic latency in seconds for every replayed response.
+            If `None`, the latency observed while recording is used.
+        latency_scale (`float`, default `1.0`): Multiplier applied to the synthetic latency.
+        flush_every (`int`, default `16`): Number of records buffered before they are written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str | CassetteMode = CassetteMode.RECORD,
+        replay_latency: Optional[float] = None,
+        latency_scale: float = 1.0,
+        flush_every: int = 16,
+    ):
+        self.path = path
+        self.mode = CassetteMode(mode)
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self.flush_every = flush_every
+
+        self._lock = threading.Lock()
+        # Recorded entries in recording order, and the positions of each key's and model's entries in it
+        self._entries: List[Dict[str, Any]] = []
+        self._consumed: List[bool] = []
+        self._by_key: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_model: Dict[str, Deque[int]] = defaultdict(deque)
+        self._buffer: List[str] = []
+        self._file = None
+
+        self.recorded = 0
+        self.replayed = 0
+        self.replayed_out_of_order = 0
+        self.misses = 0
+
+        if self.mode == CassetteMode.RECORD:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            atexit.register(self.close)
+        elif self.mode == CassetteMode.REPLAY:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == CassetteMode.RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == CassetteMode.REPLAY
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette file not found: {self.path}")
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    self._index(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            # The recording run stopped before closing the cassette: keep every record synced until then
+            logger.warning(f"Cassette {self.path} is truncated, replaying the {len(self._entries)} complete records")
+        logger.info(f"Loaded {len(self._entries)} recorded responses from {self.path}")
+
+    def _index(self, entry: Dict[str, Any]):
+        position = len(self._entries)
+        self._entries.append(entry)
+        self._consumed.append(False)
+        self._by_key[entry["key"]].append(position)
+        self._by_model[entry["model"]].append(position)
+
+    def _flush(self):
+        """Write the buffered records. Must be called with the lock held."""
+        if not self._buffer:
+            return
+        if self._file is None:
+            # A new recording replaces the cassette of the previous run rather than appending to it
+            self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._file.write("".join(self._buffer))
+        # A sync flush ends the compressed block, so the records written so far survive a crash.
+        self._file.flush()
+        self._buffer.clear()
+
+    def _write(self, line: str):
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def close(self):
+        """Write the buffered records and end the gzip stream."""
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    async def record(self, key: str, model_id: str, response: Dict[str, Any], latency: float):
+        entry = {
+            "key": key,
+            "model": model_id,
+            "latency": round(latency, 4),
+            "response": _compact(response),
+        }
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+        if len(self._buffer) + 1 >= self.flush_every:
+            await asyncio.to_thread(self._write, line)
+        else:
+            self._write(line)
+        self.recorded += 1
+
+    def _next_unconsumed(self, positions: Optional[Deque[int]]) -> Optional[int]:
+        while positions:
+            position = positions.popleft()
+            if not self._consumed[position]:
+                return position
+        return None
+
+    def _take(self, key: str, model_id: str) -> Dict[str, Any]:
+        position = self._next_unconsumed(self._by_key.get(key))
+        if position is None:
+            position = self._next_unconsumed(self._by_model.get(model_id))
+            if position is not None:
+                self.replayed_out_of_order += 1
+        if position is None:
+            self.misses += 1
+            raise CassetteMissError(
+                f"No recorded response left for model '{model_id}' (request key {key[:12]}...) in {self.path}"
+            )
+        self._consumed[position] = True
+        return self._entries[position]
+
+    async def replay(self, key: str, model_id: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._take(key, model_id)
+        latency = self.replay_latency if self.replay_latency is not None else entry.get("latency", 0.0)
+        latency *= self.latency_scale
+        if latency > 0:
+            await asyncio.sleep(latency)
+        self.replayed += 1
+        return entry["response"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode.value,
+            "path": self.path,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "replayed_out_of_order": self.replayed_out_of_order,
+            "misses": self.misses,
+        }
+
+
+__all__ = [
+    "Cassette",
+    "CassetteMode",
+    "CassetteMissError",
+]
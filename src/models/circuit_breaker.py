@@ -0,0 +1,147 @@
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Optional
+
+from src.logger import logger
+from src.models.load_balancer import is_replica_failure
+from src.models.rate_limiter import get_status_code
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a model's circuit breaker is open and none of its fallbacks is available."""
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Errors that tell about the provider rather than the request: connection errors, timeouts, 429 and 5xx."""
+    return get_status_code(error) == 429 or is_replica_failure(error)
+
+
+class CircuitBreaker:
+    """
+    Per-model circuit breaker.
+
+    The outcome of the last `window` calls is tracked; a call counts as failed if it raised or took
+    longer than `slow_call_seconds`. Once at least `min_calls` were seen and the failure rate reaches
+    `failure_rate_threshold`, the breaker opens and calls are rerouted to the model's fallbacks. After
+    `cooldown_seconds` it half-opens: a single probe call goes through, and closes the breaker again if
+    it succeeds or reopens it if it fails. Only provider failures count: a request the provider rejects
+    (400, 422...) or a response that cannot be parsed says nothing about the provider's health.
+
+    Args:
+        name (`str`): Name of the model the breaker protects.
+        failure_rate_threshold (`float`, default `0.5`): Failure rate that opens the breaker.
+        slow_call_seconds (`float`, *optional*): Calls slower than this count as failures.
+        window (`int`, default `20`): Number of recent calls the failure rate is computed on.
+        min_calls (`int`, default `5`): Calls to observe before the breaker may open.
+        cooldown_seconds (`float`, default `60.0`): Time the breaker stays open before a probe call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: Optional[float] = None,
+        window: int = 20,
+        min_calls: int = 5,
+        cooldown_seconds: float = 60.0,
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+
+        self.state = BreakerState.CLOSED
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+        self.calls = 0
+        self.failures = 0
+        self.trips = 0
+        self.rerouted = 0
+        # Average duration of failed calls: what each call rerouted while open would have cost
+        self.failed_call_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def allow_request(self) -> bool:
+        if self.state == BreakerState.OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            self.state = BreakerState.HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == BreakerState.CLOSED:
+            return True
+        if self.state == BreakerState.HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the open breaker lets a probe call through."""
+        if self.state != BreakerState.OPEN:
+            return 0.0
+        return max(0.0, self.cooldown_seconds - (time.monotonic() - self.opened_at))
+
+    def release_probe(self):
+        """Let another probe through after the one in flight ended without an outcome (cancelled, or a bad request)."""
+        if self.state == BreakerState.HALF_OPEN:
+            self.probe_in_flight = False
+
+    def record(self, succeeded: bool, duration: float):
+        self.calls += 1
+        if succeeded and self.slow_call_seconds is not None and duration > self.slow_call_seconds:
+            succeeded = False
+        if not succeeded:
+            self.failures += 1
+            self.failed_call_seconds += (duration - self.failed_call_seconds) / self.failures
+        self.outcomes.append(succeeded)
+
+        if self.state == BreakerState.HALF_OPEN:
+            self.probe_in_flight = False
+            if succeeded:
+                self.state = BreakerState.CLOSED
+                self.outcomes.clear()
+                logger.info(f"Circuit breaker of {self.name} closed")
+            else:
+                self._open()
+        elif (
+            self.state == BreakerState.CLOSED
+            and len(self.outcomes) >= self.min_calls
+            and self.failure_rate >= self.failure_rate_threshold
+        ):
+            self._open()
+
+    def record_reroute(self):
+        self.rerouted += 1
+        self.saved_seconds += self.failed_call_seconds
+
+    def _open(self):
+        self.state = BreakerState.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        logger.warning(
+            f"Circuit breaker of {self.name} opened (failure rate {self.failure_rate:.0%}), "
+            f"rerouting calls for {self.cooldown_seconds:.0f}s"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "calls": self.calls,
+            "failures": self.failures,
+            "failure_rate": round(self.failure_rate, 2),
+            "trips": self.trips,
+            "rerouted": self.rerouted,
+            "estimated_saved_seconds": round(self.saved_seconds, 2),
+        }
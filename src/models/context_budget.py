@@ -0,0 +1,202 @@
+import threading
+from typing import Any, Dict, List, Tuple
+
+from src.logger import logger
+from src.utils.token_utils import TokenCounter
+
+# Rough cost of an image in the prompt: a 1280x720 screenshot is ~1k tokens for most providers.
+IMAGE_TOKENS = 1000
+# Per-message overhead of the chat format (role, separators).
+MESSAGE_TOKENS = 4
+TRUNCATION_NOTICE = "\n..._{removed} tokens of this content were removed to fit the context window_...\n"
+
+
+class ContextBudgeter:
+    """
+    Fits the messages of a request into the model's context window, keeping room for the output.
+
+    When a request is too large, the largest text contents of the older messages are truncated first
+    (keeping their head and tail) to `min_content_tokens` each: always cutting to the same size keeps
+    the truncated history byte-identical from one step to the next, so provider prompt caches still
+    hit on it. If that is not enough, the oldest
+    messages are dropped, and as a last resort the last `keep_last_messages` messages are truncated too.
+    System messages are left untouched, and the first user message, the agent's task, is never dropped. Every decision is logged. Token counts are memoized, so checking
+    a request that fits costs almost nothing.
+
+    Args:
+        output_headroom (`int`, default `4096`): Tokens kept for the output when the request sets no `max_tokens`.
+        keep_last_messages (`int`, default `2`): Number of most recent messages that are never dropped.
+        min_content_tokens (`int`, default `1024`): Size a text content is never truncated below.
+    """
+
+    def __init__(self, output_headroom: int = 4096, keep_last_messages: int = 2, min_content_tokens: int = 1024):
+        self.output_headroom = output_headroom
+        self.keep_last_messages = keep_last_messages
+        self.min_content_tokens = min_content_tokens
+        self.counter = TokenCounter()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.trimmed_requests = 0
+        self.truncated_contents = 0
+        self.dropped_messages = 0
+        self.removed_tokens = 0
+        self.overflowing_requests = 0
+
+    def count_content(self, content: Any, model_id: str) -> int:
+        if isinstance(content, str):
+            return self.counter.count(content, model_id)
+        tokens = 0
+        for element in content or []:
+            if element.get("type") == "text":
+                tokens += self.counter.count(element["text"], model_id)
+            else:
+                tokens += IMAGE_TOKENS
+        return tokens
+
+    def count_message(self, message: Dict[str, Any], model_id: str) -> int:
+        return MESSAGE_TOKENS + self.count_content(message.get("content"), model_id)
+
+    def get_budget(self, completion_kwargs: Dict[str, Any], context_limit: int, model_id: str) -> int:
+        output_tokens = (
+            completion_kwargs.get("max_tokens")
+            or completion_kwargs.get("max_completion_tokens")
+            or self.output_headroom
+        )
+        tools_tokens = sum(
+            self.counter.count(getattr(tool, "json", None) or str(tool), model_id)
+            for tool in completion_kwargs.get("tools") or []
+        )
+        return context_limit - output_tokens - tools_tokens
+
+    def fit(self, completion_kwargs: Dict[str, Any], context_limit: int, model_id: str) -> Dict[str, Any]:
+        """Return the completion kwargs with messages that fit `context_limit`. The input is not modified."""
+        messages = completion_kwargs.get("messages") or []
+        budget = self.get_budget(completion_kwargs, context_limit, model_id)
+        sizes = [self.count_message(message, model_id) for message in messages]
+        total = sum(sizes)
+        with self._lock:
+            self.requests += 1
+        if total <= budget:
+            return completion_kwargs
+
+        initial_total = total
+        messages = list(messages)
+        recent = max(len(messages) - self.keep_last_messages, 0)
+        truncated, total = self._truncate_largest(
+            messages, sizes, total, budget, model_id, range(recent), to_minimum=True
+        )
+        dropped, total = self._drop_oldest(messages, sizes, total, budget)
+        if total > budget:
+            recent = max(len(messages) - self.keep_last_messages, 0)
+            truncated_recent, total = self._truncate_largest(
+                messages, sizes, total, budget, model_id, range(recent, len(messages))
+            )
+            truncated += truncated_recent
+        removed = initial_total - total
+
+        logger.info(
+            f"Context budget of {model_id}: {initial_total:,} -> {total:,} tokens "
+            f"(limit {context_limit:,}, budget {budget:,}): truncated {truncated} contents, dropped {dropped} messages"
+        )
+        with self._lock:
+            self.trimmed_requests += 1
+            self.truncated_contents += truncated
+            self.dropped_messages += dropped
+            self.removed_tokens += removed
+            if total > budget:
+                self.overflowing_requests += 1
+        if total > budget:
+            logger.warning(f"Context budget of {model_id}: request still exceeds the budget by {total - budget:,} tokens")
+        return {**completion_kwargs, "messages": messages}
+
+    def _truncate_largest(
+        self,
+        messages: List[Dict[str, Any]],
+        sizes: List[int],
+        total: int,
+        budget: int,
+        model_id: str,
+        indexes: range,
+        to_minimum: bool = False,
+    ) -> Tuple[int, int]:
+        """
+        Truncate the largest text contents of the non-system messages at `indexes`, largest (then oldest)
+        first: to `min_content_tokens`, or just enough to fit the budget unless `to_minimum`.
+        """
+        candidates = []
+        for index in indexes:
+            message = messages[index]
+            if message.get("role") == "system":
+                continue
+            content = message.get("content")
+            if isinstance(content, str):
+                candidates.append((self.counter.count(content, model_id), index, None))
+            else:
+                for position, element in enumerate(content or []):
+                    if element.get("type") == "text":
+                        candidates.append((self.counter.count(element["text"], model_id), index, position))
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+
+        truncated = 0
+        for tokens, index, position in candidates:
+            excess = total - budget
+            if excess <= 0 or tokens <= self.min_content_tokens:
+                break
+            # Aim a little lower: the truncation notice takes a few tokens
+            target = self.min_content_tokens if to_minimum else max(self.min_content_tokens, tokens - excess - 32)
+            message = messages[index]
+            text = message["content"] if position is None else message["content"][position]["text"]
+            new_text = self.truncate_text(text, tokens, target)
+            if position is None:
+                messages[index] = {**message, "content": new_text}
+            else:
+                content = list(message["content"])
+                content[position] = {**content[position], "text": new_text}
+                messages[index] = {**message, "content": content}
+
+            new_size = self.count_message(messages[index], model_id)
+            logger.debug(
+                f"Context budget of {model_id}: truncated a {message['role']} content of message {index} "
+                f"from {tokens:,} to ~{target:,} tokens"
+            )
+            total += new_size - sizes[index]
+            sizes[index] = new_size
+            truncated += 1
+        return truncated, total
+
+    def _drop_oldest(self, messages: List[Dict[str, Any]], sizes: List[int], total: int, budget: int) -> Tuple[int, int]:
+        """Drop the oldest messages, except the system messages, the task (the first user message) and the most recent ones."""
+        dropped = 0
+        index = 0
+        task_seen = False
+        while total > budget and index < len(messages) - self.keep_last_messages:
+            role = messages[index].get("role")
+            if role == "system" or (role == "user" and not task_seen):
+                task_seen = task_seen or role == "user"
+                index += 1
+                continue
+            logger.debug(f"Context budget: dropped the oldest {messages[index]['role']} message ({sizes[index]:,} tokens)")
+            total -= sizes.pop(index)
+            messages.pop(index)
+            dropped += 1
+        return dropped, total
+
+    @staticmethod
+    def truncate_text(text: str, tokens: int, target: int) -> str:
+        """Keep the head and tail of `text`, about `target` of its `tokens` tokens in total."""
+        keep = int(len(text) * target / tokens)
+        head = keep * 2 // 3
+        tail = keep - head
+        return text[:head] + TRUNCATION_NOTICE.format(removed=tokens - target) + (text[-tail:] if tail else "")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "trimmed_requests": self.trimmed_requests,
+            "truncated_contents": self.truncated_contents,
+            "dropped_messages": self.dropped_messages,
+            "removed_tokens": self.removed_tokens,
+            "overflowing_requests": self.overflowing_requests,
+            "token_counts": {"hits": self.counter.hits, "misses": self.counter.misses},
+        }
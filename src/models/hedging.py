@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from src.logger import logger
+
+
+class LatencyHistogram:
+    """Rolling window of the latencies observed for one model."""
+
+    def __init__(self, window: int = 500):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float):
+        self.samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+class HedgePolicy:
+    """
+    Hedged requests for slow model endpoints.
+
+    When a request has not returned after the `percentile` latency observed for its model, a duplicate
+    is sent (to an alternate endpoint when the model has one). The first successful response wins and
+    the other request is cancelled. Every request earns `budget` hedge credits and every hedge spends
+    one, so hedges stay below roughly `budget` of all requests.
+
+    Args:
+        percentile (`float`, default `0.95`): Latency percentile after which a request is hedged.
+        min_samples (`int`, default `20`): Latencies to observe for a model before its percentile is trusted.
+            Until then `max_delay` is used.
+        min_delay (`float`, default `5.0`): Lower bound of the hedge delay in seconds.
+        max_delay (`float`, default `120.0`): Upper bound of the hedge delay in seconds.
+        budget (`float`, default `0.05`): Fraction of extra requests the policy may spend on hedges.
+        window (`int`, default `500`): Number of latencies kept per model.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        min_delay: float = 5.0,
+        max_delay: float = 120.0,
+        budget: float = 0.05,
+        window: int = 500,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.window = window
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        # Start with one credit so the first hang can already be hedged.
+        self.credits = 1.0
+        self.max_credits = 10.0
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+
+    def get_histogram(self, model_id: str) -> LatencyHistogram:
+        if model_id not in self.histograms:
+            self.histograms[model_id] = LatencyHistogram(window=self.window)
+        return self.histograms[model_id]
+
+    def hedge_delay(self, model_id: str) -> float:
+        histogram = self.get_histogram(model_id)
+        if len(histogram) < self.min_samples:
+            return self.max_delay
+        return min(self.max_delay, max(self.min_delay, histogram.percentile(self.percentile)))
+
+    async def run(
+        self,
+        model_id: str,
+        primary: Callable[[], Awaitable[Dict[str, Any]]],
+        hedge: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """Await `primary()`, racing it against `hedge()` if it is slower than the hedge delay."""
+        self.requests += 1
+        self.credits = min(self.max_credits, self.credits + self.budget)
+        histogram = self.get_histogram(model_id)
+        start_time = time.perf_counter()
+
+        def record_latency(task: asyncio.Task):
+            # Only the primary request feeds the histogram, so hedging does not hide the endpoint's real latency.
+            # A primary cancelled because its hedge won is recorded by the caller instead.
+            if not task.cancelled() and task.exception() is None:
+                histogram.record(time.perf_counter() - start_time)
+
+        primary_task = asyncio.ensure_future(primary())
+        primary_task.add_done_callback(record_latency)
+        pending = {primary_task}
+        try:
+            delay = self.hedge_delay(model_id)
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary_task.result()
+            if self.credits < 1:
+                self.hedges_skipped += 1
+                return await primary_task
+
+            self.credits -= 1
+            self.hedged += 1
+            logger.info(f"Hedging request to {model_id} after {delay:.1f}s")
+            hedge_task = asyncio.ensure_future(hedge())
+            pending.add(hedge_task)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            self.hedge_wins += 1
+                            # The primary is cancelled: its elapsed time is a lower bound of its latency,
+                            # without which the histogram would only keep the fast requests.
+                            histogram.record(time.perf_counter() - start_time)
+                        return task.result()
+            # Both requests failed: surface the primary's error.
+            return primary_task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_delays": {model_id: round(self.hedge_delay(model_id), 2) for model_id in self.histograms},
+        }
@@ -1,8 +1,9 @@
 import warnings
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 
 from src.models.base import (ApiModel,
                              ChatMessage,
+                             ChatMessageStreamDelta,
                              tool_role_conversions,
                              )
 from src.models.message_manager import (
@@ -24,6 +25,8 @@ class LiteLLMModel(ApiModel):
             Useful for specific models that do not support specific message roles like "system".
         flatten_messages_as_text (`bool`, *optional*): Whether to flatten messages as text.
             Defaults to `True` for models that start with "ollama", "groq", "cerebras".
+        http_client (`openai.AsyncOpenAI`, *optional*):
+            Pre-configured async OpenAI client. Requests are awaited natively so concurrent tasks overlap their round trips.
         **kwargs:
             Additional keyword arguments to pass to the OpenAI API.
     """
@@ -139,7 +142,7 @@ class LiteLLMModel(ApiModel):
 
         return completion_kwargs
 
-    async def __call__(
+    async def _generate(
         self,
         messages: List[Dict[str, str]],
         stop_sequences: Optional[List[str]] = None,
@@ -162,12 +165,73 @@ class LiteLLMModel(ApiModel):
             **kwargs,
         )
 
-        response = self.client.completion(**completion_kwargs)
+        response = await self._dispatch(completion_kwargs)
 
-        self.last_input_token_count = response.usage.prompt_tokens
-        self.last_output_token_count = response.usage.completion_tokens
-        first_message = ChatMessage.from_dict(
-            response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
-            raw=response,
+        return self._build_chat_message(response, tools_to_call_from)
+
+    def _get_request_kwargs(self, completion_kwargs: Dict[str, Any], client: Any | None = None) -> Dict[str, Any]:
+        """The arguments of `acompletion`. With a rate limiter, 429s are retried by the limiter only."""
+        if client is not None:
+            completion_kwargs = {**completion_kwargs, "client": client}
+        if self.rate_limiter is not None:
+            completion_kwargs = {**completion_kwargs, "num_retries": 0, "max_retries": 0}
+            if completion_kwargs.get("client") is not None:
+                completion_kwargs["client"] = completion_kwargs["client"].with_options(max_retries=0)
+        return completion_kwargs
+
+    async def _completion(self, completion_kwargs: Dict[str, Any], client: Any | None = None) -> Dict[str, Any]:
+        completion_kwargs = self._get_request_kwargs(completion_kwargs, client)
+        response = await self.client.acompletion(**completion_kwargs)
+        return response.model_dump()
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        stop_sequences: Optional[List[str]] = None,
+        grammar: Optional[str] = None,
+        tools_to_call_from: Optional[List[Any]] = None,
+        max_tool_calls: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[ChatMessageStreamDelta]:
+        """
+        Stream the completion as text and tool call deltas. Stop sequences are also applied client-side,
+        and `max_tool_calls` ends the stream as soon as that many tool calls have complete arguments.
+        The last delta carries the assembled `ChatMessage`.
+        """
+        if not self.can_stream:
+            async for delta in self._stream_from_call(
+                messages,
+                max_tool_calls=max_tool_calls,
+                stop_sequences=stop_sequences,
+                grammar=grammar,
+                tools_to_call_from=tools_to_call_from,
+                **kwargs,
+            ):
+                yield delta
+            return
+
+        completion_kwargs = self._prepare_completion_kwargs(
+            messages=messages,
+            stop_sequences=stop_sequences,
+            grammar=grammar,
+            tools_to_call_from=tools_to_call_from,
+            model=self.model_id,
+            api_base=self.api_base,
+            api_key=self.api_key,
+            http_client=self.http_client,
+            convert_images_to_image_urls=True,
+            custom_role_conversions=self.custom_role_conversions,
+            **kwargs,
         )
-        return self.postprocess_message(first_message, tools_to_call_from)
\ No newline at end of file
+
+        async for delta in self._stream(
+            completion_kwargs,
+            tools_to_call_from=tools_to_call_from,
+            stop_sequences=stop_sequences,
+            max_tool_calls=max_tool_calls,
+        ):
+            yield delta
+
+    async def _stream_completion(self, completion_kwargs: Dict[str, Any], client: Any | None = None) -> Any:
+        completion_kwargs = self._get_request_kwargs(completion_kwargs, client)
+        return await self.client.acompletion(**completion_kwargs, stream=True, stream_options={"include_usage": True})
@@ -0,0 +1,150 @@
+import contextlib
+import itertools
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from src.logger import logger
+from src.models.rate_limiter import get_status_code
+
+
+class Replica:
+    """One endpoint serving a model, with its client, in-flight requests and passive health state."""
+
+    def __init__(self, api_base: str, client: Any, latency_alpha: float = 0.2):
+        self.api_base = api_base
+        self.client = client
+        self.latency_alpha = latency_alpha
+
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.latency_ewma: Optional[float] = None
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def record(self, succeeded: bool, latency: float):
+        self.requests += 1
+        if succeeded:
+            self.consecutive_failures = 0
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += self.latency_alpha * (latency - self.latency_ewma)
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "healthy": self.is_healthy(time.monotonic()),
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+        }
+
+
+def is_replica_failure(error: BaseException) -> bool:
+    """Errors that tell about the replica rather than the request: connection errors, timeouts and 5xx."""
+    status_code = get_status_code(error)
+    if status_code is not None:
+        return status_code >= 500
+    return not isinstance(error, (ValueError, TypeError, KeyError))
+
+
+class LoadBalancer:
+    """
+    Least-outstanding-requests balancing of one model across several replicas (e.g. vLLM servers).
+
+    Each request goes to the healthy replica with the fewest requests in flight, ties broken by the
+    lowest latency, then in turn. Health checks are passive: after `max_failures` consecutive connection
+    errors, timeouts or 5xx responses a replica is ejected for `ejection_seconds`, and a request that
+    failed on a replica is retried once on another one. When every replica is ejected, the one coming
+    back first is used anyway.
+
+    Args:
+        replicas (`list[Replica]`): The replicas serving the model.
+        max_failures (`int`, default `3`): Consecutive failures that eject a replica.
+        ejection_seconds (`float`, default `30.0`): Time an ejected replica receives no requests.
+    """
+
+    def __init__(self, replicas: List[Replica], max_failures: int = 3, ejection_seconds: float = 30.0):
+        if not replicas:
+            raise ValueError("A load balancer needs at least one replica")
+        self.replicas = replicas
+        self.max_failures = max_failures
+        self.ejection_seconds = ejection_seconds
+        self._turn = itertools.count()
+        self.retries = 0
+
+    def pick(self, exclude: Optional[Replica] = None) -> Replica:
+        now = time.monotonic()
+        candidates = [replica for replica in self.replicas if replica is not exclude] or self.replicas
+        healthy = [replica for replica in candidates if replica.is_healthy(now)]
+        if not healthy:
+            return min(candidates, key=lambda replica: replica.ejected_until)
+        turn = next(self._turn)
+        return min(
+            healthy,
+            key=lambda replica: (
+                replica.in_flight,
+                replica.latency_ewma or 0.0,
+                (self.replicas.index(replica) - turn) % len(self.replicas),
+            ),
+        )
+
+    @contextlib.asynccontextmanager
+    async def slot(self, exclude: Optional[Replica] = None) -> AsyncIterator[Replica]:
+        """Pick a replica and count the request in flight on it until the block exits."""
+        replica = self.pick(exclude)
+        replica.in_flight += 1
+        replica.max_in_flight = max(replica.max_in_flight, replica.in_flight)
+        start_time = time.perf_counter()
+        try:
+            yield replica
+        except Exception as e:
+            # Cancelled requests (e.g. the losing copy of a hedged request) count neither way
+            if is_replica_failure(e):
+                self._record_failure(replica, time.perf_counter() - start_time)
+            raise
+        else:
+            replica.record(True, time.perf_counter() - start_time)
+        finally:
+            replica.in_flight -= 1
+
+    async def run(self, request: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Run `request(client)` on the least loaded replica, retrying once on another one if the replica fails."""
+        failed = None
+        for attempt in range(2 if len(self.replicas) > 1 else 1):
+            try:
+                async with self.slot(exclude=failed) as replica:
+                    return await request(replica.client)
+            except Exception as e:
+                if attempt > 0 or len(self.replicas) == 1 or not is_replica_failure(e):
+                    raise
+                logger.warning(f"Replica {replica.api_base} failed, retrying on another replica: {e}")
+                failed = replica
+                self.retries += 1
+
+    def _record_failure(self, replica: Replica, latency: float):
+        replica.record(False, latency)
+        if replica.consecutive_failures >= self.max_failures and replica.is_healthy(time.monotonic()):
+            replica.ejected_until = time.monotonic() + self.ejection_seconds
+            replica.ejections += 1
+            logger.warning(
+                f"Replica {replica.api_base} ejected for {self.ejection_seconds:.0f}s "
+                f"after {replica.consecutive_failures} consecutive failures"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "replicas": {replica.api_base: replica.stats() for replica in self.replicas},
+        }
@@ -1,3 +1,8 @@
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any
 from copy import deepcopy
 
@@ -16,6 +21,182 @@ UNSUPPORTED_STOP_MODELS = [
 UNSUPPORTED_TOOL_CHOICE_MODELS = [
     'claude37-sonnet',
 ]
+CACHE_CONTROL = {"type": "ephemeral"}
+# Anthropic accepts at most 4 cache breakpoints per request: the tools, the system prompt and the
+# end of the history (the last message, and the one before as the prefix cached on the previous step).
+HISTORY_CACHE_BREAKPOINTS = 2
+
+
+def supports_cache_breakpoints(model_id: str) -> bool:
+    """
+    Whether requests to `model_id` take `cache_control` breakpoints: the Claude models, under any of their
+    provider ids (`claude-3-7-sonnet-20250219`, `claude-3.7-sonnet`, `anthropic/claude-3-7-sonnet-latest`...).
+    """
+    return "claude" in model_id.split("/")[-1].lower()
+
+class ImagePayloadCache:
+    """
+    LRU cache of encoded image content elements, keyed on the image pixels and the provider format.
+
+    Encoding a screenshot to PNG base64 takes tens of milliseconds, and the same screenshots are sent
+    again on every step of an agent. Cached elements are shared between messages and must not be mutated.
+    The pixel digest of an image object is remembered as long as the object lives, so images already
+    seen are looked up without hashing them again.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.image_keys: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_image_key(self, image: Any) -> Optional[str]:
+        if not hasattr(image, "tobytes"):
+            return None
+        known = self.image_keys.get(id(image))
+        if known is not None and known[0]() is image:
+            return known[1]
+
+        digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+        digest.update(f"{image.mode}{image.size}".encode())
+        image_key = digest.hexdigest()
+        image_id = id(image)
+        reference = weakref.ref(image, lambda _: self.image_keys.pop(image_id, None))
+        self.image_keys[image_id] = (reference, image_key)
+        return image_key
+
+    def get_element(self, image: Any, image_format: str) -> Dict[str, Any]:
+        image_key = self.get_image_key(image)
+        if image_key is None:
+            return encode_image_element(image, image_format)
+
+        key = (image_key, image_format)
+        with self._lock:
+            element = self.entries.get(key)
+            if element is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return element
+
+        element = encode_image_element(image, image_format)
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = element
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return element
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+
+
+def encode_image_element(image: Any, image_format: str) -> Dict[str, Any]:
+    """Encode an image as the content element expected by `image_format`: `anthropic`, `image_url` or `base64`."""
+    if image_format == "anthropic":
+        return {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": "image/png",
+                "data": encode_image_base64(image),
+            },
+        }
+    if image_format == "image_url":
+        return {"type": "image_url", "image_url": {"url": make_image_url(encode_image_base64(image))}}
+    return {"type": "image", "image": encode_image_base64(image)}
+
+
+IMAGE_PAYLOAD_CACHE = ImagePayloadCache()
+
+
+class ToolSchema(dict):
+    """A tool's JSON schema for one provider format, with its serialized JSON precomputed in `json`."""
+
+    def __init__(self, schema: Dict[str, Any]):
+        super().__init__(schema)
+        self.json = json.dumps(schema, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def build_tool_json_schema(tool: Any, schema_format: str) -> Dict[str, Any]:
+    properties = deepcopy(tool.parameters['properties'])
+
+    required = []
+    for key, value in properties.items():
+        if value["type"] == "any":
+            value["type"] = "string"
+        if not ("nullable" in value and value["nullable"]):
+            required.append(key)
+
+    if schema_format == "anthropic":
+        return {
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": {
+                "type": "object",
+                "properties": properties,
+                "required": required,
+            },
+        }
+    else:
+        return {
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": required,
+                },
+            },
+        }
+
+
+class ToolSchemaCache:
+    """
+    Compiled tool schemas, per tool instance and provider format.
+
+    Entries are held weakly, so they go away with their tool (agents build new tools for every task).
+    An entry is only reused while the tool's name, description and `parameters` are unchanged, so a
+    tool whose `parameters` are reassigned or edited in place gets its schema compiled again.
+    """
+
+    def __init__(self):
+        self.entries: "weakref.WeakKeyDictionary[Any, Dict[str, tuple]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(tool: Any) -> tuple:
+        return (
+            tool.name,
+            tool.description,
+            json.dumps(tool.parameters, sort_keys=True, separators=(",", ":"), default=str),
+        )
+
+    def get_schema(self, tool: Any, schema_format: str) -> ToolSchema:
+        fingerprint = self.fingerprint(tool)
+        with self._lock:
+            entry = self.entries.get(tool, {}).get(schema_format)
+        if entry is not None and entry[0] == fingerprint:
+            self.hits += 1
+            return entry[1]
+
+        schema = ToolSchema(build_tool_json_schema(tool, schema_format))
+        with self._lock:
+            self.misses += 1
+            self.entries.setdefault(tool, {})[schema_format] = (fingerprint, schema)
+        return schema
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+
+
+TOOL_SCHEMA_CACHE = ToolSchemaCache()
+
 
 class MessageManager():
     def __init__(self, model_id: str):
@@ -32,111 +213,98 @@ class MessageManager():
         Subsequent messages with the same role will be concatenated to a single message.
         output_message_list is a list of messages that will be used to generate the final message that is chat template compatible with transformers LLM chat template.
 
+        The input messages are never modified: content lists and elements are shared with the output
+        until they have to change (merged text, encoded images), and only then copied.
+
         Args:
             message_list (`list[dict[str, str]]`): List of chat messages.
             role_conversions (`dict[MessageRole, MessageRole]`, *optional* ): Mapping to convert roles.
             convert_images_to_image_urls (`bool`, default `False`): Whether to convert images to image URLs.
             flatten_messages_as_text (`bool`, default `False`): Whether to flatten messages as text.
         """
+        if convert_images_to_image_urls:
+            image_format = "anthropic" if self.model_id.split("/")[-1] in DEFAULT_ANTHROPIC_MODELS else "image_url"
+        else:
+            image_format = "base64"
+
         output_message_list = []
-        message_list = deepcopy(message_list)  # Avoid modifying the original list
+        # Indexes of the output messages whose content list is a copy owned by the output
+        owned_contents = set()
         for message in message_list:
             role = message["role"]
             if role not in MessageRole.roles():
                 raise ValueError(f"Incorrect role {role}, only {MessageRole.roles()} are supported for now.")
+            role = role_conversions.get(role, role)
 
-            if role in role_conversions:
-                message["role"] = role_conversions[role]
+            content = message["content"]
             # encode images if needed
-            if isinstance(message["content"], list):
-                for element in message["content"]:
-                    if element["type"] == "image":
-                        assert not flatten_messages_as_text, f"Cannot use images with {flatten_messages_as_text=}"
-                        if convert_images_to_image_urls:
-
-                            model_id = self.model_id.split("/")[-1]
-
-                            if model_id in DEFAULT_ANTHROPIC_MODELS:
-                                element.update({
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": "image/png",
-                                        "data": encode_image_base64(element.pop("image")),
-                                    }
-                                })
-                            else:
-                                element.update(
-                                    {
-                                        "type": "image_url",
-                                        "image_url": {"url": make_image_url(encode_image_base64(element.pop("image")))},
-                                    }
-                                )
-                        else:
-                            element["image"] = encode_image_base64(element["image"])
+            if isinstance(content, list) and any(element["type"] == "image" for element in content):
+                assert not flatten_messages_as_text, f"Cannot use images with {flatten_messages_as_text=}"
+                content = [
+                    IMAGE_PAYLOAD_CACHE.get_element(element["image"], image_format)
+                    if element["type"] == "image" and "image" in element
+                    else element
+                    for element in content
+                ]
 
-            if len(output_message_list) > 0 and message["role"] == output_message_list[-1]["role"]:
-                assert isinstance(message["content"], list), "Error: wrong content:" + str(message["content"])
+            if len(output_message_list) > 0 and role == output_message_list[-1]["role"]:
+                assert isinstance(content, list), "Error: wrong content:" + str(content)
+                previous = output_message_list[-1]
                 if flatten_messages_as_text:
-                    output_message_list[-1]["content"] += "\n" + message["content"][0]["text"]
+                    previous["content"] = previous["content"] + "\n" + content[0]["text"]
                 else:
-                    for el in message["content"]:
-                        if el["type"] == "text" and output_message_list[-1]["content"][-1]["type"] == "text":
+                    if len(output_message_list) - 1 not in owned_contents:
+                        previous["content"] = list(previous["content"])
+                        owned_contents.add(len(output_message_list) - 1)
+                    merged = previous["content"]
+                    for el in content:
+                        if el["type"] == "text" and merged[-1]["type"] == "text":
                             # Merge consecutive text messages rather than creating new ones
-                            output_message_list[-1]["content"][-1]["text"] += "\n" + el["text"]
+                            merged[-1] = {**merged[-1], "text": merged[-1]["text"] + "\n" + el["text"]}
                         else:
-                            output_message_list[-1]["content"].append(el)
+                            merged.append(el)
             else:
                 if flatten_messages_as_text:
-                    content = message["content"][0]["text"]
-                else:
-                    content = message["content"]
-                output_message_list.append({"role": message["role"], "content": content})
+                    content = content[0]["text"]
+                output_message_list.append({"role": role, "content": content})
+
+        if not flatten_messages_as_text and supports_cache_breakpoints(self.model_id):
+            self.add_cache_breakpoints(output_message_list)
         return output_message_list
 
+    def add_cache_breakpoints(self, message_list: List[Dict[str, Any]]) -> None:
+        """
+        Mark the prompt prefixes the provider should cache: the system prompt, which is the same at every
+        step, and the end of the history, which is the prefix of the next step's request.
+        The content lists of the marked messages are replaced, never modified.
+        """
+        positions = [index for index, message in enumerate(message_list) if message["role"] == MessageRole.SYSTEM][-1:]
+        history = [index for index in range(len(message_list)) if index not in positions]
+        positions += history[-HISTORY_CACHE_BREAKPOINTS:]
+        for index in positions:
+            content = message_list[index]["content"]
+            if not isinstance(content, list) or not content:
+                continue
+            message_list[index]["content"] = content[:-1] + [{**content[-1], "cache_control": CACHE_CONTROL}]
+
     def get_tool_json_schema(self,
                              tool: Any,
                              model_id: Optional[str] = None
                              ) -> Dict:
-        properties = deepcopy(tool.parameters['properties'])
-
-        required = []
-        for key, value in properties.items():
-            if value["type"] == "any":
-                value["type"] = "string"
-            if not ("nullable" in value and value["nullable"]):
-                required.append(key)
-
-        model_id = model_id.split("/")[-1]
-
-        if model_id in DEFAULT_ANTHROPIC_MODELS:
-            return {
-                "name": tool.name,
-                "description": tool.description,
-                "input_schema": {
-                    "type": "object",
-                    "properties": properties,
-                    "required": required,
-                },
-            }
-        else:
-            return {
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": {
-                        "type": "object",
-                        "properties": properties,
-                        "required": required,
-                    },
-                },
-            }
+        """Return the tool's schema for the model's provider, compiled once and cached. The result is shared: do not mutate it."""
+        model_id = (model_id or self.model_id).split("/")[-1]
+        schema_format = "anthropic" if model_id in DEFAULT_ANTHROPIC_MODELS else "openai"
+        return TOOL_SCHEMA_CACHE.get_schema(tool, schema_format)
 
     def get_clean_completion_kwargs(self, completion_kwargs: Dict[str, Any]):
 
         model_id = self.model_id.split("/")[-1]
 
+        if supports_cache_breakpoints(model_id) and completion_kwargs.get("tools"):
+            # Tools come first in the cached prefix. The schemas are shared: mark a copy of the last one.
+            tools = list(completion_kwargs["tools"])
+            tools[-1] = ToolSchema({**tools[-1], "cache_control": CACHE_CONTROL})
+            completion_kwargs["tools"] = tools
         if model_id in UNSUPPORTED_TOOL_CHOICE_MODELS:
             completion_kwargs.pop("tool_choice", None)
         if model_id in UNSUPPORTED_STOP_MODELS:
@@ -1,29 +1,341 @@
 import os
-from openai import OpenAI
-from typing import Dict, Any, Tuple
+import time
+import asyncio
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from openai import AsyncOpenAI
+from typing import Callable, Dict, Any, Iterator, List, Tuple
 
 from dotenv import load_dotenv
 from pandas import api
 load_dotenv(verbose=True)
-from src.logger import logger
+from src.logger import logger, usage_scope
+from src.config import config
 from src.models.litellm import LiteLLMModel
 from src.models.openaillm import OpenAIServerModel
+from src.models.cache import CacheMode, RequestCoalescer, ResponseCache
+from src.models.cassette import Cassette, CassetteMode
+from src.models.rate_limiter import RateLimiter
+from src.models.hedging import HedgePolicy
+from src.models.circuit_breaker import CircuitBreaker
+from src.models.context_budget import ContextBudgeter
+from src.models.load_balancer import LoadBalancer, Replica
 from src.utils import Singleton
-from src.proxy.local_proxy import HTTP_CLIENT
+from src.proxy.local_proxy import ASYNC_HTTP_CLIENT, CONNECTION_STATS, HTTP2
 
 custom_role_conversions = {"tool-call": "assistant", "tool-response": "user"}
 PLACEHOLDER = "PLACEHOLDER"
 
 
+@dataclass
+class ModelSpec:
+    """Everything needed to build a registered model the first time it is looked up."""
+    model_class: type
+    model_id: str
+    api_key: str | None = None
+    api_base: str | None = None
+    # Talk to `api_base` through a client shared by every model behind the same (api_base, api_key)
+    pooled_client: bool = False
+    # Send the pooled client's requests through the shared (possibly proxied) `ASYNC_HTTP_CLIENT`
+    use_proxy_transport: bool = True
+    # Replicas serving the model (pooled clients only): requests are load balanced across them
+    api_bases: Tuple[str, ...] = ()
+
+
+class LazyModelRegistry(Mapping):
+    """
+    Name -> model mapping that stores `ModelSpec`s and builds each model on first lookup.
+
+    `keys()`, `in` and `len()` never build a model; `values()` and `items()` build all of them.
+    """
+
+    def __init__(self, build_model: Callable[[str, ModelSpec], Any]):
+        self.build_model = build_model
+        self.specs: Dict[str, ModelSpec] = {}
+        self.models: Dict[str, Any] = {}
+
+    def register(self, name: str, spec: ModelSpec):
+        self.specs[name] = spec
+        self.models.pop(name, None)
+
+    def __setitem__(self, name: str, model: Any):
+        self.models[name] = model
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.models:
+            if name not in self.specs:
+                raise KeyError(name)
+            self.models[name] = self.build_model(name, self.specs[name])
+        return self.models[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.specs or name in self.models
+
+    def __iter__(self) -> Iterator[str]:
+        return iter({**self.specs, **self.models})
+
+    def __len__(self) -> int:
+        return len({**self.specs, **self.models})
+
+    @property
+    def loaded(self) -> Dict[str, Any]:
+        """The models built so far."""
+        return dict(self.models)
+
+
+class LazyModelList(Sequence):
+    """Models looked up by name in a registry only when accessed, so fallback chains do not build models early."""
+
+    def __init__(self, registry: LazyModelRegistry, model_names: List[str]):
+        self.registry = registry
+        self.model_names = [model_name for model_name in model_names if model_name in registry]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.registry[model_name] for model_name in self.model_names[index]]
+        return self.registry[self.model_names[index]]
+
+    def __len__(self) -> int:
+        return len(self.model_names)
+
+
 class ModelManager(metaclass=Singleton):
     def __init__(self):
-        self.registed_models: Dict[str, Any] = {}
+        self.registed_models = LazyModelRegistry(self._build_model)
+        self.clients: Dict[Tuple[str, str, bool], AsyncOpenAI] = {}
+        self.response_cache: ResponseCache | None = None
+        self.request_coalescer: RequestCoalescer | None = None
+        self.cassette: Cassette | None = None
+        self.rate_limiter: RateLimiter | None = None
+        self.hedge_policy: HedgePolicy | None = None
+        self.alternate_api_bases: Dict[str, str] = {}
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self.context_budgeter: ContextBudgeter | None = None
+        self.load_balancers: Dict[str, LoadBalancer] = {}
         
-    def init_models(self, use_local_proxy: bool = False):
+    def init_models(self,
+                    use_local_proxy: bool = False,
+                    cassette_mode: str | None = None,
+                    cassette_path: str | None = None):
+        """
+        Register every model. Models are only built, with their clients, the first time they are looked up.
+
+        Args:
+            use_local_proxy (bool): Route requests through the local proxy endpoints.
+            cassette_mode (str, optional): `record` to capture every request/response pair made through the
+                registered models, `replay` to serve them offline. Defaults to `config.cassette.mode`.
+            cassette_path (str, optional): Cassette file. Defaults to `config.cassette.path`.
+        """
         self._register_openai_models(use_local_proxy=use_local_proxy)
         self._register_anthropic_models(use_local_proxy=use_local_proxy)
         self._register_google_models(use_local_proxy=use_local_proxy)
         self._register_qwen_models(use_local_proxy=use_local_proxy)
+        self._init_response_cache()
+        self._init_cassette(cassette_mode=cassette_mode, cassette_path=cassette_path)
+        self._init_rate_limiter()
+        self._init_hedging()
+        self._init_context_budget()
+    
+    async def warmup(self, connections_per_host: int = 2, timeout: float = 10.0) -> int:
+        """
+        Open pooled connections to the endpoint of every model sharing the pooled clients, so that the first
+        requests of the run do not pay DNS, TCP and TLS setup. Returns the number of connections opened.
+
+        With HTTP/2, the requests to an https endpoint share one connection, so a single one is opened per host.
+        """
+        api_bases = sorted({
+            api_base
+            for spec in self.registed_models.specs.values()
+            if spec.pooled_client and spec.use_proxy_transport
+            for api_base in (spec.api_bases or (spec.api_base,))
+            if api_base and api_base != PLACEHOLDER
+        })
+
+        async def connect(api_base: str):
+            try:
+                # Any response, even an error status, leaves a connection in the pool
+                await ASYNC_HTTP_CLIENT.head(api_base, timeout=timeout)
+            except Exception as e:
+                logger.warning(f"Could not warm up a connection to {api_base}: {e}")
+
+        def connections_to(api_base: str) -> int:
+            return 1 if HTTP2 and api_base.startswith("https://") else connections_per_host
+
+        start_time = time.perf_counter()
+        connections = CONNECTION_STATS.connections
+        await asyncio.gather(*[
+            connect(api_base) for api_base in api_bases for _ in range(connections_to(api_base))
+        ])
+        opened = CONNECTION_STATS.connections - connections
+        logger.info(
+            f"Warmed up {opened} connections to {len(api_bases)} model endpoints "
+            f"in {time.perf_counter() - start_time:.2f}s: {CONNECTION_STATS.stats()}"
+        )
+        return opened
+
+    def get_client(self, api_base: str, api_key: str, use_proxy_transport: bool = True) -> AsyncOpenAI:
+        """Return the client shared by every model behind `api_base` with `api_key`, creating it if needed."""
+        key = (api_base, api_key, use_proxy_transport)
+        if key not in self.clients:
+            if use_proxy_transport:
+                self.clients[key] = AsyncOpenAI(api_key=api_key, base_url=api_base, http_client=ASYNC_HTTP_CLIENT)
+            else:
+                self.clients[key] = AsyncOpenAI(api_key=api_key, base_url=api_base)
+        return self.clients[key]
+    
+    def _build_model(self, model_name: str, spec: ModelSpec):
+        if spec.pooled_client:
+            model = spec.model_class(
+                model_id=spec.model_id,
+                http_client=self.get_client(spec.api_base, spec.api_key, spec.use_proxy_transport),
+                custom_role_conversions=custom_role_conversions,
+            )
+        else:
+            model = spec.model_class(
+                model_id=spec.model_id,
+                api_key=spec.api_key,
+                api_base=spec.api_base,
+                custom_role_conversions=custom_role_conversions,
+            )
+        self._configure_model(model_name, model, spec)
+        logger.debug(f"Built model {model_name} ({spec.model_class.__name__}, {spec.model_id})")
+        return model
+    
+    def _configure_model(self, model_name: str, model, spec: ModelSpec):
+        if spec.pooled_client and len(spec.api_bases) > 1:
+            balancer_config = config.load_balancer
+            model.load_balancer = self.load_balancers[model_name] = LoadBalancer(
+                replicas=[
+                    Replica(api_base, self.get_client(api_base, spec.api_key, spec.use_proxy_transport))
+                    for api_base in spec.api_bases
+                ],
+                max_failures=balancer_config.max_failures,
+                ejection_seconds=balancer_config.ejection_seconds,
+            )
+        model.response_cache = self.response_cache
+        model.request_coalescer = self.request_coalescer
+        model.cassette = self.cassette
+        model.rate_limiter = self.rate_limiter
+        model.hedge_policy = self.hedge_policy
+        if self.hedge_policy is not None and spec.pooled_client:
+            alternate_api_base = self.alternate_api_bases.get(spec.api_base.rstrip("/"))
+            if alternate_api_base:
+                model.hedge_client = self.get_client(alternate_api_base, spec.api_key, spec.use_proxy_transport)
+        
+        breaker_config = config.circuit_breaker
+        if breaker_config.enabled:
+            model.circuit_breaker = self.circuit_breakers.setdefault(model_name, CircuitBreaker(
+                name=model_name,
+                failure_rate_threshold=breaker_config.failure_rate_threshold,
+                slow_call_seconds=breaker_config.slow_call_seconds,
+                window=breaker_config.window,
+                min_calls=breaker_config.min_calls,
+                cooldown_seconds=breaker_config.cooldown_seconds,
+            ))
+            model.fallback_models = LazyModelList(self.registed_models, breaker_config.fallbacks.get(model_name, []))
+
+        if self.context_budgeter is not None:
+            budget_config = config.context_budget
+            model.context_budgeter = self.context_budgeter
+            model.context_limit = budget_config.context_limits.get(model_name, budget_config.default_context_limit)
+    
+    def get_call_site_model(self, call_site: str, default_model_name: str):
+        """The model of a named call site: the one routed to it in `[model_routing.routes]`, else `default_model_name`."""
+        model_name = config.model_routing.routes.get(call_site, default_model_name)
+        if model_name not in self.registed_models:
+            logger.warning(f"Model {model_name} routed to call site {call_site} is not registered, using {default_model_name}")
+            model_name = default_model_name
+        return self.registed_models[model_name]
+
+    async def call(self, call_site: str, default_model_name: str, messages: List[Dict[str, Any]], **kwargs):
+        """Call the model routed to `call_site`, attributing its usage to the call site."""
+        model = self.get_call_site_model(call_site, default_model_name)
+        with usage_scope(call_site=call_site):
+            return await model(messages, **kwargs)
+
+    def load_balancer_stats(self) -> Dict[str, Any]:
+        return {model_name: balancer.stats() for model_name, balancer in self.load_balancers.items()}
+    
+    def circuit_breaker_stats(self) -> Dict[str, Any]:
+        return {model_name: breaker.stats() for model_name, breaker in self.circuit_breakers.items()}
+    
+    def _init_cassette(self, cassette_mode: str | None = None, cassette_path: str | None = None):
+        cassette_config = config.cassette
+        cassette_mode = CassetteMode(cassette_mode or cassette_config.mode)
+        if cassette_mode == CassetteMode.OFF:
+            return
+        
+        self.cassette = Cassette(
+            path=cassette_path or cassette_config.path,
+            mode=cassette_mode,
+            replay_latency=cassette_config.replay_latency,
+            latency_scale=cassette_config.latency_scale,
+        )
+        logger.info(f"Model cassette enabled ({cassette_mode.value}): {self.cassette.path}")
+    
+    def _init_rate_limiter(self):
+        rate_limit_config = config.rate_limits
+        if not rate_limit_config.enabled:
+            return
+        
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=rate_limit_config.requests_per_minute,
+            tokens_per_minute=rate_limit_config.tokens_per_minute,
+            max_in_flight=rate_limit_config.max_in_flight,
+            max_retries=rate_limit_config.max_retries,
+            endpoints=rate_limit_config.endpoints,
+            models=rate_limit_config.models,
+        )
+        logger.info(f"Model rate limits enabled: {rate_limit_config.requests_per_minute} RPM, "
+                    f"{rate_limit_config.tokens_per_minute} TPM per endpoint, "
+                    f"{rate_limit_config.max_in_flight} requests in flight per model")
+    
+    def _init_hedging(self):
+        hedging_config = config.hedging
+        if not hedging_config.enabled:
+            return
+        
+        self.hedge_policy = HedgePolicy(
+            percentile=hedging_config.percentile,
+            min_samples=hedging_config.min_samples,
+            min_delay=hedging_config.min_delay,
+            max_delay=hedging_config.max_delay,
+            budget=hedging_config.budget,
+        )
+        logger.info(f"Model request hedging enabled at p{hedging_config.percentile * 100:g} latency, budget {hedging_config.budget:.0%}")
+        
+        self.alternate_api_bases = {
+            os.getenv(primary).rstrip("/"): os.getenv(alternate)
+            for primary, alternate in hedging_config.alternate_endpoints.items()
+            if os.getenv(primary) and os.getenv(alternate)
+        }
+    
+    def _init_context_budget(self):
+        budget_config = config.context_budget
+        if not budget_config.enabled:
+            return
+        
+        self.context_budgeter = ContextBudgeter(
+            output_headroom=budget_config.output_headroom,
+            keep_last_messages=budget_config.keep_last_messages,
+            min_content_tokens=budget_config.min_content_tokens,
+        )
+        logger.info(f"Model context budget enabled, {budget_config.output_headroom} tokens of output headroom")
+    
+    def _init_response_cache(self):
+        cache_config = config.llm_cache
+        if cache_config.coalesce_in_flight:
+            self.request_coalescer = RequestCoalescer()
+        if CacheMode(cache_config.mode) == CacheMode.OFF:
+            return
+        
+        self.response_cache = ResponseCache(
+            path=cache_config.path,
+            mode=cache_config.mode,
+            ttl_seconds=cache_config.ttl_seconds,
+            max_size_bytes=cache_config.max_size_mb * 1024 * 1024,
+        )
+        logger.info(f"LLM response cache enabled ({cache_config.mode}): {cache_config.path}")
     
     def _check_local_api_key(self, local_api_key_name: str, remote_api_key_name: str) -> str:
         api_key = os.getenv(local_api_key_name, PLACEHOLDER)
@@ -46,85 +358,43 @@ class ModelManager(metaclass=Singleton):
             api_key = self._check_local_api_key(local_api_key_name="SKYWORK_API_KEY", 
                                                 remote_api_key_name="OPENAI_API_KEY")
             
-            # gpt-4o
-            model_name = "gpt-4o"
-            model_id = "openai/gpt-4o"
-            client = OpenAI(
-                api_key=api_key,
-                base_url=self._check_local_api_base(local_api_base_name="SKYWORK_API_BASE", 
-                                                    remote_api_base_name="OPENAI_API_BASE"),
-                http_client=HTTP_CLIENT,
-            )
-            model = LiteLLMModel(
-                model_id=model_id,
-                http_client=client,
-                custom_role_conversions=custom_role_conversions,
-            )
-            self.registed_models[model_name] = model
-            
-            # gpt-4.1
-            model_name = "gpt-4.1"
-            model_id = "openai/gpt-4.1"
-            client = OpenAI(
-                api_key=api_key,
-                base_url=self._check_local_api_base(local_api_base_name="SKYWORK_API_BASE", 
-                                                    remote_api_base_name="OPENAI_API_BASE"),
-                http_client=HTTP_CLIENT,
-            )
-            model = LiteLLMModel(
-                model_id=model_id,
-                http_client=client,
-                custom_role_conversions=custom_role_conversions,
-            )
-            self.registed_models[model_name] = model
-            
-            # o1
-            model_name = "o1"
-            model_id = "openai/o1"
-            client = OpenAI(
-                api_key=api_key,
-                base_url=self._check_local_api_base(local_api_base_name="SKYWORK_API_BASE", 
-                                                    remote_api_base_name="OPENAI_API_BASE"),
-                http_client=HTTP_CLIENT,
-            )
-            model = LiteLLMModel(
-                model_id=model_id,
-                http_client=client,
-                custom_role_conversions=custom_role_conversions,
-            )
-            self.registed_models[model_name] = model
-            
-            # o3
-            model_name = "o3"
-            model_id = "openai/o3"
-            client = OpenAI(
-                api_key=api_key,
-                base_url=self._check_local_api_base(local_api_base_name="SKYWORK_AZURE_HK_API_BASE", 
-                                                    remote_api_base_name="OPENAI_API_BASE"),
-                http_client=HTTP_CLIENT,
-            )
-            model = LiteLLMModel(
-                model_id=model_id,
-                http_client=client,
-                custom_role_conversions=custom_role_conversions,
-            )
-            self.registed_models[model_name] = model
+            models = [
+                {
+                    "model_name": "gpt-4o",
+                    "model_id": "openai/gpt-4o",
+                    "api_base_name": "SKYWORK_API_BASE",
+                },
+                {
+                    "model_name": "gpt-4.1",
+                    "model_id": "openai/gpt-4.1",
+                    "api_base_name": "SKYWORK_API_BASE",
+                },
+                {
+                    "model_name": "o1",
+                    "model_id": "openai/o1",
+                    "api_base_name": "SKYWORK_API_BASE",
+                },
+                {
+                    "model_name": "o3",
+                    "model_id": "openai/o3",
+                    "api_base_name": "SKYWORK_AZURE_HK_API_BASE",
+                },
+                {
+                    "model_name": "gpt-4o-search-preview",
+                    "model_id": "gpt-4o-search-preview",
+                    "api_base_name": "SKYWORK_OPENROUTER_US_API_BASE",
+                },
+            ]
             
-            # gpt-4o-search-preview
-            model_name = "gpt-4o-search-preview"
-            model_id = "gpt-4o-search-preview"
-            client = OpenAI(
-                api_key=api_key,
-                base_url=self._check_local_api_base(local_api_base_name="SKYWORK_OPENROUTER_US_API_BASE", 
-                                                    remote_api_base_name="OPENAI_API_BASE"),
-                http_client=HTTP_CLIENT,
-            )
-            model = LiteLLMModel(
-                model_id=model_id,
-                http_client=client,
-                custom_role_conversions=custom_role_conversions,
-            )
-            self.registed_models[model_name] = model
+            for model in models:
+                self.registed_models.register(model["model_name"], ModelSpec(
+                    model_class=LiteLLMModel,
+                    model_id=model["model_id"],
+                    api_key=api_key,
+                    api_base=self._check_local_api_base(local_api_base_name=model["api_base_name"], 
+                                                        remote_api_base_name="OPENAI_API_BASE"),
+                    pooled_client=True,
+                ))
             
         else:
             logger.info("Using remote API for OpenAI models")
@@ -157,15 +427,12 @@ class ModelManager(metaclass=Singleton):
             ]
             
             for model in models:
-                model_name = model["model_name"]
-                model_id = model["model_id"]
-                model = LiteLLMModel(
-                    model_id=model_id,
+                self.registed_models.register(model["model_name"], ModelSpec(
+                    model_class=LiteLLMModel,
+                    model_id=model["model_id"],
                     api_key=api_key,
                     api_base=api_base,
-                    custom_role_conversions=custom_role_conversions,
-                )
-                self.registed_models[model_name] = model
+                ))
     
             
     def _register_anthropic_models(self, use_local_proxy: bool = False):
@@ -175,37 +442,28 @@ class ModelManager(metaclass=Singleton):
             api_key = self._check_local_api_key(local_api_key_name="SKYWORK_API_KEY", 
                                                 remote_api_key_name="ANTHROPIC_API_KEY")
             
-            # claude37-sonnet
-            model_name = "claude37-sonnet"
-            model_id = "claude-3.7-sonnet"
-            client = OpenAI(
-                api_key=api_key,
-                base_url=self._check_local_api_base(local_api_base_name="SKYWORK_API_BASE", 
-                                                    remote_api_base_name="ANTHROPIC_API_BASE"),
-                http_client=HTTP_CLIENT,
-            )
-            model = OpenAIServerModel(
-                model_id=model_id,
-                http_client=client,
-                custom_role_conversions=custom_role_conversions,
-            )
-            self.registed_models[model_name] = model
+            models = [
+                {
+                    "model_name": "claude37-sonnet",
+                    "model_id": "claude-3.7-sonnet",
+                    "api_base_name": "SKYWORK_API_BASE",
+                },
+                {
+                    "model_name": "claude37-sonnet-thinking",
+                    "model_id": "claude-3.7-sonnet-thinking",
+                    "api_base_name": "SKYWORK_OPENROUTER_US_API_BASE",
+                },
+            ]
             
-            # claude37-sonnet-thinking
-            model_name = "claude37-sonnet-thinking"
-            model_id = "claude-3.7-sonnet-thinking"
-            client = OpenAI(
-                api_key=api_key,
-                base_url=self._check_local_api_base(local_api_base_name="SKYWORK_OPENROUTER_US_API_BASE", 
-                                                    remote_api_base_name="ANTHROPIC_API_BASE"),
-                http_client=HTTP_CLIENT,
-            )
-            model = OpenAIServerModel(
-                model_id=model_id,
-                http_client=client,
-                custom_role_conversions=custom_role_conversions,
-            )
-            self.registed_models[model_name] = model
+            for model in models:
+                self.registed_models.register(model["model_name"], ModelSpec(
+                    model_class=OpenAIServerModel,
+                    model_id=model["model_id"],
+                    api_key=api_key,
+                    api_base=self._check_local_api_base(local_api_base_name=model["api_base_name"], 
+                                                        remote_api_base_name="ANTHROPIC_API_BASE"),
+                    pooled_client=True,
+                ))
 
         else:
             logger.info("Using remote API for Anthropic models")
@@ -226,15 +484,12 @@ class ModelManager(metaclass=Singleton):
             ]
             
             for model in models:
-                model_name = model["model_name"]
-                model_id = model["model_id"]
-                model = LiteLLMModel(
-                    model_id=model_id,
+                self.registed_models.register(model["model_name"], ModelSpec(
+                    model_class=LiteLLMModel,
+                    model_id=model["model_id"],
                     api_key=api_key,
                     api_base=api_base,
-                    custom_role_conversions=custom_role_conversions,
-                )
-                self.registed_models[model_name] = model
+                ))
             
     def _register_google_models(self, use_local_proxy: bool = False):
         # gemini-2.5-pro
@@ -244,27 +499,19 @@ class ModelManager(metaclass=Singleton):
                                                 remote_api_key_name="GOOGLE_API_KEY")
             
             # gemini-2.5-pro
-            model_name = "gemini-2.5-pro"
-            model_id = "gemini-2.5-pro-preview-05-06"
-            client = OpenAI(
+            self.registed_models.register("gemini-2.5-pro", ModelSpec(
+                model_class=OpenAIServerModel,
+                model_id="gemini-2.5-pro-preview-05-06",
                 api_key=api_key,
-                base_url=self._check_local_api_base(local_api_base_name="SKYWORK_GOOGLE_API_BASE", 
+                api_base=self._check_local_api_base(local_api_base_name="SKYWORK_GOOGLE_API_BASE", 
                                                     remote_api_base_name="GOOGLE_API_BASE"),
-                http_client=HTTP_CLIENT,
-            )
-            model = OpenAIServerModel(
-                model_id=model_id,
-                http_client=client,
-                custom_role_conversions=custom_role_conversions,
-            )
-            self.registed_models[model_name] = model
+                pooled_client=True,
+            ))
             
         else:
             logger.info("Using remote API for Google models")
             api_key = self._check_local_api_key(local_api_key_name="GOOGLE_API_KEY", 
                                                 remote_api_key_name="GOOGLE_API_KEY")
-            api_base = self._check_local_api_base(local_api_base_name="GOOGLE_API_BASE", 
-                                                    remote_api_base_name="GOOGLE_API_BASE")
             
             models = [
                 {
@@ -274,15 +521,11 @@ class ModelManager(metaclass=Singleton):
             ]
             
             for model in models:
-                model_name = model["model_name"]
-                model_id = model["model_id"]
-                model = LiteLLMModel(
-                    model_id=model_id,
+                self.registed_models.register(model["model_name"], ModelSpec(
+                    model_class=LiteLLMModel,
+                    model_id=model["model_id"],
                     api_key=api_key,
-                    # api_base=api_base,
-                    custom_role_conversions=custom_role_conversions,
-                )
-                self.registed_models[model_name] = model
+                ))
                 
     def _register_qwen_models(self, use_local_proxy: bool = False):
         # qwen
@@ -290,6 +533,8 @@ class ModelManager(metaclass=Singleton):
                                                 remote_api_key_name="QWEN_API_KEY")
         api_base = self._check_local_api_base(local_api_base_name="QWEN_API_BASE", 
                                                     remote_api_base_name="QWEN_API_BASE")
+        # QWEN_API_BASE may list several replicas, separated by commas
+        api_bases = tuple(base.strip() for base in api_base.split(",") if base.strip())
         models = [
             {
                 "model_name": "qwen",
@@ -297,17 +542,12 @@ class ModelManager(metaclass=Singleton):
             }
         ]
         for model in models:
-            model_name = model["model_name"]
-            model_id = model["model_id"]
-            
-            client = OpenAI(
+            self.registed_models.register(model["model_name"], ModelSpec(
+                model_class=OpenAIServerModel,
+                model_id=model["model_id"],
                 api_key=api_key,
-                base_url=api_base,
-            )
-            
-            model = OpenAIServerModel(
-                model_id=model_id,
-                http_client=client,
-                custom_role_conversions=custom_role_conversions,
-            )
-            self.registed_models[model_name] = model
\ No newline at end of file
+                api_base=api_bases[0] if api_bases else api_base,
+                pooled_client=True,
+                use_proxy_transport=False,
+                api_bases=api_bases,
+            ))
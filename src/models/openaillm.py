@@ -1,9 +1,10 @@
 import warnings
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from copy import deepcopy
 
 from src.models.base import (ApiModel,
                              ChatMessage,
+                             ChatMessageStreamDelta,
                              tool_role_conversions,
                              MessageRole)
 from src.models.message_manager import MessageManager
@@ -29,6 +30,8 @@ class OpenAIServerModel(ApiModel):
             Useful for specific models that do not support specific message roles like "system".
         flatten_messages_as_text (`bool`, default `False`):
             Whether to flatten messages as text.
+        http_client (`openai.AsyncOpenAI`, *optional*):
+            Pre-configured async OpenAI client. Requests are awaited natively so concurrent tasks overlap their round trips.
         **kwargs:
             Additional keyword arguments to pass to the OpenAI API.
     """
@@ -75,7 +78,7 @@ class OpenAIServerModel(ApiModel):
                     "Please install 'openai' extra to use OpenAIServerModel: `pip install 'smolagents[openai]'`"
                 ) from e
 
-            return openai.OpenAI(
+            return openai.AsyncOpenAI(
                 base_url=self.api_base,
                 api_key=self.api_key
             )
@@ -139,7 +142,7 @@ class OpenAIServerModel(ApiModel):
 
         return completion_kwargs
 
-    async def __call__(
+    async def _generate(
         self,
         messages: List[Dict[str, str]],
         stop_sequences: Optional[List[str]] = None,
@@ -159,13 +162,67 @@ class OpenAIServerModel(ApiModel):
             **kwargs,
         )
 
-        response = self.client.chat.completions.create(**completion_kwargs)
+        response = await self._dispatch(completion_kwargs)
 
-        self.last_input_token_count = response.usage.prompt_tokens
-        self.last_output_token_count = response.usage.completion_tokens
+        return self._build_chat_message(response, tools_to_call_from)
 
-        first_message = ChatMessage.from_dict(
-            response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
-            raw=response,
+    def _get_client(self, client: Any | None = None) -> Any:
+        """The client to send a request through. With a rate limiter, 429s are retried by the limiter only."""
+        client = client or self.client
+        return client.with_options(max_retries=0) if self.rate_limiter is not None else client
+
+    async def _completion(self, completion_kwargs: Dict[str, Any], client: Any | None = None) -> Dict[str, Any]:
+        client = self._get_client(client)
+        response = await client.chat.completions.create(**completion_kwargs)
+        return response.model_dump()
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        stop_sequences: Optional[List[str]] = None,
+        grammar: Optional[str] = None,
+        tools_to_call_from: Optional[List[Any]] = None,
+        max_tool_calls: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[ChatMessageStreamDelta]:
+        """
+        Stream the completion as text and tool call deltas. Stop sequences are also applied client-side,
+        and `max_tool_calls` ends the stream as soon as that many tool calls have complete arguments.
+        The last delta carries the assembled `ChatMessage`.
+        """
+        if not self.can_stream:
+            async for delta in self._stream_from_call(
+                messages,
+                max_tool_calls=max_tool_calls,
+                stop_sequences=stop_sequences,
+                grammar=grammar,
+                tools_to_call_from=tools_to_call_from,
+                **kwargs,
+            ):
+                yield delta
+            return
+
+        completion_kwargs = self._prepare_completion_kwargs(
+            messages=messages,
+            stop_sequences=stop_sequences,
+            grammar=grammar,
+            tools_to_call_from=tools_to_call_from,
+            model=self.model_id,
+            custom_role_conversions=self.custom_role_conversions,
+            convert_images_to_image_urls=True,
+            **kwargs,
+        )
+
+        async for delta in self._stream(
+            completion_kwargs,
+            tools_to_call_from=tools_to_call_from,
+            stop_sequences=stop_sequences,
+            max_tool_calls=max_tool_calls,
+        ):
+            yield delta
+
+    async def _stream_completion(self, completion_kwargs: Dict[str, Any], client: Any | None = None) -> Any:
+        client = self._get_client(client)
+        return await client.chat.completions.create(
+            **completion_kwargs, stream=True, stream_options={"include_usage": True}
         )
-        return self.postprocess_message(first_message, tools_to_call_from)
\ No newline at end of file
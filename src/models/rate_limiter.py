@@ -0,0 +1,260 @@
+import asyncio
+import contextlib
+import email.utils
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from src.logger import logger
+
+# Output tokens reserved for a request that does not set `max_tokens`.
+DEFAULT_OUTPUT_TOKENS = 1024
+
+
+def estimate_request_tokens(completion_kwargs: Dict[str, Any]) -> int:
+    """Rough token estimate of a request (4 characters per token) plus its output budget."""
+    tools = [getattr(tool, "json", tool) for tool in completion_kwargs.get("tools") or []]
+    payload = json.dumps([completion_kwargs.get("messages"), tools], ensure_ascii=False, default=str)
+    output_tokens = completion_kwargs.get("max_tokens") or completion_kwargs.get("max_completion_tokens")
+    return len(payload) // 4 + (output_tokens or DEFAULT_OUTPUT_TOKENS)
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait according to the `retry-after(-ms)` headers of a rate-limited response, if any."""
+    # litellm errors carry a response without headers, the provider's headers are kept aside
+    headers = getattr(error, "litellm_response_headers", None) or getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1000
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`, holding at most one minute of budget."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute
+        self.updated_at = time.monotonic()
+
+    def _refill(self, rate_per_minute: float):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * rate_per_minute / 60)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, rate_per_minute: float) -> float:
+        self._refill(rate_per_minute)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60 / rate_per_minute
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float):
+        """Give back (positive) or take (negative) tokens once the real cost of a request is known."""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class ProviderLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for one provider endpoint.
+
+    The effective rate adapts to the provider: every 429 halves it (down to `min_rate_factor` of the
+    configured rate) and pauses the endpoint for the `retry-after` delay; every success recovers 5%.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        min_rate_factor: float = 0.1,
+    ):
+        self.endpoint = endpoint
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_rate_factor = min_rate_factor
+
+        self.rate_factor = 1.0
+        self.paused_until = 0.0
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._lock = asyncio.Lock()
+
+        self.requests = 0
+        self.rate_limited = 0
+        self.throttled_seconds = 0.0
+
+    async def acquire(self, estimated_tokens: int):
+        # The lock makes waiters queue up in arrival order instead of racing for refilled tokens.
+        async with self._lock:
+            start_time = time.monotonic()
+            while True:
+                wait = max(
+                    self.paused_until - time.monotonic(),
+                    self.request_bucket.wait_time(1, self.requests_per_minute * self.rate_factor),
+                    self.token_bucket.wait_time(estimated_tokens, self.tokens_per_minute * self.rate_factor),
+                )
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(estimated_tokens)
+            self.requests += 1
+            self.throttled_seconds += time.monotonic() - start_time
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        if actual_tokens is not None:
+            self.token_bucket.adjust(estimated_tokens - actual_tokens)
+
+    def on_success(self):
+        self.rate_factor = min(1.0, self.rate_factor + 0.05)
+
+    def on_rate_limited(self, retry_after: Optional[float]):
+        self.rate_limited += 1
+        self.rate_factor = max(self.min_rate_factor, self.rate_factor / 2)
+        delay = retry_after if retry_after is not None else 60 / max(self.requests_per_minute * self.rate_factor, 1)
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        logger.warning(
+            f"Rate limited by {self.endpoint}: pausing {delay:.1f}s, rate reduced to {self.rate_factor:.0%} of the configured limits"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "rate_factor": round(self.rate_factor, 2),
+            "throttled_seconds": round(self.throttled_seconds, 2),
+        }
+
+
+class RateLimiter:
+    """
+    Process-wide governor for every `ApiModel`: one `ProviderLimiter` per endpoint (base URL or provider)
+    and one max-in-flight semaphore per model.
+
+    Args:
+        requests_per_minute (`float`): Default requests-per-minute limit of an endpoint.
+        tokens_per_minute (`float`): Default tokens-per-minute limit of an endpoint.
+        max_in_flight (`int`): Default number of concurrent requests per model.
+        max_retries (`int`): How many times a rate-limited (429) request is retried after backing off.
+        endpoints (`dict`, *optional*): Per-endpoint overrides of `requests_per_minute` / `tokens_per_minute`.
+        models (`dict`, *optional*): Per-model overrides of `max_in_flight`.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 400000,
+        max_in_flight: int = 16,
+        max_retries: int = 3,
+        endpoints: Dict[str, Dict[str, float]] | None = None,
+        models: Dict[str, int] | None = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.endpoint_overrides = {key.rstrip("/"): value for key, value in (endpoints or {}).items()}
+        self.model_overrides = models or {}
+
+        self.limiters: Dict[str, ProviderLimiter] = {}
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def get_limiter(self, endpoint: str) -> ProviderLimiter:
+        endpoint = endpoint.rstrip("/")
+        if endpoint not in self.limiters:
+            override = self.endpoint_overrides.get(endpoint, {})
+            self.limiters[endpoint] = ProviderLimiter(
+                endpoint=endpoint,
+                requests_per_minute=override.get("requests_per_minute", self.requests_per_minute),
+                tokens_per_minute=override.get("tokens_per_minute", self.tokens_per_minute),
+            )
+        return self.limiters[endpoint]
+
+    def get_semaphore(self, model_id: str) -> asyncio.Semaphore:
+        if model_id not in self.semaphores:
+            self.semaphores[model_id] = asyncio.Semaphore(self.model_overrides.get(model_id, self.max_in_flight))
+        return self.semaphores[model_id]
+
+    async def run(
+        self,
+        endpoint: str,
+        model_id: str,
+        completion: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        completion_kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Run `completion(completion_kwargs)` within the endpoint's rate limits and the model's concurrency cap."""
+        limiter = self.get_limiter(endpoint)
+        estimated_tokens = estimate_request_tokens(completion_kwargs)
+
+        async with self.get_semaphore(model_id):
+            for attempt in range(self.max_retries + 1):
+                await limiter.acquire(estimated_tokens)
+                try:
+                    response = await completion(completion_kwargs)
+                except Exception as e:
+                    if get_status_code(e) != 429:
+                        raise
+                    limiter.settle(estimated_tokens, 0)
+                    limiter.on_rate_limited(get_retry_after(e))
+                    if attempt == self.max_retries:
+                        raise
+                    continue
+
+                usage = response.get("usage") or {}
+                actual_tokens = usage.get("total_tokens")
+                if actual_tokens is None and usage:
+                    actual_tokens = (usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0)
+                limiter.settle(estimated_tokens, actual_tokens)
+                limiter.on_success()
+                return response
+
+    @contextlib.asynccontextmanager
+    async def limit(self, endpoint: str, model_id: str, completion_kwargs: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Hold a rate-limited slot for a request the caller sends itself (e.g. a stream). The caller reports
+        the request's usage by updating the yielded dict. Rate-limited requests are not retried here.
+        """
+        limiter = self.get_limiter(endpoint)
+        estimated_tokens = estimate_request_tokens(completion_kwargs)
+
+        async with self.get_semaphore(model_id):
+            await limiter.acquire(estimated_tokens)
+            usage: Dict[str, Any] = {}
+            try:
+                yield usage
+            except Exception as e:
+                if get_status_code(e) == 429:
+                    limiter.settle(estimated_tokens, 0)
+                    limiter.on_rate_limited(get_retry_after(e))
+                raise
+            actual_tokens = usage.get("total_tokens")
+            if actual_tokens is None and usage:
+                actual_tokens = (usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0)
+            limiter.settle(estimated_tokens, actual_tokens)
+            limiter.on_success()
+
+    def stats(self) -> Dict[str, Any]:
+        return {endpoint: limiter.stats() for endpoint, limiter in self.limiters.items()}
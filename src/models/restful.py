@@ -192,6 +192,6 @@ class RestfulModel(ApiModel):
 
         first_message = ChatMessage.from_dict(
             response.choices[0].message.model_dump(include={"role", "content", "tool_calls"}),
-            raw=response,
+            raw=self.get_raw(response),
         )
         return self.postprocess_message(first_message, tools_to_call_from)
\ No newline at end of file
@@ -0,0 +1,167 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class IncrementalJSONParser:
+    """
+    Follows a JSON document fed chunk by chunk and tells when it is complete.
+
+    Only the nesting depth and string state are tracked while text arrives, so each chunk costs
+    O(len(chunk)); the document is parsed once, when its outermost bracket closes.
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self.complete = False
+        self.value: Any = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk of text; returns `True` once the document is complete and valid."""
+        self.chunks.append(chunk)
+        if self.complete:
+            return True
+        for char in chunk:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+                self.started = True
+            elif char in "}]":
+                self.depth -= 1
+                if self.started and self.depth == 0:
+                    try:
+                        self.value = json.loads(self.text)
+                    except json.JSONDecodeError:
+                        return False
+                    self.complete = True
+                    return True
+        return False
+
+
+class StopSequenceDetector:
+    """
+    Client-side stop sequences for streamed text.
+
+    Text that could be the beginning of a stop sequence is held back until the next chunk tells
+    whether it is, so nothing past a stop sequence is ever emitted.
+    """
+
+    def __init__(self, stop_sequences: Optional[List[str]] = None):
+        self.stop_sequences = [stop for stop in stop_sequences or [] if stop]
+        self.holdback = max((len(stop) for stop in self.stop_sequences), default=1) - 1
+        self.pending = ""
+        self.stopped = False
+
+    def feed(self, text: str) -> str:
+        """Add streamed text; returns the part that is safe to emit."""
+        if self.stopped:
+            return ""
+        self.pending += text
+        positions = [position for position in (self.pending.find(stop) for stop in self.stop_sequences) if position >= 0]
+        if positions:
+            emitted, self.pending = self.pending[: min(positions)], ""
+            self.stopped = True
+            return emitted
+        if len(self.pending) <= self.holdback:
+            return ""
+        cut = len(self.pending) - self.holdback
+        emitted, self.pending = self.pending[:cut], self.pending[cut:]
+        return emitted
+
+    def flush(self) -> str:
+        emitted, self.pending = self.pending, ""
+        return emitted
+
+
+class StreamAccumulator:
+    """Assembles streamed chat completion chunks into a complete assistant message."""
+
+    def __init__(self):
+        self.content_parts: List[str] = []
+        self.tool_calls: Dict[int, Dict[str, Any]] = {}
+        self.parsers: Dict[int, IncrementalJSONParser] = {}
+        self.completed: List[int] = []
+        self.finish_reason: Optional[str] = None
+        self.usage: Optional[Dict[str, Any]] = None
+
+    def add(self, chunk: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Add one chunk. Returns its text, its tool call deltas, and the tool calls whose arguments
+        became complete JSON with this chunk. Text is not accumulated here, see `add_content`.
+        """
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+        choices = chunk.get("choices") or []
+        if not choices:
+            return "", [], []
+        choice = choices[0]
+        self.finish_reason = choice.get("finish_reason") or self.finish_reason
+        delta = choice.get("delta") or {}
+
+        tool_call_deltas, completed = [], []
+        for tool_call_delta in delta.get("tool_calls") or []:
+            index = tool_call_delta.get("index") or 0
+            function = tool_call_delta.get("function") or {}
+            tool_call = self.tool_calls.setdefault(
+                index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}}
+            )
+            tool_call["id"] = tool_call_delta.get("id") or tool_call["id"]
+            tool_call["function"]["name"] += function.get("name") or ""
+            arguments = function.get("arguments") or ""
+            tool_call["function"]["arguments"] += arguments
+            tool_call_deltas.append(
+                {"index": index, "id": tool_call_delta.get("id"), "name": function.get("name"), "arguments": arguments}
+            )
+
+            parser = self.parsers.setdefault(index, IncrementalJSONParser())
+            if arguments and index not in self.completed and parser.feed(arguments):
+                self.completed.append(index)
+                completed.append(
+                    {
+                        "id": tool_call["id"],
+                        "type": "function",
+                        "function": {"name": tool_call["function"]["name"], "arguments": parser.value},
+                    }
+                )
+        return delta.get("content") or "", tool_call_deltas, completed
+
+    def add_content(self, text: str):
+        if text:
+            self.content_parts.append(text)
+
+    @property
+    def content(self) -> str:
+        return "".join(self.content_parts)
+
+    def to_message_dict(self) -> Dict[str, Any]:
+        tool_calls = [self.tool_calls[index] for index in sorted(self.tool_calls)]
+        for index, tool_call in zip(sorted(self.tool_calls), tool_calls):
+            if index in self.completed:
+                tool_call["function"]["arguments"] = self.parsers[index].value
+        return {
+            "role": "assistant",
+            "content": self.content or None,
+            "tool_calls": tool_calls or None,
+        }
+
+
+__all__ = [
+    "IncrementalJSONParser",
+    "StopSequenceDetector",
+    "StreamAccumulator",
+]
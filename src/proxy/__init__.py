@@ -1,8 +1,11 @@
-from src.proxy.local_proxy import PROXY_URL, HTTP_CLIENT, ASYNC_HTTP_CLIENT, proxy_env
+from src.proxy.local_proxy import PROXY_URL, HTTP_LIMITS, HTTP2, HTTP_CLIENT, ASYNC_HTTP_CLIENT, CONNECTION_STATS, proxy_env
 
 __all__ = [
     "PROXY_URL",
+    "HTTP_LIMITS",
+    "HTTP2",
     "HTTP_CLIENT",
     "ASYNC_HTTP_CLIENT",
+    "CONNECTION_STATS",
     "proxy_env",
 ]
\ No newline at end of file
@@ -1,21 +1,130 @@
 import os
+import time
+import socket
 import httpx
 import openai
 import contextlib
+import importlib.util
+import threading
+from typing import Any, Dict
 from dotenv import load_dotenv
 
 load_dotenv(verbose=True)
 
 PROXY_URL = os.getenv('LOCAL_PROXY_BASE', None)
 
+# Connection pool shared by every model client. Concurrent tasks and sub-agents
+# multiplex their requests over these keep-alive connections. Idle connections are
+# kept for HTTP_KEEPALIVE_EXPIRY seconds (httpx drops them after 5s by default), so
+# steps that follow a long tool execution do not pay the TCP and TLS setup again.
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)),
+    keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 300)),
+)
+# HTTP/2 multiplexes concurrent requests over one connection per host, where the server supports it.
+HTTP2 = os.getenv("HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+
+# TCP keep-alive probes stop the proxy and NAT gateways from silently dropping idle pooled connections.
+SOCKET_OPTIONS = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    SOCKET_OPTIONS += [
+        (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 15),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 4),
+    ]
+
+
+class ConnectionStats:
+    """
+    Requests and new connections of the shared clients, counted from httpcore's trace events.
+
+    A request sent without a TCP connect reused a pooled connection; handshake times are the
+    TCP connect (through the proxy if any) and TLS setup of the new connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.http2_requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self.connect_time = 0.0
+        self.tls_time = 0.0
+
+    def on_event(self, event_name: str, started: Dict[str, float]):
+        name, _, phase = event_name.rpartition(".")
+        now = time.perf_counter()
+        if phase == "started":
+            started[name] = now
+            return
+        if phase != "complete":
+            return
+        with self._lock:
+            if name == "connection.connect_tcp":
+                self.connections += 1
+                self.connect_time += now - started.pop(name, now)
+            elif name == "connection.start_tls":
+                self.tls_handshakes += 1
+                self.tls_time += now - started.pop(name, now)
+            elif name.endswith(".send_request_headers"):
+                self.requests += 1
+                if name.startswith("http2."):
+                    self.http2_requests += 1
+
+    def tracer(self):
+        started: Dict[str, float] = {}
+
+        def trace(event_name: str, info: Dict[str, Any]):
+            self.on_event(event_name, started)
+
+        return trace
+
+    def async_tracer(self):
+        started: Dict[str, float] = {}
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            self.on_event(event_name, started)
+
+        return trace
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "http2_requests": self.http2_requests,
+            "new_connections": self.connections,
+            "reuse_rate": round(1 - min(self.connections, self.requests) / self.requests, 3) if self.requests else None,
+            "mean_connect_ms": round(self.connect_time * 1000 / self.connections, 1) if self.connections else None,
+            "mean_tls_ms": round(self.tls_time * 1000 / self.tls_handshakes, 1) if self.tls_handshakes else None,
+        }
+
+
+CONNECTION_STATS = ConnectionStats()
+
+
+def _trace_request(request: httpx.Request):
+    request.extensions["trace"] = CONNECTION_STATS.tracer()
+
+
+async def _async_trace_request(request: httpx.Request):
+    request.extensions["trace"] = CONNECTION_STATS.async_tracer()
+
+
 if PROXY_URL:
-    TRANSPORT = httpx.HTTPTransport(proxy=httpx.Proxy(url=PROXY_URL))
-    HTTP_CLIENT = httpx.Client(transport=TRANSPORT)
-    ASYNC_TRANSPORT = httpx.AsyncHTTPTransport(proxy=httpx.Proxy(url=PROXY_URL))
-    ASYNC_HTTP_CLIENT = httpx.AsyncClient(transport=ASYNC_TRANSPORT)
+    TRANSPORT = httpx.HTTPTransport(
+        proxy=httpx.Proxy(url=PROXY_URL), limits=HTTP_LIMITS, http2=HTTP2, socket_options=SOCKET_OPTIONS
+    )
+    HTTP_CLIENT = httpx.Client(transport=TRANSPORT, event_hooks={"request": [_trace_request]})
+    ASYNC_TRANSPORT = httpx.AsyncHTTPTransport(
+        proxy=httpx.Proxy(url=PROXY_URL), limits=HTTP_LIMITS, http2=HTTP2, socket_options=SOCKET_OPTIONS
+    )
+    ASYNC_HTTP_CLIENT = httpx.AsyncClient(transport=ASYNC_TRANSPORT, event_hooks={"request": [_async_trace_request]})
 else:
-    HTTP_CLIENT = httpx.Client()
-    ASYNC_HTTP_CLIENT = httpx.AsyncClient()
+    # No explicit transport, so that proxies from the environment still apply
+    HTTP_CLIENT = httpx.Client(limits=HTTP_LIMITS, http2=HTTP2, event_hooks={"request": [_trace_request]})
+    ASYNC_HTTP_CLIENT = httpx.AsyncClient(
+        limits=HTTP_LIMITS, http2=HTTP2, event_hooks={"request": [_async_trace_request]}
+    )
 
 @contextlib.contextmanager
 def proxy_env(proxy_url: str = PROXY_URL):
@@ -29,6 +138,9 @@ def proxy_env(proxy_url: str = PROXY_URL):
 
 __all__ = [
     "PROXY_URL",
+    "HTTP_LIMITS",
+    "HTTP2",
+    "CONNECTION_STATS",
     "HTTP_CLIENT",
     "ASYNC_HTTP_CLIENT",
-]
\ No newline at end of file
+]
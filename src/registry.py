@@ -2,6 +2,7 @@ from typing import List, Dict, Any
 
 REGISTED_AGENTS: Dict[str, Any] = {}
 REGISTED_TOOLS: Dict[str, Any] = {}
+REGISTED_SEARCH_ENGINES: Dict[str, Any] = {}
 
 def register_agent(agent_id_or_cls=None):
     """
@@ -61,4 +62,36 @@ def register_tool(tool_id_or_cls=None):
         return decorator(tool_id_or_cls)
     else:
         # Used as @register_tool("custom_id")
-        return decorator
\ No newline at end of file
+        return decorator
+
+def register_search_engine(engine_id_or_cls=None):
+    """
+    Decorator to register a search engine class with a unique ID, the name used in
+    `[searcher_tool]` (case-insensitive).
+
+    Usage:
+        @register_search_engine
+        class MyEngine: ...
+
+        @register_search_engine("custom_id")
+        class MyOtherEngine: ...
+    """
+    def decorator(cls):
+        # Determine the registration key: use custom ID or class name
+        engine_id = (engine_id_or_cls if isinstance(engine_id_or_cls, str) else cls.__name__).lower()
+
+        # Check for duplicate registration
+        if engine_id in REGISTED_SEARCH_ENGINES:
+            raise ValueError(f"Search engine ID '{engine_id}' is already registered.")
+
+        # Register the class (not instance)
+        REGISTED_SEARCH_ENGINES[engine_id] = cls
+        return cls
+
+    # Support both @register_search_engine and @register_search_engine("custom_id") usages
+    if callable(engine_id_or_cls):
+        # Used as @register_search_engine
+        return decorator(engine_id_or_cls)
+    else:
+        # Used as @register_search_engine("custom_id")
+        return decorator
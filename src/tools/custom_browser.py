@@ -470,7 +470,7 @@ Page content:
                     ]
 
                     # Use LLM to extract content with required function calling
-                    response = self.model(
+                    response = await self.model(
                         messages=messages,
                         tools_to_call_from=tools,
                     )
@@ -269,7 +269,8 @@ class DeepResearcherTool(AsyncTool):
     )
 
     def __init__(self):
-        self.model = model_manager.registed_models[self.deep_researcher_config.model_id]
+        # Model of the call sites not routed to another one in `[model_routing.routes]`
+        self.model_id = self.deep_researcher_config.model_id
         self.web_searcher = WebSearcherTool()
         self.web_searcher.fetch_content = True # Enable content fetching
         super().__init__()
@@ -330,12 +331,14 @@ class DeepResearcherTool(AsyncTool):
                 OptimizedQueryTool()
             ]
 
-            response = await self.model(
-                messages = messages,
+            response = await model_manager.call(
+                "optimize_query",
+                self.model_id,
+                messages=messages,
                 tools_to_call_from=tools
             )
 
-            logger.info(f"DeepResearchTool Optimized query - Input tokens: {self.model.last_input_token_count}, Output tokens: {self.model.last_output_token_count}")
+            logger.info(f"DeepResearchTool Optimized query - Input tokens: {response.token_usage.input_tokens}, Output tokens: {response.token_usage.output_tokens}, Latency: {response.latency:.2f}s")
 
             # Extract the query from the tool_call response
             if response and response.tool_calls and len(response.tool_calls) > 0:
@@ -493,12 +496,14 @@ class DeepResearcherTool(AsyncTool):
         ]
 
         # Get follow-up queries from LLM using structured output
-        response = await self.model(
+        response = await model_manager.call(
+            "follow_ups",
+            self.model_id,
             messages=messages,
             tools_to_call_from=tools
         )
 
-        logger.info(f"DeepResearchTool Generate follow-ups - Input tokens: {self.model.last_input_token_count}, Output tokens: {self.model.last_output_token_count}")
+        logger.info(f"DeepResearchTool Generate follow-ups - Input tokens: {response.token_usage.input_tokens}, Output tokens: {response.token_usage.output_tokens}, Latency: {response.latency:.2f}s")
 
         # Extract queries from the tool response
         queries = []
@@ -523,12 +528,14 @@ class DeepResearcherTool(AsyncTool):
             ExtractInsightsTool()
         ]
 
-        response = await self.model(
+        response = await model_manager.call(
+            "extract_insights",
+            self.model_id,
             messages=messages,
             tools_to_call_from=tools
         )
 
-        logger.info(f"DeepResearchTool Extract insights - Input tokens: {self.model.last_input_token_count}, Output tokens: {self.model.last_output_token_count}")
+        logger.info(f"DeepResearchTool Extract insights - Input tokens: {response.token_usage.input_tokens}, Output tokens: {response.token_usage.output_tokens}, Latency: {response.latency:.2f}s")
 
         insights = []
 
@@ -566,12 +573,12 @@ class DeepResearcherTool(AsyncTool):
         return insights
 
     async def _summary(self, query: str, reference_materials: str) -> str:
-        model = model_manager.registed_models["gpt-4o-search-preview"]
-
         messages = [
             {"role": "user", "content": query}
         ]
-        response = await model(
+        response = await model_manager.call(
+            "summary",
+            "gpt-4o-search-preview",
             messages=messages,
         )
         content = response.content
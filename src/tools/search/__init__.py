@@ -1,15 +1,20 @@
 from src.tools.search.baidu_search import BaiduSearchEngine
 from src.tools.search.bing_search import BingSearchEngine
-from src.tools.search.google_search import GoogleSearchEngine
+from src.tools.search.google_search import GoogleSearchEngine, SkyworkGoogleSearchEngine
 from src.tools.search.ddg_search import DuckDuckGoSearchEngine
-from src.tools.search.base import SearchItem, WebSearchEngine
+from src.tools.search.base import RateLimitedError, SearchItem, WebSearchEngine
+from src.tools.search.registry import LazySearchEngineRegistry, get_search_engine
 
 
 __all__ = [
     "BaiduSearchEngine",
     "BingSearchEngine",
     "GoogleSearchEngine",
+    "SkyworkGoogleSearchEngine",
     "DuckDuckGoSearchEngine",
+    "RateLimitedError",
     "SearchItem",
     "WebSearchEngine",
+    "LazySearchEngineRegistry",
+    "get_search_engine",
 ]
@@ -1,15 +1,20 @@
 from baidusearch.baidusearch import search
 
+from src.registry import register_search_engine
 from src.tools.search.base import WebSearchEngine, SearchItem
 
+@register_search_engine("baidu")
 class BaiduSearchEngine(WebSearchEngine):
+    max_concurrency: int = 2
+
     async def perform_search(self, query: str, num_results: int = 10, *args, **kwargs):
         """
         Baidu search engine.
 
         Returns results formatted according to SearchItem model.
         """
-        raw_results = search(query, num_results=num_results)
+        # baidusearch is sync-only: it runs on the search thread pool
+        raw_results = await self.run_sync(search, query, num_results=num_results)
 
         # Convert raw results to SearchItem format
         results = []
@@ -1,5 +1,35 @@
-from typing import List, Any, Optional
-from pydantic import BaseModel, Field
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any, Callable, Optional
+
+import httpx
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Client shared by every search engine: its pooled keep-alive connections are reused across
+# queries, tasks and engines. Each engine also bounds its own in-flight requests (`max_concurrency`).
+SEARCH_HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("SEARCH_MAX_CONNECTIONS", 50)),
+    max_keepalive_connections=int(os.getenv("SEARCH_MAX_KEEPALIVE_CONNECTIONS", 20)),
+    keepalive_expiry=float(os.getenv("SEARCH_KEEPALIVE_EXPIRY", 60)),
+)
+SEARCH_HTTP_CLIENT = httpx.AsyncClient(
+    limits=SEARCH_HTTP_LIMITS,
+    timeout=float(os.getenv("SEARCH_TIMEOUT", 10)),
+    follow_redirects=True,
+)
+# Threads running the calls of sync-only search libraries, so that they never block the event loop
+SEARCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SEARCH_THREADS", 8)), thread_name_prefix="search"
+)
+
+class RateLimitedError(Exception):
+    """Raised by a search engine that rate limits us: a 429 status or a CAPTCHA page instead of results."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 class SearchItem(BaseModel):
     """Represents a single search result item"""
@@ -20,6 +50,36 @@ class WebSearchEngine(BaseModel):
 
     model_config = {"arbitrary_types_allowed": True}
 
+    max_concurrency: int = Field(default=4, description="Maximum number of requests in flight to this engine")
+
+    _semaphore: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return SEARCH_HTTP_CLIENT
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def request(
+        self, method: str, url: str, client: Optional[httpx.AsyncClient] = None, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request to the engine within the engine's concurrency limit, on `client` if given, else on the
+        shared search client.
+        """
+        async with self.semaphore:
+            return await (client or self.client).request(method, url, **kwargs)
+
+    async def run_sync(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call of a sync-only library on the search thread pool."""
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(SEARCH_EXECUTOR, functools.partial(function, *args, **kwargs))
+
     async def perform_search(
         self, query: str, num_results: int = 10, *args, **kwargs
     ) -> List[SearchItem]:
@@ -35,4 +95,4 @@ class WebSearchEngine(BaseModel):
         Returns:
             List[SearchItem]: A list of SearchItem objects matching the search query.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
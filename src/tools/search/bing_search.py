@@ -1,9 +1,10 @@
 from typing import List, Optional, Tuple
 
-import requests
 from bs4 import BeautifulSoup
 
-from src.tools.search.base import WebSearchEngine, SearchItem
+from src.logger import logger
+from src.registry import register_search_engine
+from src.tools.search.base import WebSearchEngine, SearchItem, RateLimitedError
 
 
 ABSTRACT_MAX_LENGTH = 300
@@ -31,21 +32,15 @@ HEADERS = {
 }
 
 BING_HOST_URL = "https://www.bing.com"
-BING_SEARCH_URL = "https://www.bing.com/search?q="
 
 
+@register_search_engine("bing")
 class BingSearchEngine(WebSearchEngine):
-    session: Optional[requests.Session] = None
+    host_url: str = BING_HOST_URL
 
-    def __init__(self, **data):
-        """Initialize the BingSearch tool with a requests session."""
-        super().__init__(**data)
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
-
-    def _search_sync(self, query: str, num_results: int = 10) -> List[SearchItem]:
+    async def _search(self, query: str, num_results: int = 10) -> List[SearchItem]:
         """
-        Synchronous Bing search implementation to retrieve search results.
+        Bing search implementation to retrieve search results, on the shared search client.
 
         Args:
             query (str): The search query to submit to Bing.
@@ -59,10 +54,10 @@ class BingSearchEngine(WebSearchEngine):
 
         list_result = []
         first = 1
-        next_url = BING_SEARCH_URL + query
+        next_url = f"{self.host_url}/search?q={query}"
 
         while len(list_result) < num_results:
-            data, next_url = self._parse_html(
+            data, next_url = await self._parse_html(
                 next_url, rank_start=len(list_result), first=first
             )
             if data:
@@ -73,7 +68,7 @@ class BingSearchEngine(WebSearchEngine):
 
         return list_result[:num_results]
 
-    def _parse_html(
+    async def _parse_html(
         self, url: str, rank_start: int = 0, first: int = 1
     ) -> Tuple[List[SearchItem], str]:
         """
@@ -82,8 +77,12 @@ class BingSearchEngine(WebSearchEngine):
         Returns:
             tuple: (List of SearchItem objects, next page URL or None)
         """
+        res = await self.request("GET", url, headers=HEADERS)
+        if res.status_code == 429:
+            raise RateLimitedError("Bing rate limited the search")
+        # Timeouts, connection errors and 5xx are engine failures, only a page we cannot parse means no results
+        res.raise_for_status()
         try:
-            res = self.session.get(url=url)
             res.encoding = "utf-8"
             root = BeautifulSoup(res.text, "lxml")
 
@@ -126,10 +125,10 @@ class BingSearchEngine(WebSearchEngine):
             if not next_btn:
                 return list_data, None
 
-            next_url = BING_HOST_URL + next_btn["href"]
+            next_url = self.host_url + next_btn["href"]
             return list_data, next_url
         except Exception as e:
-            print(f"Error parsing HTML: {e}")
+            logger.warning(f"Could not parse the Bing results page {url}: {e}")
             return [], None
 
     async def perform_search(
@@ -140,4 +139,4 @@ class BingSearchEngine(WebSearchEngine):
 
         Returns results formatted according to SearchItem model.
         """
-        return self._search_sync(query, num_results=num_results)
+        return await self._search(query, num_results=num_results)
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.config import config
+from src.logger import logger
+from src.tools.search.base import SearchItem
+from src.utils import DiskCache
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """The query as an engine sees it: unicode, case and whitespace variants of a query share a cache entry."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return WHITESPACE.sub(" ", query).strip()
+
+
+def get_search_key(
+    engine: str,
+    query: str,
+    lang: Optional[str] = None,
+    country: Optional[str] = None,
+    filter_year: Optional[int] = None,
+    num_results: Optional[int] = None,
+) -> str:
+    """Canonical hash of a search: the engine, the normalized query and the search parameters."""
+    search = [engine.lower(), normalize_query(query), lang, country, filter_year, num_results]
+    canonical = json.dumps(search, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """
+    Cache of search results, shared by every `WebSearcherTool`.
+
+    Result lists are stored as JSON in a `DiskCache`, keyed on `get_search_key`, with a time to live
+    per engine. An expired entry is still served for `stale_seconds` while the search is refreshed in
+    the background (stale-while-revalidate). Disk access runs in a worker thread so lookups never
+    block the event loop.
+
+    Args:
+        path (`str`): Path of the SQLite database file.
+        ttl_seconds (`float`, default 1 day): Time to live of cached results.
+        engine_ttl_seconds (`dict`, *optional*): Time to live per engine, overriding `ttl_seconds`.
+        stale_seconds (`float`, default 0): Time after expiry during which results are served while revalidated.
+        max_size_bytes (`int`, *optional*): Size budget of the store, enforced with LRU eviction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 24 * 3600,
+        engine_ttl_seconds: Optional[Dict[str, float]] = None,
+        stale_seconds: float = 0,
+        max_size_bytes: Optional[int] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.engine_ttl_seconds = {engine.lower(): ttl for engine, ttl in (engine_ttl_seconds or {}).items()}
+        self.stale_seconds = stale_seconds
+        self.store = DiskCache(path, max_size_bytes=max_size_bytes, table="search_results")
+        self.revalidating: Dict[str, asyncio.Task] = {}
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        # Callers waiting on each search in flight: the search is cancelled when the last of them is
+        self.waiters: Dict[str, int] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.revalidations = 0
+        self.coalesced = 0
+
+    def get_ttl(self, engine: str) -> float:
+        return self.engine_ttl_seconds.get(engine.lower(), self.ttl_seconds)
+
+    async def get(self, key: str) -> Tuple[Optional[List[SearchItem]], bool]:
+        """The cached results of a search and whether they are stale, or `(None, False)` on a miss."""
+        entry = await asyncio.to_thread(self.store.get_entry, key, True)
+        if entry is None or (entry.expired and entry.expires_at + self.stale_seconds <= time.time()):
+            self.misses += 1
+            return None, False
+
+        stale = entry.expired
+        if stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return [SearchItem(**item) for item in json.loads(entry.value)], stale
+
+    async def set(self, key: str, engine: str, items: List[SearchItem]):
+        value = json.dumps([item.model_dump() for item in items], ensure_ascii=False)
+        await asyncio.to_thread(self.store.set, key, value.encode("utf-8"), self.get_ttl(engine))
+        self.writes += 1
+
+    def revalidate(self, key: str, engine: str, search: Callable[[], Awaitable[List[SearchItem]]]):
+        """Refresh stale results in the background, once per key at a time. Failed refreshes keep the stale results."""
+        if key in self.revalidating:
+            return
+
+        async def refresh():
+            try:
+                items = await search()
+                if items:
+                    await self.set(key, engine, items)
+                    self.revalidations += 1
+            except Exception as e:
+                logger.warning(f"Search cache could not revalidate a {engine} search: {e}")
+            finally:
+                self.revalidating.pop(key, None)
+
+        self.revalidating[key] = asyncio.create_task(refresh())
+
+    async def search(
+        self, key: str, engine: str, search: Callable[[], Awaitable[List[SearchItem]]]
+    ) -> List[SearchItem]:
+        """
+        The results of a search from the cache. On a miss, `search` runs once for all the callers waiting on
+        the same key, and its results are cached if not empty.
+        """
+        items, stale = await self.get(key)
+        if items is not None:
+            if stale:
+                self.revalidate(key, engine, search)
+            return items
+
+        # Identical searches in flight share one engine search
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await self._wait(key, task)
+
+        async def search_and_set() -> List[SearchItem]:
+            try:
+                items = await search()
+                if items:
+                    await self.set(key, engine, items)
+                return items
+            finally:
+                self.in_flight.pop(key, None)
+
+        task = self.in_flight[key] = asyncio.ensure_future(search_and_set())
+        return await self._wait(key, task)
+
+    async def _wait(self, key: str, task: asyncio.Future) -> List[SearchItem]:
+        """
+        Wait for a shared search. A cancelled caller does not cancel the search for the others, but once
+        every caller is gone (e.g. the engine lost a race), the search itself is cancelled.
+        """
+        self.waiters[key] = self.waiters.get(key, 0) + 1
+        try:
+            return list(await asyncio.shield(task))
+        finally:
+            self.waiters[key] -= 1
+            if not self.waiters[key]:
+                del self.waiters[key]
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "revalidations": self.revalidations,
+            "coalesced": self.coalesced,
+            "evictions": self.store.evictions,
+            "entries": len(self.store),
+            "size_bytes": self.store.size_bytes,
+        }
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """The search cache configured in `[search_cache]`, built on first use, or `None` if it is disabled."""
+    global _search_cache
+    cache_config = config.search_cache
+    if not cache_config.enabled:
+        return None
+    if _search_cache is None or _search_cache.store.path != cache_config.path:
+        _search_cache = SearchCache(
+            path=cache_config.path,
+            ttl_seconds=cache_config.ttl_seconds,
+            engine_ttl_seconds=cache_config.engine_ttl_seconds,
+            stale_seconds=cache_config.stale_seconds,
+            max_size_bytes=cache_config.max_size_mb * 1024 * 1024,
+        )
+        logger.info(f"Search cache enabled: {cache_config.path}")
+    return _search_cache
@@ -2,9 +2,13 @@ from typing import List
 
 from duckduckgo_search import DDGS
 
+from src.registry import register_search_engine
 from src.tools.search.base import WebSearchEngine, SearchItem
 
+@register_search_engine("duckduckgo")
 class DuckDuckGoSearchEngine(WebSearchEngine):
+    max_concurrency: int = 2
+
     async def perform_search(
         self, query: str, num_results: int = 10, *args, **kwargs
     ) -> List[SearchItem]:
@@ -13,7 +17,8 @@ class DuckDuckGoSearchEngine(WebSearchEngine):
 
         Returns results formatted according to SearchItem model.
         """
-        raw_results = DDGS().text(query, max_results=num_results)
+        # DDGS is sync-only: it runs on the search thread pool
+        raw_results = await self.run_sync(DDGS().text, query, max_results=num_results)
 
         results = []
         for i, item in enumerate(raw_results):
@@ -1,18 +1,23 @@
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 load_dotenv(verbose=True)
 
-import requests
 import os
+import asyncio
 from bs4 import BeautifulSoup
 from urllib.parse import unquote
-from time import sleep
 
-from src.tools.search.base import WebSearchEngine, SearchItem
-from src.proxy import PROXY_URL, proxy_env
+from src.tools.search.base import WebSearchEngine, SearchItem, RateLimitedError, SEARCH_HTTP_CLIENT
+from pydantic import Field
+
+from src.logger import logger
+from src.proxy import ASYNC_HTTP_CLIENT
+from src.registry import register_search_engine
 from googlesearch.user_agents import get_useragent
 
-def _req(term, results, tbs, lang, start, proxies, timeout, safe, ssl_verify, region):
+GOOGLE_SEARCH_URL = "https://www.google.com/search"
+
+async def _req(client, search_url, term, results, tbs, lang, start, timeout, safe, region):
     
     params = {
         "q": term,
@@ -24,43 +29,47 @@ def _req(term, results, tbs, lang, start, proxies, timeout, safe, ssl_verify, re
     }
     if tbs is not None:
         params["tbs"] = tbs
+    params = {key: value for key, value in params.items() if value is not None}
         
-    resp = requests.get(
-        url="https://www.google.com/search",
+    resp = await client.get(
+        url=search_url,
         headers={
             "User-Agent": get_useragent(),
             "Accept": "*/*"
         },
         params=params,
-        proxies=proxies,
         timeout=timeout,
-        verify=ssl_verify,
         cookies = {
             'CONSENT': 'PENDING+987', # Bypasses the consent page
             'SOCS': 'CAESHAgBEhIaAB',
         }
     )
+    # Google answers bots with a CAPTCHA on its /sorry/ page
+    if resp.status_code == 429 or "/sorry/" in resp.url.path:
+        retry_after = resp.headers.get("Retry-After", "")
+        raise RateLimitedError(
+            f"Google rate limited the search for '{term}'", float(retry_after) if retry_after.isdigit() else None
+        )
     resp.raise_for_status()
     return resp
 
 
-def google_search(term, 
+async def google_search(term, 
                   num_results=10, 
                   tbs=None,
                   lang="en", 
-                  proxy=None, 
                   advanced=False, 
                   sleep_interval=0, 
                   timeout=5,
                   safe="active",
-                  ssl_verify=None,
                   region=None, 
                   start_num=0, 
-                  unique=False):
+                  unique=False,
+                  client=None,
+                  search_url=GOOGLE_SEARCH_URL):
     """Search the Google search engine"""
 
-    # Proxy setup
-    proxies = {"https": proxy, "http": proxy} if proxy and (proxy.startswith("https") or proxy.startswith("http")) else None
+    client = client or SEARCH_HTTP_CLIENT
 
     start = start_num
     fetched_results = 0  # Keep track of the total fetched results
@@ -68,15 +77,15 @@ def google_search(term,
 
     while fetched_results < num_results:
         # Send request
-        resp = _req(term,
+        resp = await _req(client,
+                    search_url,
+                    term,
                     num_results - start,
                     tbs,
                     lang, 
                     start, 
-                    proxies, 
                     timeout, 
                     safe, 
-                    ssl_verify, 
                     region)
         
         # put in file - comment for debugging purpose
@@ -137,55 +146,60 @@ def google_search(term,
             break  # Break the loop if no new results were found in this iteration
 
         start += 10  # Prepare for the next set of results
-        sleep(sleep_interval)
+        await asyncio.sleep(sleep_interval)
 
-def search(params):
+async def search_api(engine: WebSearchEngine, params, api_url):
     """
-    Mock function to simulate Google search results.
-    In a real-world scenario, this would interface with the Google Search API.
+    Search Google through the google search api at `api_url` (`SKYWORK_GOOGLE_SEARCH_API`), within the engine's
+    concurrency limit.
     """
+    # The api is reached through the local proxy, like the models
+    response = await engine.request("GET", api_url, client=ASYNC_HTTP_CLIENT, params=params)
     
-    base_url = os.getenv("SKYWORK_GOOGLE_SEARCH_API", None)
+    if response.status_code == 200:
+        items = response.json()
+    else:
+        raise ValueError(response.json())
+
+    if "organic" not in items.keys():
+        # Not a failure: the engine answered, the query is too restrictive
+        logger.info(f"No Google results for '{params['q']}'" + (" with filtering on year" if "tbs" in params else ""))
+        return []
+
+    results = []
+    if "organic" in items:
+        for idx, page in enumerate(items["organic"]):
+            title = page.get("title", f"Google Result {idx + 1}")
+            url = page.get("link", "")
+            position = page.get("position", idx + 1)
+            description = page.get("snippet", None)
+            date = page.get("date", None)
+            source = page.get("source", None)
+
+            results.append(
+                SearchItem(
+                    title=title,
+                    url=url,
+                    date=date,
+                    position=position,
+                    source=source,
+                    description=description,
+                )
+            )
+    return results
+
+
+async def search(params, engine: WebSearchEngine, search_url=GOOGLE_SEARCH_URL):
+    """
+    Search Google through the local search api if `SKYWORK_GOOGLE_SEARCH_API` is set, else by scraping
+    the results page.
+    """
+    
+    api_url = os.getenv("SKYWORK_GOOGLE_SEARCH_API", None)
     
     # Use local google search api
-    if base_url is not None:
-        with proxy_env():
-            response = requests.get(base_url, params=params)
-            
-            if response.status_code == 200:
-                items = response.json()
-            else:
-                raise ValueError(response.json())
-
-            if "organic" not in items.keys():
-                if filter_year is not None:
-                    raise Exception(
-                        f"No results found for query: '{query}' with filtering on year={filter_year}. Use a less restrictive query or do not filter on year."
-                    )
-                else:
-                    raise Exception(f"No results found for query: '{query}'. Use a less restrictive query.")
-
-            results = []
-            if "organic" in items:
-                for idx, page in enumerate(items["organic"]):
-                    title = page.get("title", f"Google Result {idx + 1}")
-                    url = page.get("link", "")
-                    position = page.get("position", idx + 1)
-                    description = page.get("snippet", None)
-                    date = page.get("date", None)
-                    source = page.get("source", None)
-
-                    results.append(
-                        SearchItem(
-                            title=title,
-                            url=url,
-                            date=date,
-                            position=position,
-                            source=source,
-                            description=description,
-                        )
-                    )
-            return results
+    if api_url is not None:
+        return await search_api(engine, params, api_url)
     
     else: # Use remote google search api
         response = google_search(
@@ -193,19 +207,33 @@ def search(params):
             num_results=params["num"],
             tbs=params.get("tbs", None),
             lang="en",
-            proxy=None,
             advanced=True,
             sleep_interval=0,
             timeout=5,
+            client=engine.client,
+            search_url=search_url,
         )
         
         results = []
-        for item in response:
-            results.append(item)
+        async with engine.semaphore:
+            async for item in response:
+                results.append(item)
         
         return results
 
+def get_google_params(query: str, num_results: int, filter_year: int = None) -> dict:
+    params = {
+        "q": query,
+        "num": num_results,
+    }
+    if filter_year is not None:
+        params["tbs"] = f"cdr:1,cd_min:01/01/{filter_year},cd_max:12/31/{filter_year}"
+    return params
+
+@register_search_engine("google")
 class GoogleSearchEngine(WebSearchEngine):
+    search_url: str = GOOGLE_SEARCH_URL
+
     async def perform_search(
         self,
         query: str,
@@ -218,13 +246,28 @@ class GoogleSearchEngine(WebSearchEngine):
 
         Returns results formatted according to SearchItem model.
         """
-        params = {
-            "q": query,
-            "num": num_results,
-        }
-        if filter_year is not None:
-            params["tbs"] = f"cdr:1,cd_min:01/01/{filter_year},cd_max:12/31/{filter_year}"
+        params = get_google_params(query, num_results, filter_year)
+        return await search(params, engine=self, search_url=self.search_url)
+
+@register_search_engine("skywork_google")
+class SkyworkGoogleSearchEngine(WebSearchEngine):
+    """Google results from the google search api at `SKYWORK_GOOGLE_SEARCH_API`, whatever the `google` engine uses."""
+
+    api_url: Optional[str] = Field(default_factory=lambda: os.getenv("SKYWORK_GOOGLE_SEARCH_API", None))
+
+    async def perform_search(
+        self,
+        query: str,
+        num_results: int = 10,
+        filter_year: int = None,
+        *args, **kwargs
+    ) -> List[SearchItem]:
+        """
+        Google search api engine.
 
-        results = search(params)
+        Returns results formatted according to SearchItem model.
+        """
+        if self.api_url is None:
+            raise ValueError("SKYWORK_GOOGLE_SEARCH_API is not set")
 
-        return results
\ No newline at end of file
+        return await search_api(self, get_google_params(query, num_results, filter_year), self.api_url)
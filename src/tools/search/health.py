@@ -0,0 +1,182 @@
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from src.logger import logger
+from src.tools.search.base import RateLimitedError
+
+# Latency assumed for an engine that has not answered yet, so that untried engines keep their configured order
+DEFAULT_LATENCY = 2.0
+# Status codes of an engine telling us to slow down
+RATE_LIMIT_STATUS_CODES = (429, 503)
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    The time the engine asked us to wait if `error` is a rate limit (429, CAPTCHA, ...), 0 if it did not
+    say, or `None` if `error` is not a rate limit.
+    """
+    if isinstance(error, RateLimitedError):
+        return error.retry_after or 0.0
+    if isinstance(error, httpx.HTTPStatusError) and error.response.status_code in RATE_LIMIT_STATUS_CODES:
+        retry_after = error.response.headers.get("Retry-After", "")
+        return float(retry_after) if retry_after.isdigit() else 0.0
+    # Raised by duckduckgo_search
+    if type(error).__name__ == "RatelimitException":
+        return 0.0
+    return None
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether retrying the same engine right away may succeed: timeouts and dropped connections."""
+    return isinstance(error, (httpx.TimeoutException, httpx.NetworkError, TimeoutError, ConnectionError))
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: concurrent retries spread out instead of hitting the engines together."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class EngineHealth:
+    """
+    Health of one search engine: EWMAs of its latency and error rate, and a cooldown window.
+
+    The engine cools down after a rate limit (429, CAPTCHA) or `failure_threshold` failures in a row.
+    The cooldown doubles with each consecutive trip, up to `max_cooldown_seconds`, and resets once
+    the engine answers again.
+
+    Args:
+        name (`str`): Name of the engine.
+        alpha (`float`, default `0.3`): Weight of the latest search in the moving averages.
+        cooldown_seconds (`float`, default `60.0`): First cooldown of the engine.
+        max_cooldown_seconds (`float`, default `900.0`): Longest cooldown of the engine.
+        failure_threshold (`int`, default `3`): Failures in a row that put the engine in cooldown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        alpha: float = 0.3,
+        cooldown_seconds: float = 60.0,
+        max_cooldown_seconds: float = 900.0,
+        failure_threshold: int = 3,
+    ):
+        self.name = name
+        self.alpha = alpha
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.failure_threshold = failure_threshold
+
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.trips = 0
+
+        self.searches = 0
+        self.failures = 0
+        self.rate_limits = 0
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    @property
+    def cooldown_remaining(self) -> float:
+        return max(0.0, self.cooldown_until - time.monotonic())
+
+    @property
+    def expected_latency(self) -> float:
+        """Expected time to get results from the engine: its latency, inflated by the searches that fail."""
+        latency = DEFAULT_LATENCY if self.latency is None else self.latency
+        return latency / max(1.0 - self.error_rate, 0.1)
+
+    def _update(self, succeeded: bool, latency: float):
+        self.searches += 1
+        self.latency = latency if self.latency is None else self.alpha * latency + (1 - self.alpha) * self.latency
+        self.error_rate = self.alpha * (0.0 if succeeded else 1.0) + (1 - self.alpha) * self.error_rate
+
+    def record_success(self, latency: float):
+        self._update(True, latency)
+        self.consecutive_failures = 0
+        self.trips = 0
+
+    def record_empty(self, latency: float):
+        """Record a search without results: it lowers the engine's rank but does not put it in cooldown."""
+        self._update(False, latency)
+
+    def record_failure(self, latency: float, retry_after: Optional[float] = None):
+        """Record a failed search; `retry_after` is not `None` if the engine rate limited us."""
+        self._update(False, latency)
+        self.failures += 1
+        self.consecutive_failures += 1
+        if retry_after is not None:
+            self.rate_limits += 1
+            self._cool_down(retry_after, reason="rate limited")
+        elif self.consecutive_failures >= self.failure_threshold:
+            self._cool_down(0.0, reason=f"{self.consecutive_failures} failures in a row")
+
+    def _cool_down(self, retry_after: float, reason: str):
+        cooldown = min(self.max_cooldown_seconds, self.cooldown_seconds * 2 ** self.trips)
+        cooldown = max(cooldown, retry_after)
+        self.cooldown_until = time.monotonic() + cooldown
+        self.trips += 1
+        self.consecutive_failures = 0
+        logger.warning(f"Search engine {self.name} {reason}, skipping it for {cooldown:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "searches": self.searches,
+            "failures": self.failures,
+            "rate_limits": self.rate_limits,
+            "latency_ewma_s": round(self.latency, 3) if self.latency is not None else None,
+            "error_rate_ewma": round(self.error_rate, 3),
+            "cooldown_remaining_s": round(self.cooldown_remaining, 1),
+        }
+
+
+class EngineHealthRegistry:
+    """Health of every search engine, shared by every `WebSearcherTool` of the process."""
+
+    def __init__(self, **health_kwargs):
+        self._lock = threading.Lock()
+        self.health_kwargs = health_kwargs
+        self.engines: Dict[str, EngineHealth] = {}
+
+    def configure(self, **health_kwargs):
+        """Settings of the engines tracked from now on, and of those already tracked."""
+        with self._lock:
+            self.health_kwargs.update(health_kwargs)
+            for health in self.engines.values():
+                for name, value in health_kwargs.items():
+                    setattr(health, name, value)
+
+    def get(self, name: str) -> EngineHealth:
+        with self._lock:
+            if name not in self.engines:
+                self.engines[name] = EngineHealth(name, **self.health_kwargs)
+            return self.engines[name]
+
+    def order(self, engine_names: List[str]) -> List[str]:
+        """
+        The engines not cooling down, fastest expected first. Engines with the same expected latency
+        (e.g. untried ones) keep their order in `engine_names`.
+        """
+        available = [name for name in engine_names if not self.get(name).cooling_down]
+        skipped = [name for name in engine_names if name not in available]
+        if skipped:
+            logger.info(f"Skipping search engines in cooldown: {', '.join(skipped)}")
+        return sorted(available, key=lambda name: self.get(name).expected_latency)
+
+    def next_available_in(self, engine_names: List[str]) -> float:
+        """Seconds until the first of `engine_names` comes out of cooldown."""
+        return min((self.get(name).cooldown_remaining for name in engine_names), default=0.0)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: health.stats() for name, health in self.engines.items()}
+
+
+engine_health = EngineHealthRegistry()
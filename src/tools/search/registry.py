@@ -0,0 +1,59 @@
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List
+
+from src.logger import logger
+from src.registry import REGISTED_SEARCH_ENGINES
+from src.tools.search.base import WebSearchEngine
+
+# Engines built so far, shared by every `WebSearcherTool`: one instance (and concurrency limit) per engine
+_SEARCH_ENGINES: Dict[str, WebSearchEngine] = {}
+_lock = threading.Lock()
+
+
+def get_search_engine(name: str) -> WebSearchEngine:
+    """The engine registered under `name`, built on first use."""
+    name = name.lower()
+    with _lock:
+        if name not in _SEARCH_ENGINES:
+            if name not in REGISTED_SEARCH_ENGINES:
+                raise KeyError(f"Search engine '{name}' is not registered.")
+            _SEARCH_ENGINES[name] = REGISTED_SEARCH_ENGINES[name]()
+            logger.info(f"Search engine {name} initialized")
+        return _SEARCH_ENGINES[name]
+
+
+class LazySearchEngineRegistry(Mapping):
+    """
+    Name -> engine mapping over the configured engines, building each engine on first lookup.
+
+    `keys()`, `in` and `len()` never build an engine. Names without a registered engine are left
+    out with a warning.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = []
+        for name in names:
+            name = name.lower()
+            if name in self.names:
+                continue
+            if name not in REGISTED_SEARCH_ENGINES:
+                logger.warning(
+                    f"Search engine '{name}' is not registered, registered engines: {', '.join(REGISTED_SEARCH_ENGINES)}"
+                )
+                continue
+            self.names.append(name)
+
+    def __getitem__(self, name: str) -> WebSearchEngine:
+        if name not in self.names:
+            raise KeyError(name)
+        return get_search_engine(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
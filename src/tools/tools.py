@@ -59,7 +59,7 @@ if TYPE_CHECKING:
     import mcp
 
 
-from src.logger import logger
+from src.logger import logger, usage_scope
 
 
 def validate_after_init(cls):
@@ -757,7 +757,8 @@ class AsyncTool(Tool):
                 args = ()
                 kwargs = potential_kwargs
 
-        outputs = await self.forward(*args, **kwargs)
+        with usage_scope(tool=self.name):
+            outputs = await self.forward(*args, **kwargs)
 
         return outputs
 
@@ -1,16 +1,19 @@
 import asyncio
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Mapping, Optional
+from urllib.parse import urlsplit
 from pydantic import BaseModel, ConfigDict, Field, model_validator
-from tenacity import retry, stop_after_attempt, wait_exponential
 import time
 
 from src.tools.web_fetcher import WebFetcherTool
 from src.config import config
 from src.tools.search import (
-    GoogleSearchEngine,
+    LazySearchEngineRegistry,
     WebSearchEngine,
     SearchItem
 )
+from src.tools.search.cache import get_search_cache, get_search_key
+from src.tools.search.health import backoff_delay, engine_health, get_retry_after, is_transient
 from src.tools import AsyncTool, ToolResult
 from src.logger import logger
 
@@ -95,6 +98,81 @@ class SearchResponse(ToolResult):
         self.output = "\n".join(result_text)
         return self
 
+SEARCH_STRATEGIES = ("sequential", "race", "fan-out-merge")
+# Reciprocal rank fusion constant: dampens the weight of the top ranks of any single engine
+RRF_K = 60
+
+
+class SearchLatencyStats:
+    """Latency of the searches made by `WebSearcherTool`, per strategy."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+
+    def record(self, strategy: str, seconds: float, success: bool = True):
+        with self._lock:
+            self.latencies.setdefault(strategy, []).append(seconds)
+            if not success:
+                self.failures[strategy] = self.failures.get(strategy, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            latencies = {strategy: sorted(values) for strategy, values in self.latencies.items()}
+        return {
+            strategy: {
+                "searches": len(values),
+                "failures": self.failures.get(strategy, 0),
+                "mean_s": round(sum(values) / len(values), 3),
+                "p50_s": round(values[int(0.5 * (len(values) - 1))], 3),
+                "p95_s": round(values[int(0.95 * (len(values) - 1))], 3),
+            }
+            for strategy, values in latencies.items()
+        }
+
+
+search_latency_stats = SearchLatencyStats()
+
+
+def normalize_url(url: str) -> str:
+    """The URL without scheme, `www.`, fragment or trailing slash, to spot the same page from several engines."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+
+def fuse_results(results_by_engine: Dict[str, List[SearchItem]], num_results: int) -> List[SearchResult]:
+    """
+    Merge the results of several engines by reciprocal rank fusion: pages ranked high by more engines
+    come first. Duplicate pages are merged, keeping the longest description.
+    """
+    scores: Dict[str, float] = {}
+    merged: Dict[str, Dict[str, Any]] = {}
+    for engine_name, items in results_by_engine.items():
+        for rank, item in enumerate(items):
+            key = normalize_url(item.url)
+            scores[key] = scores.get(key, 0.0) + 1 / (RRF_K + rank + 1)
+            entry = merged.setdefault(key, {"url": item.url, "title": item.title, "description": "", "sources": []})
+            entry["title"] = entry["title"] or item.title
+            if len(item.description or "") > len(entry["description"]):
+                entry["description"] = item.description
+            entry["sources"].append(engine_name)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:num_results]
+    return [
+        SearchResult(
+            position=i + 1,
+            url=merged[key]["url"],
+            title=merged[key]["title"] or f"Result {i+1}",
+            description=merged[key]["description"],
+            source="+".join(merged[key]["sources"]),
+        )
+        for i, key in enumerate(ranked)
+    ]
+
+
 class WebSearcherTool(AsyncTool):
     """Search the web for information using various search engines."""
 
@@ -118,9 +196,9 @@ class WebSearcherTool(AsyncTool):
     output_type = 'any'
 
     searcher_config = config.searcher_tool
-    _search_engine: dict[str, WebSearchEngine] = {
-        "google": GoogleSearchEngine()
-    }
+    _search_engine: Mapping[str, WebSearchEngine] = LazySearchEngineRegistry(
+        [searcher_config.engine, *searcher_config.fallback_engines]
+    )
     max_length: int = (
         getattr(searcher_config, "max_length", 20000)
         if searcher_config
@@ -137,6 +215,16 @@ class WebSearcherTool(AsyncTool):
         if searcher_config
         else 3
     )
+    max_retry_delay = (
+        getattr(searcher_config, "max_retry_delay", 60)
+        if searcher_config
+        else 60
+    )
+    engine_retries = (
+        getattr(searcher_config, "engine_retries", 1)
+        if searcher_config
+        else 1
+    )
     # Use config values for lang and country if not specified
     lang = (
         getattr(searcher_config, "lang", "en")
@@ -158,9 +246,42 @@ class WebSearcherTool(AsyncTool):
         if searcher_config
         else False
     )
+    strategy = (
+        getattr(searcher_config, "strategy", "sequential")
+        if searcher_config
+        else "sequential"
+    )
+    concurrent_engines = (
+        getattr(searcher_config, "concurrent_engines", 2)
+        if searcher_config
+        else 2
+    )
+    merge_deadline_seconds = (
+        getattr(searcher_config, "merge_deadline_seconds", 8.0)
+        if searcher_config
+        else 8.0
+    )
 
     content_fetcher: WebFetcherTool = WebFetcherTool()
 
+    def __init__(self):
+        super().__init__()
+        # The class attributes hold the defaults read when the module was imported, before the run's config
+        self.searcher_config = config.searcher_tool
+        for name in ("max_length", "retry_delay", "max_retries", "max_retry_delay", "engine_retries", "lang", "country",
+                     "num_results", "fetch_content", "strategy", "concurrent_engines", "merge_deadline_seconds"):
+            setattr(self, name, getattr(self.searcher_config, name, getattr(self, name)))
+        engine_health.configure(
+            cooldown_seconds=self.searcher_config.engine_cooldown_seconds,
+            max_cooldown_seconds=self.searcher_config.max_engine_cooldown_seconds,
+            failure_threshold=self.searcher_config.engine_failure_threshold,
+        )
+        # The configured engine and its fallbacks, built the first time a search needs them
+        self._search_engine = LazySearchEngineRegistry(
+            [self.searcher_config.engine, *self.searcher_config.fallback_engines]
+        )
+        self.search_cache = get_search_cache()
+
     async def forward(
         self,
         query: str,
@@ -204,10 +325,14 @@ class WebSearcherTool(AsyncTool):
                 )
 
             if retry_count < self.max_retries:
-                # All engines failed, wait and retry
-                res = f"All search engines failed. Waiting {self.retry_delay} seconds before retry {retry_count + 1}/{self.max_retries}..."
+                # All engines failed: wait without blocking the other tasks, at least until an engine leaves its cooldown
+                delay = max(
+                    backoff_delay(retry_count, self.retry_delay, self.max_retry_delay),
+                    min(engine_health.next_available_in(list(self._search_engine)), self.max_retry_delay),
+                )
+                res = f"All search engines failed. Waiting {delay:.1f} seconds before retry {retry_count + 1}/{self.max_retries}..."
                 logger.warning(res)
-                time.sleep(self.retry_delay)
+                await asyncio.sleep(delay)
             else:
                 res = f"All search engines failed after {self.max_retries} retries. Giving up."
                 logger.error(res)
@@ -221,18 +346,35 @@ class WebSearcherTool(AsyncTool):
     async def _try_all_engines(
         self, query: str, num_results: int, search_params: Dict[str, Any]
     ) -> List[SearchResult]:
-        """Try all search engines in the configured order."""
+        """Search with the engines according to the configured strategy, recording the search latency."""
+        if self.strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy '{self.strategy}', expected one of {SEARCH_STRATEGIES}")
+
         engine_order = self._get_engine_order()
+        start_time = time.perf_counter()
+        if self.strategy == "race":
+            results = await self._race_engines(engine_order, query, num_results, search_params)
+        elif self.strategy == "fan-out-merge":
+            results = await self._merge_engines(engine_order, query, num_results, search_params)
+        else:
+            results = await self._try_engines_in_order(engine_order, query, num_results, search_params)
+        search_latency_stats.record(self.strategy, time.perf_counter() - start_time, success=bool(results))
+        return results
+
+    async def _try_engines_in_order(
+        self, engine_order: List[str], query: str, num_results: int, search_params: Dict[str, Any]
+    ) -> List[SearchResult]:
+        """Try the search engines one after another until one returns results."""
         failed_engines = []
 
         for engine_name in engine_order:
-            engine = self._search_engine[engine_name]
             logger.info(f"🔎 Attempting search with {engine_name.capitalize()}...")
-            search_items = await self._perform_search_with_engine(
-                engine, query, num_results, search_params
+            search_items = await self._search_with_engine_name(
+                engine_name, query, num_results, search_params
             )
 
             if not search_items:
+                failed_engines.append(engine_name)
                 continue
 
             if failed_engines:
@@ -240,23 +382,111 @@ class WebSearcherTool(AsyncTool):
                     f"Search successful with {engine_name.capitalize()} after trying: {', '.join(failed_engines)}"
                 )
 
-            # Transform search items into structured results
-            return [
-                SearchResult(
-                    position=i + 1,
-                    url=item.url,
-                    title=item.title
-                    or f"Result {i+1}",  # Ensure we always have a title
-                    description=item.description or "",
-                    source=engine_name,
-                )
-                for i, item in enumerate(search_items)
-            ]
+            return self._to_search_results(engine_name, search_items)
 
         if failed_engines:
             logger.error(f"All search engines failed: {', '.join(failed_engines)}")
         return []
 
+    async def _race_engines(
+        self, engine_order: List[str], query: str, num_results: int, search_params: Dict[str, Any]
+    ) -> List[SearchResult]:
+        """
+        Query the top engines concurrently and return the first non-empty results, cancelling the
+        other searches. The remaining engines are tried in order if all of them fail.
+        """
+        racing, remaining = engine_order[: self.concurrent_engines], engine_order[self.concurrent_engines :]
+        logger.info(f"🔎 Racing search engines: {', '.join(racing)}...")
+        tasks = {
+            asyncio.create_task(self._search_with_engine_name(engine_name, query, num_results, search_params)): engine_name
+            for engine_name in racing
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result():
+                        return self._to_search_results(tasks[task], task.result())
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return await self._try_engines_in_order(remaining, query, num_results, search_params) if remaining else []
+
+    async def _merge_engines(
+        self, engine_order: List[str], query: str, num_results: int, search_params: Dict[str, Any]
+    ) -> List[SearchResult]:
+        """
+        Query the top engines concurrently, wait for them up to `merge_deadline_seconds` and fuse the
+        results they returned. Falls back on the remaining engines if none of them returned results.
+        """
+        merging, remaining = engine_order[: self.concurrent_engines], engine_order[self.concurrent_engines :]
+        logger.info(f"🔎 Searching with {', '.join(merging)} and merging the results...")
+        tasks = {
+            engine_name: asyncio.create_task(self._search_with_engine_name(engine_name, query, num_results, search_params))
+            for engine_name in merging
+        }
+        try:
+            _, pending = await asyncio.wait(tasks.values(), timeout=self.merge_deadline_seconds)
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        if pending:
+            late = [engine_name for engine_name, task in tasks.items() if task in pending]
+            logger.warning(f"Search engines missed the {self.merge_deadline_seconds}s deadline: {', '.join(late)}")
+
+        results_by_engine = {
+            engine_name: task.result()
+            for engine_name, task in tasks.items()
+            if task not in pending and task.result()
+        }
+        if results_by_engine:
+            return fuse_results(results_by_engine, num_results)
+        return await self._try_engines_in_order(remaining, query, num_results, search_params) if remaining else []
+
+    async def _search_with_engine_name(
+        self, engine_name: str, query: str, num_results: int, search_params: Dict[str, Any]
+    ) -> List[SearchItem]:
+        """Search with one engine through the search cache, logging its failure instead of raising it."""
+
+        async def search() -> List[SearchItem]:
+            return await self._perform_search_with_engine(
+                engine_name, self._search_engine[engine_name], query, num_results, search_params
+            )
+
+        try:
+            if self.search_cache is None:
+                return await search()
+            key = get_search_key(
+                engine_name,
+                query,
+                lang=search_params.get("lang"),
+                country=search_params.get("country"),
+                filter_year=search_params.get("filter_year"),
+                num_results=num_results,
+            )
+            return await self.search_cache.search(key, engine_name, search)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Search with {engine_name.capitalize()} failed: {e}")
+            return []
+
+    def _to_search_results(self, engine_name: str, search_items: List[SearchItem]) -> List[SearchResult]:
+        """Transform search items into structured results."""
+        return [
+            SearchResult(
+                position=i + 1,
+                url=item.url,
+                title=item.title
+                or f"Result {i+1}",  # Ensure we always have a title
+                description=item.description or "",
+                source=engine_name,
+            )
+            for i, item in enumerate(search_items)
+        ]
+
     async def _fetch_content_for_results(
             self, results: List[SearchResult]
     ) -> List[SearchResult]:
@@ -313,27 +543,46 @@ class WebSearcherTool(AsyncTool):
         )
         engine_order.extend([e for e in self._search_engine if e not in engine_order])
 
-        return engine_order
+        # Skip the engines in cooldown and try the fastest expected first
+        return engine_health.order(engine_order)
 
-    @retry(
-        stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10)
-    )
     async def _perform_search_with_engine(
         self,
+        engine_name: str,
         engine: WebSearchEngine,
         query: str,
         num_results: int,
         search_params: Dict[str, Any],
     ) -> List[SearchItem]:
-        """Execute search with the given engine and parameters."""
+        """
+        Execute search with the given engine and parameters, recording the engine's health. Timeouts and
+        dropped connections are retried with jittered backoff; rate limits are not, the engine cools down instead.
+        """
+        health = engine_health.get(engine_name)
+        for attempt in range(self.engine_retries + 1):
+            start_time = time.perf_counter()
+            try:
+                results = [result
+                    for result in await engine.perform_search(
+                        query,
+                        num_results=num_results,
+                        lang=search_params.get("lang"),
+                        country=search_params.get("country"),
+                        filter_year=search_params.get("filter_year"),
+                    )
+                ]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                retry_after = get_retry_after(e)
+                health.record_failure(time.perf_counter() - start_time, retry_after)
+                if retry_after is None and is_transient(e) and attempt < self.engine_retries and not health.cooling_down:
+                    await asyncio.sleep(backoff_delay(attempt, 1.0, 10.0))
+                    continue
+                raise
 
-        results = [result
-            for result in await engine.perform_search(
-                query,
-                num_results=num_results,
-                lang=search_params.get("lang"),
-                country=search_params.get("country"),
-                filter_year=search_params.get("filter_year"),
-            )
-        ]
-        return results
+            if results:
+                health.record_success(time.perf_counter() - start_time)
+            else:
+                health.record_empty(time.perf_counter() - start_time)
+            return results
@@ -1,5 +1,5 @@
 from src.utils.path_utils import assemble_project_path
-from src.utils.token_utils import get_token_count
+from src.utils.token_utils import get_token_count, TokenCounter
 from src.utils.image_utils import encode_image, download_image
 from src.utils.utils import (escape_code_brackets,
                              _is_package_available,
@@ -11,11 +11,14 @@ from src.utils.utils import (escape_code_brackets,
                              encode_image_base64,
                              make_image_url,
                              parse_json_blob,
+                             extract_json_blob,
                              make_json_serializable,
                              make_init_file,
                              parse_code_blobs
                              )
+from src.utils.json_repair import JsonRepairStats, json_repair_stats, repair_json
 from src.utils.singleton import Singleton
+from src.utils.disk_cache import DiskCache, CacheEntry
 from src.utils.function_utils import (_convert_type_hints_to_json_schema,
                             get_imports,
                             get_json_schema)
@@ -23,6 +26,7 @@ from src.utils.function_utils import (_convert_type_hints_to_json_schema,
 __all__ = [
     "assemble_project_path",
     "get_token_count",
+    "TokenCounter",
     "encode_image",
     "download_image",
     "escape_code_brackets",
@@ -32,7 +36,12 @@ __all__ = [
     "is_valid_name",
     "instance_to_source",
     "truncate_content",
+    "JsonRepairStats",
+    "json_repair_stats",
+    "repair_json",
     "Singleton",
+    "DiskCache",
+    "CacheEntry",
     "_convert_type_hints_to_json_schema",
     "get_imports",
     "get_json_schema",
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CacheEntry:
+    value: bytes
+    created_at: float
+    expires_at: Optional[float]
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and self.expires_at <= time.time()
+
+
+class DiskCache:
+    """
+    A small SQLite-backed key/value store with per-entry TTL and size-bounded LRU eviction.
+
+    All methods are synchronous and guarded by a lock, so a single instance can be shared by
+    threads and by asyncio tasks (which should call it through `asyncio.to_thread`).
+
+    Args:
+        path (`str`): Path of the SQLite database file. Parent directories are created if needed.
+        max_size_bytes (`int`, *optional*): Upper bound for the total size of stored values.
+            Least recently used entries are evicted once it is exceeded. `None` disables eviction.
+        default_ttl (`float`, *optional*): Default time to live in seconds. `None` means entries never expire.
+        table (`str`, default `"cache"`): Table name, so several caches can share one database file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        table: str = "cache",
+    ):
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.default_ttl = default_ttl
+        self.table = table
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, "
+            "value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL, "
+            "expires_at REAL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)")
+        self._size = self._total_size()
+
+    def _total_size(self) -> int:
+        row = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        return int(row[0])
+
+    def get_entry(self, key: str, allow_expired: bool = False) -> Optional[CacheEntry]:
+        """Return the entry stored under `key`, refreshing its LRU position. Expired entries are only returned if `allow_expired`."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(value=row[0], created_at=row[1], expires_at=row[2])
+            if entry.expired and not allow_expired:
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return entry
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            previous = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, accessed_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now, expires_at),
+            )
+            self._size += len(value) - (previous[0] if previous else 0)
+            if self.max_size_bytes is not None and self._size > self.max_size_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._size = self._total_size()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._size = 0
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until the store is back under 90% of its budget."""
+        self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        # Other processes may share the file, so re-read the real size before evicting.
+        self._size = self._total_size()
+        target = int(self.max_size_bytes * 0.9)
+        while self._size > target:
+            rows = self._conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._size <= target:
+                    break
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._size -= size
+                self.evictions += 1
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,180 @@
+import json
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+import json5
+
+CODE_FENCE = re.compile(r"```[a-zA-Z0-9_-]*[ \t]*\n?(.*?)\n?[ \t]*```", re.DOTALL)
+# A key without its value at the end of a truncated object (keys follow "{" or ",", string values follow ":")
+DANGLING_KEY = re.compile(r'([,{])\s*"(?:[^"\\]|\\.)*"\s*(?::\s*)?$')
+STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+CLOSERS = {"{": "}", "[": "]"}
+NEXT_OBJECT = re.compile(r"\s*,?\s*\{")
+
+
+def loads(text: str) -> Any:
+    """Parse JSON, falling back on JSON5 (single quotes, comments, trailing commas, Python-like reprs)."""
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        return json5.loads(text, strict=False)
+
+
+def repair_json(text: str) -> Tuple[str, List[str]]:
+    """
+    Fix the common ways a model breaks JSON, returning the repaired text and the fixes applied.
+
+    The value is taken out of a code fence, raw newlines and tabs in strings are escaped, trailing commas
+    are removed, and a truncated value is closed (its last unfinished key dropped). Text after the
+    first complete value is ignored.
+    """
+    fixes = []
+    fenced = CODE_FENCE.search(text)
+    if fenced and fenced.group(1).lstrip()[:1] in ("{", "["):
+        text = fenced.group(1)
+        fixes.append("code_fence")
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        return text, fixes
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = escaped = False
+    for char in text[min(starts):]:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char in STRING_ESCAPES:
+                char = STRING_ESCAPES[char]
+                if "newline" not in fixes:
+                    fixes.append("newline")
+            out.append(char)
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif char in "}]":
+            if _drop_trailing_comma(out) and "trailing_comma" not in fixes:
+                fixes.append("trailing_comma")
+            if stack and stack[-1] == char:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                break
+            continue
+        out.append(char)
+
+    if in_string or stack:
+        fixes.append("truncated")
+        if in_string:
+            out.append('"')
+        if stack and stack[-1] == "}":
+            out = list(DANGLING_KEY.sub(r"\1", "".join(out)))
+        _drop_trailing_comma(out)
+        out.extend(reversed(stack))
+    return "".join(out), fixes
+
+
+def follows_another_object(text: str) -> bool:
+    """Whether another JSON object follows the first object of `text`, as when a model writes several tool calls."""
+    start = text.find("{")
+    if start == -1:
+        return False
+    depth = 0
+    in_string = escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return NEXT_OBJECT.match(text, index + 1) is not None
+    return False
+
+
+def _drop_trailing_comma(out: List[str]) -> bool:
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index]
+        return True
+    return False
+
+
+def load_json_blob(text: str) -> Tuple[Any, int, List[str]]:
+    """
+    Parse the JSON value in a model output, repairing it when it does not parse as it is.
+
+    Returns the value, the index where it starts in `text` and the fixes that were needed (empty if none).
+    Raises `ValueError` if there is no JSON value or it cannot be repaired.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            return loads(text[start : end + 1]), start, []
+        except ValueError:
+            pass
+
+    repaired, fixes = repair_json(text)
+    if not fixes:
+        if start == -1:
+            raise ValueError("The model output does not contain any JSON blob.")
+        raise ValueError(f"The JSON blob is invalid and could not be repaired: {text[start:]}")
+    try:
+        return loads(repaired), max(start, 0), fixes
+    except ValueError as e:
+        raise ValueError(f"The JSON blob is invalid and could not be repaired ({', '.join(fixes)}): {e}") from e
+
+
+class JsonRepairStats:
+    """
+    Counts the JSON values parsed from model outputs: as they were, repaired, repaired but rejected by
+    the tool's schema, or failed. Each repaired tool call is a model call the agent did not retry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.parsed = 0
+        self.repaired = 0
+        self.rejected = 0
+        self.failed = 0
+        self.fixes: Dict[str, int] = {}
+
+    def record(self, outcome: str, fixes: List[str] = ()):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            for fix in fixes:
+                self.fixes[fix] = self.fixes.get(fix, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        attempts = self.repaired + self.rejected + self.failed
+        return {
+            "parsed": self.parsed,
+            "repaired": self.repaired,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "repair_rate": round(self.repaired / attempts, 3) if attempts else None,
+            "fixes": dict(self.fixes),
+        }
+
+
+json_repair_stats = JsonRepairStats()
@@ -1,4 +1,38 @@
+import functools
+import threading
+from collections import OrderedDict
+from typing import Optional
+
 import tiktoken
+from tiktoken.model import encoding_name_for_model
+
+# Tokenizer used for the models tiktoken does not know (Claude, Gemini, Qwen...): counts are estimates.
+DEFAULT_ENCODING = "o200k_base"
+# Characters per token when no encoding can be loaded (tiktoken downloads them on first use).
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding_name(model: str) -> str:
+    """Name of the tiktoken encoding of a model family, ignoring the provider prefix (`openai/gpt-4o`)."""
+    try:
+        return encoding_name_for_model(model.split("/")[-1])
+    except KeyError:
+        return DEFAULT_ENCODING
+
+
+@functools.lru_cache(maxsize=None)
+def load_encoding(encoding_name: str) -> Optional["tiktoken.Encoding"]:
+    """Load an encoding once per process. `None` (also cached) when it is unavailable, e.g. offline."""
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception:
+        return None
+
+
+def get_encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    return load_encoding(get_encoding_name(model))
+
 
 def get_token_count(prompt: str, model: str = "gpt-4o") -> int:
     """
@@ -7,5 +41,42 @@ def get_token_count(prompt: str, model: str = "gpt-4o") -> int:
     :param model: The model to use for tokenization. Default is "gpt-4o".
     :return: The number of tokens in the prompt.
     """
-    encoding = tiktoken.encoding_for_model(model)
-    return len(encoding.encode(prompt))
\ No newline at end of file
+    encoding = get_encoding(model)
+    if encoding is None:
+        return (len(prompt) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(prompt, disallowed_special=()))
+
+
+class TokenCounter:
+    """
+    Token counts of texts, memoized per encoding.
+
+    The messages of an agent are rebuilt from its memory at every step, so all but the newest step's
+    texts are found in the cache and only the new content gets tokenized.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str, model: str) -> int:
+        if not text:
+            return 0
+        key = (get_encoding_name(model), text)
+        with self._lock:
+            count = self.entries.get(key)
+            if count is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return count
+
+        count = get_token_count(text, model)
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = count
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return count
@@ -16,6 +16,7 @@
 # limitations under the License.
 import ast
 import base64
+import dataclasses
 import importlib.metadata
 import importlib.util
 import inspect
@@ -29,7 +30,9 @@ from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
 from textwrap import dedent
-from typing import TYPE_CHECKING, Any, Dict, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from src.utils.json_repair import follows_another_object, json_repair_stats, load_json_blob
 
 
 @lru_cache
@@ -87,6 +90,12 @@ def make_json_serializable(obj: Any) -> Any:
         return [make_json_serializable(item) for item in obj]
     elif isinstance(obj, dict):
         return {str(k): make_json_serializable(v) for k, v in obj.items()}
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        # Slotted dataclasses have no __dict__
+        return {
+            "_type": obj.__class__.__name__,
+            **{field.name: make_json_serializable(getattr(obj, field.name)) for field in dataclasses.fields(obj)},
+        }
     elif hasattr(obj, "__dict__"):
         # For custom objects, convert their __dict__ to a serializable format
         return {"_type": obj.__class__.__name__, **{k: make_json_serializable(v) for k, v in obj.__dict__.items()}}
@@ -95,37 +104,33 @@ def make_json_serializable(obj: Any) -> Any:
         return str(obj)
 
 
+def extract_json_blob(json_blob: str) -> Tuple[Dict[str, str], str, List[str]]:
+    """Like `parse_json_blob`, also returning the repairs the JSON blob needed (see `src.utils.json_repair`)."""
+    if "Calling tools:" in json_blob:
+        json_blob = json_blob.split("Calling tools:")[-1]
+
+    if follows_another_object(json_blob):
+        raise ValueError(
+            "JSON is invalid: you probably tried to provide multiple tool calls in one action. PROVIDE ONLY ONE TOOL CALL."
+        )
+    json_data, start, fixes = load_json_blob(json_blob)
+    # Tool calls written like the memory shows them: a list of one call
+    if isinstance(json_data, list) and len(json_data) == 1:
+        json_data = json_data[0]
+    if not isinstance(json_data, dict) or "function" not in json_data:
+        raise ValueError(f"The JSON blob has no \"function\" key with the tool call: {json_blob[start:]}")
+    return json_data["function"], json_blob[:start], fixes
+
+
 def parse_json_blob(json_blob: str) -> Tuple[Dict[str, str], str]:
     "Extracts the JSON blob from the input and returns the JSON data and the rest of the input."
     try:
-        if "Calling tools:" in json_blob:
-            json_blob = json_blob.split("Calling tools:")[-1]
-
-        first_accolade_index = json_blob.find("{")
-        last_accolade_index = [a.start() for a in list(re.finditer("}", json_blob))][-1]
-        json_data = json_blob[first_accolade_index: last_accolade_index + 1]
-
-        print("*" * 50)
-        print(json_data)
-        print("*" * 50)
-
-        json_data = json5.loads(json_data, strict=False)
-        json_data = json_data['function']
-
-        return json_data, json_blob[:first_accolade_index]
-    except IndexError:
-        raise ValueError("The model output does not contain any JSON blob.")
-    except json.JSONDecodeError as e:
-        place = e.pos
-        if json_blob[place - 1 : place + 2] == "},\n":
-            raise ValueError(
-                "JSON is invalid: you probably tried to provide multiple tool calls in one action. PROVIDE ONLY ONE TOOL CALL."
-            )
-        raise ValueError(
-            f"The JSON blob you used is invalid due to the following error: {e}.\n"
-            f"JSON blob was: {json_blob}, decoding failed on that specific part of the blob:\n"
-            f"'{json_blob[place - 4 : place + 5]}'."
-        )
+        json_data, rest, fixes = extract_json_blob(json_blob)
+    except ValueError:
+        json_repair_stats.record("failed")
+        raise
+    json_repair_stats.record("repaired" if fixes else "parsed", fixes)
+    return json_data, rest
 
 
 def parse_code_blobs(text: str) -> str:
@@ -0,0 +1,139 @@
+"""
+Local stand-in for a model provider (or any HTTP endpoint) shared by the tests.
+
+`start_stub_server` serves on a free local port from a background thread. Every request is answered by its
+`respond` hook, which gets a `StubRequest` and returns one of:
+
+- a body, sent with status 200: a dict (JSON), a str (HTML) or bytes,
+- a `(status, body)` or `(status, body, headers)` tuple, the body possibly `None`,
+- `None` when the hook wrote the response itself, e.g. a stream of server-sent events.
+
+The default hook answers chat completion requests with `chat_completion`.
+"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def chat_completion(content: str = "Paris", model: str = "stub", prompt_tokens: int = 10, completion_tokens: int = 1,
+                    **message_fields) -> Dict[str, Any]:
+    """A chat completion response with a single assistant message."""
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content, **message_fields}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def error(status: int, message: str, error_type: str = "server_error") -> tuple:
+    """An error response in the providers' format."""
+    return status, {"error": {"message": message, "type": error_type}}
+
+
+class StubRequest:
+    """A request to the stub server: its method, path, query parameters and JSON body."""
+
+    def __init__(self, handler: BaseHTTPRequestHandler, body: Any):
+        url = urlparse(handler.path)
+        self.handler = handler
+        self.method = handler.command
+        self.path = url.path
+        self.params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.headers = handler.headers
+        self.body = body
+
+    @property
+    def model(self) -> str:
+        return (self.body or {}).get("model", "stub")
+
+    def start_stream(self):
+        self.handler.send_response(200)
+        self.handler.send_header("Content-Type", "text/event-stream")
+        self.handler.send_header("Transfer-Encoding", "chunked")
+        self.handler.end_headers()
+
+    def send_event(self, payload: Any):
+        """Send one server-sent event: a JSON payload, or a raw string like `[DONE]`."""
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        data = f"data: {data}\n\n".encode()
+        self.handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.handler.wfile.flush()
+
+    def end_stream(self):
+        self.handler.wfile.write(b"0\r\n\r\n")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    respond: Callable[[StubRequest], Any] = staticmethod(lambda request: chat_completion(model=request.model))
+    # Delay before each answer, like a slow provider
+    latency = 0.0
+    # Delay of each new connection, standing in for the TCP and TLS handshakes with a remote provider
+    handshake_delay = 0.0
+
+    def setup(self):
+        if self.handshake_delay:
+            time.sleep(self.handshake_delay)
+        super().setup()
+
+    def handle_request(self):
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length) if length else b""
+        request = StubRequest(self, json.loads(data) if data else None)
+        if self.latency:
+            time.sleep(self.latency)
+        reply = self.respond(request)
+        if reply is None:
+            return
+        if not isinstance(reply, tuple):
+            reply = (200, reply)
+        status, body, headers = reply if len(reply) == 3 else (*reply, {})
+        if isinstance(body, dict):
+            body, content_type = json.dumps(body).encode(), "application/json"
+        elif isinstance(body, str):
+            body, content_type = body.encode(), "text/html; charset=utf-8"
+        else:
+            body, content_type = body or b"", "application/octet-stream"
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up on the request, e.g. a cancelled hedge
+
+    do_GET = do_POST = do_HEAD = handle_request
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    # Many concurrent callers connect at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def start_stub_server(
+    respond: Optional[Callable[[StubRequest], Any]] = None,
+    latency: float = 0.0,
+    handshake_delay: float = 0.0,
+    path: str = "/v1",
+) -> str:
+    """Start a stub server answering with `respond` after `latency` seconds, and return its base url."""
+    attributes = {"latency": latency, "handshake_delay": handshake_delay}
+    if respond is not None:
+        attributes["respond"] = staticmethod(respond)
+    server = StubServer(("127.0.0.1", 0), type("StubHandler", (StubHandler,), attributes))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
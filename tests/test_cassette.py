@@ -0,0 +1,108 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from openai import AsyncOpenAI
+
+from src.models import OpenAIServerModel
+from src.models.cassette import Cassette, CassetteMissError
+from stub_server import chat_completion, start_stub_server
+
+NUM_RECORDS = 70
+responses = 0
+
+
+def numbered_answer(request):
+    """Numbers its answers, so that every replayed response can be told apart."""
+    global responses
+    responses += 1
+    return chat_completion(f"answer {responses}", model=request.model, completion_tokens=2)
+
+
+async def ask(model, question: str) -> str:
+    message = await model([{"role": "user", "content": [{"type": "text", "text": question}]}])
+    return message.content
+
+
+def replay_model(path: str):
+    # Replaying never reaches the provider
+    client = AsyncOpenAI(api_key="stub", base_url="http://127.0.0.1:9/v1", max_retries=0)
+    cassette = Cassette(path, mode="replay", replay_latency=0.0)
+    return OpenAIServerModel(model_id="stub-model", http_client=client, cassette=cassette), cassette
+
+
+async def test_round_trip(client, directory: str):
+    path = os.path.join(directory, "round_trip.jsonl.gz")
+    cassette = Cassette(path, mode="record")
+    model = OpenAIServerModel(model_id="stub-model", http_client=client, cassette=cassette)
+    recorded = [await ask(model, question) for question in ("capital of France", "capital of France", "capital of Peru")]
+    cassette.close()
+
+    model, cassette = replay_model(path)
+    # Each recorded response is served once, the same request getting its responses in recording order
+    assert [await ask(model, "capital of France") for _ in range(2)] == recorded[:2]
+    # A drifted request gets the model's next response that was not replayed yet
+    assert await ask(model, "capital of Chile") == recorded[2]
+    try:
+        await ask(model, "capital of Peru")
+        raise AssertionError("Replayed responses are consumed")
+    except CassetteMissError:
+        pass
+    assert cassette.stats()["replayed_out_of_order"] == 1 and cassette.misses == 1
+
+
+async def test_re_record(client, directory: str):
+    path = os.path.join(directory, "re_record.jsonl.gz")
+    for _ in range(2):
+        cassette = Cassette(path, mode="record")
+        model = OpenAIServerModel(model_id="stub-model", http_client=client, cassette=cassette)
+        recorded = await ask(model, "capital of France")
+        cassette.close()
+
+    # Recording again replaces the previous run's responses
+    model, cassette = replay_model(path)
+    assert len(cassette._entries) == 1
+    assert await ask(model, "capital of France") == recorded
+
+
+async def test_buffered_writes(client, directory: str):
+    path = os.path.join(directory, "buffered.jsonl.gz")
+    cassette = Cassette(path, mode="record", flush_every=16)
+    model = OpenAIServerModel(model_id="stub-model", http_client=client, cassette=cassette)
+    start = time.perf_counter()
+    for i in range(NUM_RECORDS):
+        await ask(model, f"question {i}")
+    elapsed = time.perf_counter() - start
+
+    # A run that stops without closing the cassette leaves every flushed record readable
+    flushed = NUM_RECORDS // 16 * 16
+    _, cassette_before_close = replay_model(path)
+    assert len(cassette_before_close._entries) == flushed, len(cassette_before_close._entries)
+
+    cassette.close()
+    with open(path, "rb") as f:
+        assert f.read().count(b"\x1f\x8b\x08") == 1, "one gzip stream"
+    _, replayed = replay_model(path)
+    assert len(replayed._entries) == NUM_RECORDS
+    print(f"Recorded {NUM_RECORDS} calls in {elapsed:.2f}s into {os.path.getsize(path):,} bytes (one gzip stream)")
+
+
+async def main():
+    client = AsyncOpenAI(api_key="stub", base_url=start_stub_server(numbered_answer))
+    with tempfile.TemporaryDirectory() as directory:
+        await test_round_trip(client, directory)
+        await test_re_record(client, directory)
+        await test_buffered_writes(client, directory)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from openai import AsyncOpenAI, BadRequestError
+
+from src.models import OpenAIServerModel
+from src.models.circuit_breaker import BreakerState, CircuitBreaker, CircuitOpenError
+from stub_server import chat_completion, error, start_stub_server
+
+COOLDOWN = 0.3
+# Behaviour of each stub model: "ok", "error" (HTTP 500), "bad_request" (HTTP 400) or "hang"
+BEHAVIOUR = {"primary-stub": "ok", "backup-stub": "ok", "spare-stub": "ok"}
+CALLS = {"primary-stub": 0, "backup-stub": 0, "spare-stub": 0}
+
+
+def respond(request):
+    model = request.model
+    CALLS[model] += 1
+    if BEHAVIOUR[model] == "hang":
+        time.sleep(2)
+    if BEHAVIOUR[model] == "error":
+        return error(500, "overloaded")
+    if BEHAVIOUR[model] == "bad_request":
+        return error(400, "context too long", "invalid_request_error")
+    return chat_completion(model, model=model)
+
+
+def make_models():
+    client = AsyncOpenAI(api_key="stub", base_url=start_stub_server(respond), max_retries=0)
+    breaker = CircuitBreaker("primary-stub", min_calls=2, window=4, cooldown_seconds=COOLDOWN)
+    primary = OpenAIServerModel(model_id="primary-stub", http_client=client, circuit_breaker=breaker)
+    backup = OpenAIServerModel(model_id="backup-stub", http_client=client)
+    spare = OpenAIServerModel(model_id="spare-stub", http_client=client)
+    return primary, backup, spare, breaker
+
+
+async def ask(model) -> str:
+    message = await model([{"role": "user", "content": [{"type": "text", "text": "ping"}]}])
+    return message.content
+
+
+async def main():
+    primary, backup, spare, breaker = make_models()
+    primary.fallback_models = [backup]
+
+    # A bad request is the caller's fault: it neither counts against the primary nor goes to the fallbacks
+    BEHAVIOUR["primary-stub"] = "bad_request"
+    for _ in range(3):
+        try:
+            await ask(primary)
+            raise AssertionError("A bad request is raised")
+        except BadRequestError:
+            pass
+    assert breaker.state == BreakerState.CLOSED and breaker.failures == 0 and CALLS["backup-stub"] == 0
+    CALLS["primary-stub"] = 0
+
+    # Failing calls are retried on the fallback until the breaker trips
+    BEHAVIOUR["primary-stub"] = "error"
+    assert [await ask(primary) for _ in range(2)] == ["backup-stub"] * 2
+    assert breaker.state == BreakerState.OPEN and CALLS["primary-stub"] == 2
+
+    # While open, calls are rerouted without reaching the primary, each counted once whatever the fallbacks tried
+    assert [await ask(primary) for _ in range(3)] == ["backup-stub"] * 3
+    assert CALLS["primary-stub"] == 2 and breaker.rerouted == 3
+    BEHAVIOUR["backup-stub"] = "error"
+    primary.fallback_models = [backup, spare]
+    assert await ask(primary) == "spare-stub"
+    assert breaker.rerouted == 4
+    BEHAVIOUR["backup-stub"] = "ok"
+
+    # Without an available fallback, the open breaker fails fast
+    primary.fallback_models = []
+    try:
+        await ask(primary)
+        raise AssertionError("An open breaker without fallbacks raises")
+    except CircuitOpenError:
+        pass
+    assert CALLS["primary-stub"] == 2
+    primary.fallback_models = [backup]
+
+    # A cancelled half-open probe lets the next call probe again
+    await asyncio.sleep(COOLDOWN)
+    BEHAVIOUR["primary-stub"] = "hang"
+    probe = asyncio.create_task(ask(primary))
+    await asyncio.sleep(0.1)
+    assert breaker.state == BreakerState.HALF_OPEN and breaker.probe_in_flight
+    probe.cancel()
+    try:
+        await probe
+    except asyncio.CancelledError:
+        pass
+    assert not breaker.probe_in_flight
+
+    # The recovered primary's probe closes the breaker
+    BEHAVIOUR["primary-stub"] = "ok"
+    assert await ask(primary) == "primary-stub"
+    assert breaker.state == BreakerState.CLOSED
+    assert await ask(primary) == "primary-stub"
+    print(f"Circuit breaker: {breaker.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+import httpx
+
+from src.models import OpenAIServerModel, model_manager
+from src.models.models import ModelSpec
+from src.proxy import CONNECTION_STATS, ASYNC_HTTP_CLIENT
+from src.proxy.local_proxy import ConnectionStats
+from stub_server import start_stub_server
+
+# Delay of each new connection, standing in for the TCP and TLS handshakes with a remote provider
+HANDSHAKE_DELAY = 0.05
+
+
+def respond(request):
+    # Warmup requests get an error status, which still leaves the connection in the pool
+    return (404, None) if request.method == "HEAD" else {}
+
+
+def make_client(stats: ConnectionStats, keepalive_expiry: float) -> httpx.AsyncClient:
+    async def trace_request(request: httpx.Request):
+        request.extensions["trace"] = stats.async_tracer()
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(keepalive_expiry=keepalive_expiry), event_hooks={"request": [trace_request]}, trust_env=False
+    )
+
+
+async def test_warmup(api_base: str) -> float:
+    model_manager.registed_models.register(
+        "warmup-stub", ModelSpec(model_class=OpenAIServerModel, model_id="warmup-stub", api_base=api_base, api_key="stub", pooled_client=True)
+    )
+    connections = CONNECTION_STATS.connections
+    assert await model_manager.warmup(connections_per_host=2, timeout=5) == 2
+    assert CONNECTION_STATS.connections - connections == 2
+    # Requests over the pooled connections open none
+    assert await model_manager.warmup(connections_per_host=2, timeout=5) == 0
+
+    # The first requests of the run go over the warmed connections
+    start = time.perf_counter()
+    await asyncio.gather(*[ASYNC_HTTP_CLIENT.get(f"{api_base}/models") for _ in range(2)])
+    elapsed = time.perf_counter() - start
+    assert CONNECTION_STATS.connections - connections == 2, CONNECTION_STATS.stats()
+    return elapsed
+
+
+async def test_keepalive_expiry(api_base: str):
+    """Steps separated by a long tool call reuse their connection only if it outlives the pause."""
+    for keepalive_expiry, new_connections in ((0.1, 3), (300, 1)):
+        stats = ConnectionStats()
+        async with make_client(stats, keepalive_expiry) as client:
+            for _ in range(3):
+                await client.get(f"{api_base}/models")
+                await asyncio.sleep(0.3)
+        assert stats.connections == new_connections, (keepalive_expiry, stats.stats())
+        print(f"keepalive_expiry={keepalive_expiry:<5} {stats.stats()}")
+
+
+async def main():
+    api_base = start_stub_server(respond, handshake_delay=HANDSHAKE_DELAY)
+
+    stats = ConnectionStats()
+    async with make_client(stats, keepalive_expiry=300) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[client.get(f"{api_base}/models") for _ in range(2)])
+        cold = time.perf_counter() - start
+
+    warm = await test_warmup(api_base)
+    await test_keepalive_expiry(api_base)
+
+    print(f"First requests on cold connections:   {cold * 1000:.1f} ms")
+    print(f"First requests on warmed connections: {warm * 1000:.1f} ms")
+    print(f"Shared client: {CONNECTION_STATS.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
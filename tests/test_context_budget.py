@@ -0,0 +1,79 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+from copy import deepcopy
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.models.context_budget import ContextBudgeter
+
+MODEL_ID = "qwen"
+CONTEXT_LIMIT = 32768
+
+
+def make_history(num_steps: int, large_observation_step: int | None = None) -> list:
+    """An agent transcript whose observations are ~2k tokens each, one of them ~50k tokens (a long analyzed document)."""
+    messages = [
+        {"role": "system", "content": [{"type": "text", "text": "You are a research agent. " * 200}]},
+        {"role": "user", "content": [{"type": "text", "text": "Answer the question."}]},
+    ]
+    for step in range(num_steps):
+        size = 200_000 if step == large_observation_step else 8_000
+        messages.append({"role": "assistant", "content": [{"type": "text", "text": f"Step {step}: call a tool. " * 10}]})
+        messages.append({"role": "user", "content": [{"type": "text", "text": f"Observation {step}: " + "w" * size}]})
+    return messages
+
+
+def test_fits_and_keeps_input():
+    budgeter = ContextBudgeter(output_headroom=4096)
+    messages = make_history(num_steps=12, large_observation_step=3)
+    snapshot = deepcopy(messages)
+
+    completion_kwargs = budgeter.fit({"messages": messages}, CONTEXT_LIMIT, MODEL_ID)
+    fitted = completion_kwargs["messages"]
+    assert messages == snapshot
+    assert sum(budgeter.count_message(message, MODEL_ID) for message in fitted) <= CONTEXT_LIMIT - 4096
+    assert fitted[0] == messages[0] and fitted[-1] == messages[-1]
+    assert budgeter.truncated_contents >= 1
+
+    small = {"messages": make_history(num_steps=2)}
+    assert budgeter.fit(small, CONTEXT_LIMIT, MODEL_ID) is small
+
+
+def test_keeps_task():
+    """Dropping old messages to fit starts after the task: the model still knows what it is working on."""
+    budgeter = ContextBudgeter(output_headroom=4096)
+    messages = make_history(num_steps=40)
+    fitted = budgeter.fit({"messages": messages}, CONTEXT_LIMIT, MODEL_ID)["messages"]
+    assert budgeter.dropped_messages >= 1
+    assert fitted[:2] == messages[:2] and fitted[-2:] == messages[-2:]
+
+
+def main():
+    test_fits_and_keeps_input()
+    test_keeps_task()
+
+    # An agent re-sends its whole history at every step: only the new step's content needs counting.
+    budgeter = ContextBudgeter()
+    for num_steps in (10, 20, 40):
+        history = make_history(num_steps)
+        start = time.perf_counter()
+        budgeter.fit({"messages": history}, 10_000_000, MODEL_ID)
+        cold = (time.perf_counter() - start) * 1000
+        history.append({"role": "assistant", "content": [{"type": "text", "text": "One more step. " * 10}]})
+        start = time.perf_counter()
+        budgeter.fit({"messages": history}, 10_000_000, MODEL_ID)
+        warm = (time.perf_counter() - start) * 1000
+        print(f"steps={num_steps:<3} counting the history {cold:7.2f} ms | after one more step {warm:6.2f} ms")
+
+    budgeter = ContextBudgeter()
+    budgeter.fit({"messages": make_history(num_steps=12, large_observation_step=3)}, CONTEXT_LIMIT, MODEL_ID)
+    print(f"Context budget stats: {budgeter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
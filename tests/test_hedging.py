@@ -0,0 +1,99 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from openai import AsyncOpenAI
+
+from src.models import OpenAIServerModel
+from src.models.hedging import HedgePolicy
+from stub_server import chat_completion, start_stub_server
+
+SLOW_LATENCY = 1.5
+FAST_LATENCY = 0.05
+HEDGE_DELAY = 0.2
+REQUESTS = {"slow": 0, "fast": 0}
+
+
+def start_endpoint(name: str, latency: float) -> AsyncOpenAI:
+    def respond(request):
+        REQUESTS[name] += 1
+        return chat_completion(name, model=request.model)
+
+    return AsyncOpenAI(api_key="stub", base_url=start_stub_server(respond, latency=latency), max_retries=0)
+
+
+async def ask(model) -> tuple:
+    start = time.perf_counter()
+    message = await model([{"role": "user", "content": [{"type": "text", "text": "What is the capital of France?"}]}])
+    return message.content, time.perf_counter() - start
+
+
+def test_hedge_delay():
+    policy = HedgePolicy(percentile=0.9, min_samples=10, min_delay=0.5, max_delay=5.0)
+    histogram = policy.get_histogram("model")
+    for latency in range(1, 10):
+        histogram.record(latency / 10)
+    # Too few samples: the percentile is not trusted yet
+    assert policy.hedge_delay("model") == 5.0
+    histogram.record(8.0)
+    assert policy.hedge_delay("model") == 5.0  # the p90 is the outlier, capped
+    for _ in range(90):
+        histogram.record(1.0)
+    assert policy.hedge_delay("model") == 1.0
+    policy.get_histogram("fast").samples.extend([0.01] * 20)
+    assert policy.hedge_delay("fast") == 0.5
+
+
+async def test_loser_is_cancelled():
+    policy = HedgePolicy(min_samples=1, min_delay=HEDGE_DELAY, max_delay=HEDGE_DELAY)
+    cancelled = asyncio.Event()
+
+    async def hanging_primary():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def hedge():
+        return {"choices": []}
+
+    start = time.perf_counter()
+    await policy.run("model", hanging_primary, hedge)
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    # The cancelled primary still tells how slow the endpoint is, as a lower bound
+    assert policy.get_histogram("model").samples[-1] >= HEDGE_DELAY
+    assert time.perf_counter() - start < 1
+
+
+async def main():
+    test_hedge_delay()
+    await test_loser_is_cancelled()
+
+    slow_client = start_endpoint("slow", SLOW_LATENCY)
+    fast_client = start_endpoint("fast", FAST_LATENCY)
+    policy = HedgePolicy(min_samples=100, min_delay=HEDGE_DELAY, max_delay=HEDGE_DELAY, budget=0.0)
+    model = OpenAIServerModel(model_id="stub-model", http_client=slow_client, hedge_policy=policy, hedge_client=fast_client)
+
+    # The slow primary is hedged to the fast endpoint, which wins
+    content, hedged = await ask(model)
+    assert content == "fast" and hedged < SLOW_LATENCY
+    assert policy.hedged == 1 and policy.hedge_wins == 1 and REQUESTS["fast"] == 1
+    assert len(policy.get_histogram("stub-model")) == 1
+
+    # The only credit is spent: the next slow request waits for the primary
+    content, waited = await ask(model)
+    assert content == "slow" and waited >= SLOW_LATENCY
+    assert policy.hedges_skipped == 1 and REQUESTS["fast"] == 1
+    print(f"Hedged: {hedged:.2f}s | out of budget: {waited:.2f}s | {policy.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
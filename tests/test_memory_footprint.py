@@ -0,0 +1,119 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import gc
+import tracemalloc
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.memory import ActionStep, AgentMemory, MemoryMessages, PlanningStep, TaskStep, ToolCall
+from src.models import ChatMessage, MessageRole
+from src.models.base import get_raw_summary
+
+NUM_STEPS = 20
+PLANNING_INTERVAL = 5
+
+
+def make_response(step: int, content: str) -> dict:
+    """A provider response as returned by an OpenAI compatible API."""
+    return {
+        "id": f"chatcmpl-{step:024d}",
+        "object": "chat.completion",
+        "created": 1750000000 + step,
+        "model": "gpt-4.1-2025-04-14",
+        "system_fingerprint": "fp_0123456789",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content, "tool_calls": None, "refusal": None, "annotations": []},
+            "logprobs": None,
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": 2000 * (step + 1),
+            "completion_tokens": 200,
+            "total_tokens": 2000 * (step + 1) + 200,
+            "prompt_tokens_details": {"cached_tokens": 0, "audio_tokens": 0},
+            "completion_tokens_details": {"reasoning_tokens": 0, "audio_tokens": 0},
+        },
+    }
+
+
+def run_planning_agent(compact: bool) -> AgentMemory:
+    """The memory of a planning run with `NUM_STEPS` steps, as kept before (`compact=False`) or now."""
+    memory = AgentMemory(system_prompt="You are an expert assistant who can solve any task using tool calls. " * 60)
+    memory.steps.append(TaskStep(task="Which year was the observatory on the island founded?"))
+    for step in range(1, NUM_STEPS + 1):
+        if step % PLANNING_INTERVAL == 1:
+            plan = f"Plan {step}: search, then browse the results. " * 20
+            plan_update = [{"role": MessageRole.SYSTEM, "content": [{"type": "text", "text": "Update the plan."}]}]
+            input_messages = plan_update + [
+                message for memory_step in memory.steps for message in memory_step.to_messages(summary_mode=True)
+            ]
+            memory.steps.append(PlanningStep(
+                model_input_messages=memory.reference_messages(summary_mode=True, prefix=plan_update) if compact else input_messages,
+                model_output_message=ChatMessage(
+                    role="assistant", content=plan, raw=get_raw_summary(make_response(step, plan)) if compact else make_response(step, plan)
+                ),
+                plan=plan,
+            ))
+
+        output = f"Thought: I will search for the founding year, attempt {step}. " * 5
+        memory_step = ActionStep(
+            step_number=step,
+            model_input_messages=(
+                memory.reference_messages()
+                if compact
+                else memory.system_prompt.to_messages()
+                + [message for memory_step in memory.steps for message in memory_step.to_messages(summary_mode=False)]
+                + memory.user_prompt.to_messages()
+            ),
+            model_output_message=ChatMessage(
+                role="assistant",
+                content=output,
+                raw=get_raw_summary(make_response(step, output)) if compact else make_response(step, output),
+            ),
+            model_output=output,
+            tool_calls=[ToolCall(name="deep_researcher_agent", arguments={"task": f"search attempt {step}"}, id=str(step))],
+            observations=f"Search results {step}: " + "some page text " * 300,
+        )
+        memory.steps.append(memory_step)
+    return memory
+
+
+def measure(compact: bool) -> int:
+    gc.collect()
+    tracemalloc.start()
+    memory = run_planning_agent(compact)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del memory
+    return size
+
+
+def test_same_messages():
+    legacy, compact = run_planning_agent(compact=False), run_planning_agent(compact=True)
+    for legacy_step, compact_step in zip(legacy.steps, compact.steps):
+        if isinstance(compact_step, (ActionStep, PlanningStep)):
+            assert isinstance(compact_step.model_input_messages, MemoryMessages)
+            assert compact_step.model_input_messages == legacy_step.model_input_messages
+            assert not hasattr(compact_step, "__dict__")
+    assert compact.steps[-1].model_output_message.raw == {
+        "id": f"chatcmpl-{NUM_STEPS:024d}", "model": "gpt-4.1-2025-04-14", "created": 1750000000 + NUM_STEPS, "finish_reason": "stop"
+    }
+
+
+def main():
+    test_same_messages()
+
+    before, after = measure(compact=False), measure(compact=True)
+    print(f"{NUM_STEPS}-step planning run (planning every {PLANNING_INTERVAL} steps)")
+    print(f"Before: {before:>10,} bytes | {before // NUM_STEPS:>8,} bytes per step")
+    print(f"After:  {after:>10,} bytes | {after // NUM_STEPS:>8,} bytes per step ({1 - after / before:.1%} less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import gc
+import sys
+import json
+import time
+from copy import deepcopy
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+import numpy as np
+from PIL import Image
+
+from src.models.base import get_token_usage
+from src.models import ModelManager
+from src.models.message_manager import IMAGE_PAYLOAD_CACHE, MessageManager, ToolSchemaCache
+
+SCREENSHOT_SIZE = (1280, 720)
+REPEATS = 5
+
+
+def make_screenshot(seed: int) -> Image.Image:
+    pixels = np.random.default_rng(seed).integers(0, 255, (SCREENSHOT_SIZE[1], SCREENSHOT_SIZE[0], 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+
+def make_history(num_steps: int, screenshots: list) -> list:
+    """An agent transcript: assistant actions and user observations, every observation with a screenshot."""
+    messages = [
+        {"role": "system", "content": [{"type": "text", "text": "You are a browser agent. " * 50}]},
+        {"role": "user", "content": [{"type": "text", "text": "Find the answer."}]},
+    ]
+    for step in range(num_steps):
+        messages.append({"role": "assistant", "content": [{"type": "text", "text": f"Step {step}: click. " * 20}]})
+        messages.append({"role": "tool-response", "content": [{"type": "text", "text": f"Observation {step}. " * 40}]})
+        messages.append({"role": "user", "content": [{"type": "image", "image": screenshots[step % len(screenshots)]}]})
+    return messages
+
+
+def test_input_is_not_modified():
+    screenshot = make_screenshot(0)
+    messages = [
+        {"role": "user", "content": [{"type": "text", "text": "a"}]},
+        {"role": "user", "content": [{"type": "text", "text": "b"}, {"type": "image", "image": screenshot}]},
+    ]
+    snapshot = deepcopy(messages)
+    for model_id in ("claude37-sonnet", "gpt-4.1"):
+        manager = MessageManager(model_id=model_id)
+        cleaned = manager.get_clean_message_list(messages, convert_images_to_image_urls=True)
+        assert len(cleaned) == 1
+        assert cleaned[0]["content"][0] == {"type": "text", "text": "a\nb"}
+        assert cleaned[0]["content"][1]["type"] == ("image" if model_id == "claude37-sonnet" else "image_url")
+    assert messages[0] == snapshot[0] and messages[1]["content"][0] == snapshot[1]["content"][0]
+    assert messages[1]["content"][1]["image"] is screenshot
+
+
+def registered_claude_model_ids() -> set:
+    """The provider ids the model manager sends Claude requests with, remote and through the local proxy."""
+    model_ids = set()
+    for use_local_proxy in (False, True):
+        manager = ModelManager()
+        manager.init_models(use_local_proxy=use_local_proxy)
+        model_ids |= {manager.registed_models.specs[name].model_id for name in ("claude37-sonnet", "claude37-sonnet-thinking")}
+    return model_ids
+
+
+def test_cache_breakpoints():
+    history = make_history(3, [make_screenshot(0)])
+    snapshot = json.dumps(history, default=id)
+
+    model_ids = registered_claude_model_ids()
+    assert "claude-3-7-sonnet-20250219" in model_ids
+    for model_id in model_ids:
+        cleaned = MessageManager(model_id=model_id).get_clean_message_list(history, convert_images_to_image_urls=True)
+        marked = [index for index, message in enumerate(cleaned) if "cache_control" in message["content"][-1]]
+        assert marked == [0, len(cleaned) - 2, len(cleaned) - 1], model_id
+    assert json.dumps(history, default=id) == snapshot
+
+    cleaned = MessageManager(model_id="gpt-4.1").get_clean_message_list(history, convert_images_to_image_urls=True)
+    assert not any("cache_control" in element for message in cleaned for element in message["content"])
+
+    class Tool:
+        name, description = "web_search", "Search the web."
+        parameters = {"properties": {"query": {"type": "string", "description": "The query."}}}
+
+    manager = MessageManager(model_id="claude-3-7-sonnet-20250219")
+    shared_schema = manager.get_tool_json_schema(Tool())
+    completion_kwargs = manager.get_clean_completion_kwargs({"tools": [shared_schema]})
+    assert completion_kwargs["tools"][0]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in shared_schema
+
+
+def test_tool_schema_cache():
+    class Tool:
+        name, description = "python_interpreter", "Run python code."
+
+        def __init__(self):
+            self.parameters = {"properties": {"code": {"type": "string", "description": "The code."}}}
+
+    cache = ToolSchemaCache()
+    tool = Tool()
+    schema = cache.get_schema(tool, "openai")
+    assert cache.get_schema(tool, "openai") is schema and cache.hits == 1
+
+    # Parameters edited in place get a new schema
+    tool.parameters["properties"]["timeout"] = {"type": "integer", "description": "Seconds."}
+    assert "timeout" in cache.get_schema(tool, "openai")["function"]["parameters"]["properties"]
+
+    # A tool built for each task does not outlive its task in the cache
+    for _ in range(3):
+        cache.get_schema(Tool(), "openai")
+    gc.collect()
+    assert cache.stats()["entries"] == 1
+
+
+def test_history_prefix_is_byte_stable():
+    """The request of a step starts with the exact bytes of the previous step's messages, so prefix caching hits."""
+    manager = MessageManager(model_id="gpt-4.1")
+    screenshots = [make_screenshot(seed) for seed in range(2)]
+    previous = None
+    for num_steps in range(1, 6):
+        cleaned = manager.get_clean_message_list(make_history(num_steps, screenshots), convert_images_to_image_urls=True)
+        serialized = [json.dumps(message, ensure_ascii=False) for message in cleaned]
+        if previous is not None:
+            # The previous last message may have been merged with the new messages of the same role
+            assert serialized[:len(previous) - 1] == previous[:-1]
+        previous = serialized
+
+
+def test_cached_token_usage():
+    openai_usage = {"prompt_tokens": 1000, "completion_tokens": 10, "prompt_tokens_details": {"cached_tokens": 768}}
+    anthropic_usage = {"prompt_tokens": 1000, "completion_tokens": 10, "cache_read_input_tokens": 900,
+                       "cache_creation_input_tokens": 100}
+    assert get_token_usage(openai_usage).cached_input_tokens == 768
+    assert get_token_usage(anthropic_usage).cached_input_tokens == 900
+    assert get_token_usage(anthropic_usage).cache_write_tokens == 100
+
+
+def time_per_call(function) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        function()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    test_input_is_not_modified()
+    test_cache_breakpoints()
+    test_tool_schema_cache()
+    test_history_prefix_is_byte_stable()
+    test_cached_token_usage()
+
+    manager = MessageManager(model_id="gpt-4.1")
+    screenshots = [make_screenshot(seed) for seed in range(1, 9)]
+    print(f"History of agent steps, each with a {SCREENSHOT_SIZE[0]}x{SCREENSHOT_SIZE[1]} screenshot "
+          f"({len(screenshots)} distinct). Times are per call.")
+    for num_steps in (5, 20, 50, 100):
+        history = make_history(num_steps, screenshots)
+        IMAGE_PAYLOAD_CACHE.entries.clear()
+
+        start = time.perf_counter()
+        manager.get_clean_message_list(history, convert_images_to_image_urls=True)
+        cold = (time.perf_counter() - start) * 1000
+        warm = time_per_call(lambda: manager.get_clean_message_list(history, convert_images_to_image_urls=True))
+        copy = time_per_call(lambda: deepcopy(history))
+        print(f"steps={num_steps:<4} first call {cold:8.1f} ms | cached {warm:6.2f} ms | "
+              f"deepcopy of the history alone (removed) {copy:7.1f} ms")
+    print(f"Image cache: {IMAGE_PAYLOAD_CACHE.stats()}")
+
+
+if __name__ == "__main__":
+    main()
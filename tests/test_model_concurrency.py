@@ -0,0 +1,83 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from openai import AsyncOpenAI
+
+from src.models import LiteLLMModel, OpenAIServerModel
+from src.models.cache import RequestCoalescer
+from src.logger import usage_scope, usage_tracker
+from src.proxy import HTTP_LIMITS
+from stub_server import chat_completion, start_stub_server
+
+import httpx
+
+STUB_LATENCY = 0.5  # seconds the stub server holds every request
+NUM_REQUESTS = 16
+received_requests = 0
+
+
+def count_request(request):
+    """Counts the requests that reach the provider."""
+    global received_requests
+    received_requests += 1
+    return chat_completion("Paris", model=request.model)
+
+
+async def run_batch(model, concurrency: int) -> float:
+    messages = [{"role": "user", "content": [{"type": "text", "text": "What is the capital of France?"}]}]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_call():
+        async with semaphore:
+            await model(messages)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one_call() for _ in range(NUM_REQUESTS)])
+    return time.perf_counter() - start
+
+
+async def main():
+    api_base = start_stub_server(count_request, latency=STUB_LATENCY)
+    client = AsyncOpenAI(
+        api_key="stub",
+        base_url=api_base,
+        http_client=httpx.AsyncClient(limits=HTTP_LIMITS),
+    )
+
+    models = {
+        "OpenAIServerModel": OpenAIServerModel(model_id="stub-model", http_client=client),
+        "LiteLLMModel": LiteLLMModel(model_id="openai/stub-model", http_client=client),
+    }
+
+    print(f"{NUM_REQUESTS} requests, stub latency {STUB_LATENCY:.2f}s")
+    for name, model in models.items():
+        for concurrency in (1, 2, 4, 8, 16):
+            elapsed = await run_batch(model, concurrency)
+            ideal = NUM_REQUESTS / concurrency * STUB_LATENCY
+            print(f"{name:<18} concurrency={concurrency:<3} wall-clock={elapsed:6.2f}s ideal={ideal:6.2f}s")
+
+    # The same request sent by NUM_REQUESTS callers at once reaches the provider once
+    for name, model in models.items():
+        model.request_coalescer = RequestCoalescer()
+        before = received_requests
+        with usage_scope(call_site=f"coalesced {name}"):
+            elapsed = await run_batch(model, NUM_REQUESTS)
+        assert received_requests - before == 1, received_requests - before
+        # Only the request that reached the provider spent tokens
+        usage = [row for row in usage_tracker.summary() if row["call_site"] == f"coalesced {name}"]
+        assert sum(row["calls"] for row in usage) == NUM_REQUESTS
+        assert sum(row["input_tokens"] for row in usage) == 10, usage
+        print(f"{name:<18} coalesced: wall-clock={elapsed:6.2f}s provider requests={received_requests - before} "
+              f"stats={model.request_coalescer.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
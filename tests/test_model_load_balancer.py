@@ -0,0 +1,70 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from openai import AsyncOpenAI
+
+from src.models import OpenAIServerModel
+from src.models.load_balancer import LoadBalancer, Replica
+from stub_server import error, start_stub_server
+
+NUM_REQUESTS = 48
+CONCURRENCY = 12
+
+
+def replica_down(request):
+    return error(500, "replica down")
+
+
+async def run_batch(model) -> float:
+    messages = [{"role": "user", "content": [{"type": "text", "text": "What is the capital of France?"}]}]
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one_call():
+        async with semaphore:
+            await model(messages)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one_call() for _ in range(NUM_REQUESTS)])
+    return time.perf_counter() - start
+
+
+async def main():
+    replicas = {
+        # vLLM replicas answering after a delay, or with a 500
+        "fast": start_stub_server(latency=0.1),
+        "slow": start_stub_server(latency=0.4),
+        "down": start_stub_server(replica_down, latency=0.01),
+    }
+    clients = {name: AsyncOpenAI(api_key="stub", base_url=api_base, max_retries=0) for name, api_base in replicas.items()}
+
+    single = OpenAIServerModel(model_id="qwen", http_client=clients["slow"])
+    elapsed = await run_batch(single)
+    print(f"single replica (slow)            {NUM_REQUESTS} requests in {elapsed:5.2f}s")
+
+    balanced = OpenAIServerModel(model_id="qwen", http_client=clients["fast"])
+    balanced.load_balancer = LoadBalancer(
+        [Replica(replicas[name], clients[name]) for name in ("fast", "slow", "down")],
+        max_failures=3,
+        ejection_seconds=60,
+    )
+    elapsed = await run_batch(balanced)
+    stats = balanced.load_balancer.stats()
+    print(f"balanced over fast, slow, down   {NUM_REQUESTS} requests in {elapsed:5.2f}s, {stats['retries']} retried")
+    for name, api_base in replicas.items():
+        print(f"  {name:<5} {stats['replicas'][api_base]}")
+
+    down = stats["replicas"][replicas["down"]]
+    assert down["ejections"] == 1 and not down["healthy"] and down["requests"] <= 3 + CONCURRENCY
+    assert stats["replicas"][replicas["fast"]]["requests"] > stats["replicas"][replicas["slow"]]["requests"]
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import logging
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.logger import logger
+from src.models import model_manager
+
+REPEATS = 20
+
+
+def main():
+    # The missing API key warnings would dominate the timings
+    logger.setLevel(logging.ERROR)
+
+    for use_local_proxy in (False, True):
+        registered, built = 0.0, 0.0
+        for _ in range(REPEATS):
+            model_manager.clients.clear()
+
+            start = time.perf_counter()
+            model_manager.init_models(use_local_proxy=use_local_proxy)
+            registered += time.perf_counter() - start
+
+            # What the eager init_models used to pay up front: building every model and its client
+            start = time.perf_counter()
+            for model_name in model_manager.registed_models.keys():
+                model_manager.registed_models[model_name]
+            built += time.perf_counter() - start
+
+        num_models = len(model_manager.registed_models)
+        print(f"use_local_proxy={use_local_proxy!s:<5} init_models {registered / REPEATS * 1000:7.2f} ms | "
+              f"building all {num_models} models {built / REPEATS * 1000:7.2f} ms | "
+              f"shared clients {len(model_manager.clients)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from openai import AsyncOpenAI
+
+from src.config import config
+from src.logger import usage_scope, usage_tracker
+from src.models import OpenAIServerModel, model_manager
+from stub_server import chat_completion, start_stub_server
+
+# A reasoning model is slow and thinks in many output tokens, a small model answers structured calls quickly.
+STUB_MODELS = {
+    "heavy-stub": {"latency": 0.4, "output_tokens": 1500},
+    "light-stub": {"latency": 0.05, "output_tokens": 150},
+}
+CALL_SITES = {"optimize_query": 1, "extract_insights": 8, "follow_ups": 2}
+
+
+def respond(request):
+    stub = STUB_MODELS[request.model]
+    time.sleep(stub["latency"])
+    return chat_completion(request.model, model=request.model, prompt_tokens=3000, completion_tokens=stub["output_tokens"])
+
+
+def register_stub_models():
+    client = AsyncOpenAI(api_key="stub", base_url=start_stub_server(respond))
+    for model_name in STUB_MODELS:
+        model_manager.registed_models[model_name] = OpenAIServerModel(model_id=model_name, http_client=client)
+
+
+async def research(agent: str) -> float:
+    """The auxiliary calls of one deep research, all defaulting to the heavy model."""
+    start = time.perf_counter()
+    with usage_scope(agent=agent):
+        for call_site, calls in CALL_SITES.items():
+            for _ in range(calls):
+                message = await model_manager.call(call_site, "heavy-stub", [{"role": "user", "content": call_site}])
+                expected = config.model_routing.routes.get(call_site, "heavy-stub")
+                assert message.content == expected, (call_site, message.content)
+    return time.perf_counter() - start
+
+
+def summarize(agent: str) -> dict:
+    usage = [entry for entry in usage_tracker.summary() if entry["agent"] == agent]
+    return {
+        "calls": sum(entry["calls"] for entry in usage),
+        "output_tokens": sum(entry["output_tokens"] for entry in usage),
+        "by_call_site": {entry["call_site"]: entry["model_id"] for entry in usage},
+    }
+
+
+async def main():
+    register_stub_models()
+
+    config.model_routing.routes = {}
+    baseline = await research("baseline")
+
+    config.model_routing.routes = {"optimize_query": "light-stub", "extract_insights": "light-stub", "follow_ups": "light-stub"}
+    routed = await research("routed")
+
+    # Unknown models fall back on the call site's default
+    config.model_routing.routes = {"follow_ups": "missing-model"}
+    assert model_manager.get_call_site_model("follow_ups", "heavy-stub").model_id == "heavy-stub"
+
+    baseline_usage, routed_usage = summarize("baseline"), summarize("routed")
+    assert set(routed_usage["by_call_site"].values()) == {"light-stub"}
+    assert routed_usage["calls"] == baseline_usage["calls"] == sum(CALL_SITES.values())
+    print(f"Heavy model everywhere: {baseline:.2f}s, {baseline_usage['output_tokens']:,} output tokens")
+    print(f"Routed call sites:      {routed:.2f}s, {routed_usage['output_tokens']:,} output tokens")
+    for entry in usage_tracker.call_site_summary():
+        print(f"Call site usage: {entry}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
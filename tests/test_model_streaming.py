@@ -0,0 +1,212 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from openai import AsyncOpenAI
+
+from src.config import config
+from src.memory import ActionStep
+from src.models import LiteLLMModel, OpenAIServerModel, model_manager
+from src.models.cache import ResponseCache
+from src.models.cassette import Cassette
+from src.models.streaming import IncrementalJSONParser, StopSequenceDetector
+from src.tools import AsyncTool
+from stub_server import chat_completion, start_stub_server
+
+CHUNK_DELAY = 0.05  # seconds between two streamed chunks
+TOOL_CALL_ARGUMENTS = ['{"que', 'ry": "capital', ' of France", ', '"filter_year": null}']
+TRAILING_TEXT = ["Calling tools:", " more", " text"] * 10
+
+
+def chunk(request, delta, finish_reason=None, usage=None):
+    payload = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "stub",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    if usage is not None:
+        payload["usage"] = usage
+    request.send_event(payload)
+    time.sleep(CHUNK_DELAY)
+
+
+def respond(request):
+    """Streams a thought, a tool call split across chunks, then text past the stop sequence."""
+    body = request.body
+    if not body.get("stream"):
+        return respond_at_once(body)
+    request.start_stream()
+    try:
+        chunk(request, {"role": "assistant", "content": "Thought: "})
+        chunk(request, {"content": "I will search."})
+        if body.get("tools"):
+            chunk(request, {"tool_calls": [{"index": 0, "id": "call_0", "type": "function",
+                                            "function": {"name": "web_search", "arguments": ""}}]})
+            for arguments in TOOL_CALL_ARGUMENTS:
+                chunk(request, {"tool_calls": [{"index": 0, "function": {"arguments": arguments}}]})
+        for text in TRAILING_TEXT:
+            chunk(request, {"content": text})
+        chunk(request, {}, finish_reason="stop")
+        chunk(request, {}, usage={"prompt_tokens": 10, "completion_tokens": 50, "total_tokens": 60})
+        request.send_event("[DONE]")
+        request.end_stream()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # The client aborted the stream
+
+
+def respond_at_once(body):
+    """Non-streamed requests get the same message once all its chunks would have been generated."""
+    num_chunks = 4 + len(TRAILING_TEXT) + (len(TOOL_CALL_ARGUMENTS) + 1 if body.get("tools") else 0)
+    time.sleep(num_chunks * CHUNK_DELAY)
+    tool_calls = {}
+    if body.get("tools"):
+        tool_calls["tool_calls"] = [{"id": "call_0", "type": "function",
+                                     "function": {"name": "web_search", "arguments": "".join(TOOL_CALL_ARGUMENTS)}}]
+    return chat_completion("Thought: I will search." + "".join(TRAILING_TEXT), completion_tokens=50, **tool_calls)
+
+
+class WebSearchTool(AsyncTool):
+    name = "web_search"
+    description = "Search the web."
+    parameters = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "The query."},
+            "filter_year": {"type": "integer", "description": "Year filter.", "nullable": True},
+        },
+        "required": ["query"],
+    }
+    output_type = "string"
+
+    async def forward(self, query: str, filter_year: int | None = None) -> str:
+        return query
+
+
+def test_incremental_json_parser():
+    parser = IncrementalJSONParser()
+    assert not any(parser.feed(chunk) for chunk in ['{"a": "}{\\"', '", "b": [1, {"c"', ': 2}]'])
+    assert parser.feed("}")
+    assert parser.value == {"a": '}{"', "b": [1, {"c": 2}]}
+
+
+def test_stop_sequence_detector():
+    detector = StopSequenceDetector(["Observation:"])
+    emitted = "".join(detector.feed(chunk) for chunk in ["Thought: done\nObs", "erv", "ation: 42"])
+    assert detector.stopped
+    assert emitted == "Thought: done\n"
+
+
+async def measure(model, tools):
+    messages = [{"role": "user", "content": [{"type": "text", "text": "What is the capital of France?"}]}]
+    stop_sequences = ["Observation:", "Calling tools:"]
+
+    start = time.perf_counter()
+    await model(messages, stop_sequences=stop_sequences, tools_to_call_from=tools)
+    full_response = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first_action, message = None, None
+    async for delta in model.stream(messages, stop_sequences=stop_sequences, tools_to_call_from=tools,
+                                    max_tool_calls=1 if tools else None):
+        if delta.completed_tool_calls and first_action is None:
+            first_action = time.perf_counter() - start
+        if delta.message is not None:
+            message = delta.message
+    streamed = time.perf_counter() - start
+    return full_response, first_action, streamed, message
+
+
+async def test_agents_stream_actions(client):
+    """The agents of a run are built by `create_agent` like in run_gaia, then stream their first action."""
+    from src.agent import create_agent
+
+    # Models are registered lazily: the tools' models are never built, the agents' are stubs
+    os.environ.setdefault("OPENAI_API_KEY", "stub")  # read by the browser tool's langchain client
+    model_manager.init_models(use_local_proxy=False)
+    agent_configs = [config.agent.planning_agent_config] + [
+        getattr(config.agent, f"{agent_id}_config") for agent_id in config.agent.planning_agent_config.managed_agents
+    ]
+    for agent_config in agent_configs:
+        agent_config.stream_outputs = True
+        model_manager.registed_models[agent_config.model_id] = OpenAIServerModel(model_id="stub-model", http_client=client)
+
+    agent = create_agent()
+    for agent in [agent, *agent.managed_agents.values()]:
+        memory_step = ActionStep(step_number=1, start_time=time.time())
+        messages = [{"role": "user", "content": [{"type": "text", "text": "What is the capital of France?"}]}]
+        message = await agent.generate_action(memory_step, messages, tools_to_call_from=[WebSearchTool()])
+        assert message.tool_calls[0].function.arguments["query"] == "capital of France", agent.name
+        assert memory_step.time_to_first_action is not None
+
+
+async def stream_message(model, tools):
+    messages = [{"role": "user", "content": [{"type": "text", "text": "What is the capital of France?"}]}]
+    async for delta in model.stream(messages, tools_to_call_from=tools, max_tool_calls=1):
+        if delta.message is not None:
+            return delta.message
+
+
+async def test_stream_through_cache_and_cassette(client, api_base):
+    """Streams of a model with a response cache or a cassette are served from them, like its full responses."""
+    tools = [WebSearchTool()]
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(os.path.join(directory, "responses.sqlite"))
+        model = OpenAIServerModel(model_id="stub-model", http_client=client, response_cache=cache)
+        assert not model.can_stream
+        await stream_message(model, tools)
+        message = await stream_message(model, tools)
+        assert cache.hits == 1 and message.tool_calls[0].function.arguments["query"] == "capital of France"
+
+        path = os.path.join(directory, "run.jsonl.gz")
+        cassette = Cassette(path, mode="record")
+        model = OpenAIServerModel(model_id="stub-model", http_client=client, cassette=cassette)
+        await stream_message(model, tools)
+        cassette.close()
+        # Replaying never reaches the provider
+        offline_client = AsyncOpenAI(api_key="stub", base_url="http://127.0.0.1:9/v1", max_retries=0)
+        cassette = Cassette(path, mode="replay", replay_latency=0.0)
+        model = OpenAIServerModel(model_id="stub-model", http_client=offline_client, cassette=cassette)
+        message = await stream_message(model, tools)
+        assert cassette.replayed == 1 and message.tool_calls[0].function.name == "web_search"
+
+
+async def main():
+    test_incremental_json_parser()
+    test_stop_sequence_detector()
+
+    api_base = start_stub_server(respond)
+    client = AsyncOpenAI(api_key="stub", base_url=api_base)
+    await test_agents_stream_actions(client)
+    await test_stream_through_cache_and_cassette(client, api_base)
+    models = {
+        "OpenAIServerModel": OpenAIServerModel(model_id="stub-model", http_client=client),
+        "LiteLLMModel": LiteLLMModel(model_id="openai/stub-model", http_client=client),
+    }
+    tools = [WebSearchTool()]
+
+    for name, model in models.items():
+        full_response, first_action, streamed, message = await measure(model, tools)
+        tool_call = message.tool_calls[0]
+        assert tool_call.function.name == "web_search"
+        assert tool_call.function.arguments == {"query": "capital of France", "filter_year": None}
+        print(f"{name:<18} tool call: full response {full_response:5.2f}s | "
+              f"first action {first_action:5.2f}s | stream closed {streamed:5.2f}s")
+
+        full_response, _, streamed, message = await measure(model, None)
+        assert message.content == "Thought: I will search."
+        print(f"{name:<18} stop sequence: full response {full_response:5.2f}s | stream aborted {streamed:5.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import random
+import asyncio
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from openai import AsyncOpenAI
+
+from src.logger import usage_scope, usage_tracker
+from src.models import OpenAIServerModel
+from stub_server import chat_completion, start_stub_server
+
+NUM_AGENTS = 8
+STEPS_PER_AGENT = 4
+
+
+def respond(request):
+    """Reports as many prompt tokens as the prompt has characters, after a random delay."""
+    prompt = request.body["messages"][-1]["content"]
+    prompt = prompt if isinstance(prompt, str) else prompt[0]["text"]
+    time.sleep(random.uniform(0.01, 0.2))
+    return chat_completion("ok", prompt_tokens=len(prompt))
+
+
+async def run_agent(model, agent_id: int) -> dict:
+    """One fake agent sharing `model` with the others: each step sends a prompt of a known length."""
+    expected = {}
+    for step in range(1, STEPS_PER_AGENT + 1):
+        prompt = "x" * (agent_id * 100 + step)
+        with usage_scope(agent="agent", agent_id=agent_id, step=step, tool=None):
+            message = await model([{"role": "user", "content": [{"type": "text", "text": prompt}]}])
+        assert message.token_usage.input_tokens == len(prompt), "usage of another call was attached"
+        assert message.latency > 0
+        expected[step] = len(prompt)
+    return expected
+
+
+async def main():
+    client = AsyncOpenAI(api_key="stub", base_url=start_stub_server(respond))
+    model = OpenAIServerModel(model_id="stub-model", http_client=client)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[run_agent(model, agent_id) for agent_id in range(1, NUM_AGENTS + 1)])
+    elapsed = time.perf_counter() - start
+
+    for agent_id, expected in enumerate(results, start=1):
+        for step, input_tokens in expected.items():
+            step_usage = usage_tracker.pop_step_usage(agent_id, step)
+            assert step_usage.calls == 1 and step_usage.input_tokens == input_tokens, (agent_id, step, step_usage)
+    print(f"{NUM_AGENTS * STEPS_PER_AGENT} concurrent calls on one model attributed to the right agent and step "
+          f"in {elapsed:.2f}s")
+    print(f"Usage summary: {usage_tracker.summary()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from openai import AsyncOpenAI
+
+from src.models import LiteLLMModel, OpenAIServerModel
+from src.models.rate_limiter import ProviderLimiter, RateLimiter, TokenBucket
+from stub_server import chat_completion, error, start_stub_server
+
+RETRY_AFTER = 1  # seconds the stub provider asks to wait after a 429
+STUB_LATENCY = 0.2
+USAGE = {"prompt_tokens": 40, "completion_tokens": 10, "total_tokens": 50}
+
+
+class StubProvider:
+    """Rate limits the first `rate_limited` requests with a Retry-After header, then answers after a delay."""
+
+    lock = threading.Lock()
+    rate_limited = 0
+    requests = 0
+    in_flight = 0
+    max_in_flight = 0
+
+    @classmethod
+    def respond(cls, request):
+        with cls.lock:
+            cls.requests += 1
+            limited = cls.rate_limited > 0
+            cls.rate_limited -= limited
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            if limited:
+                return (*error(429, "Rate limit reached", "rate_limit_error"), {"Retry-After": str(RETRY_AFTER)})
+            time.sleep(STUB_LATENCY)
+            return chat_completion("Paris", model=request.model, prompt_tokens=USAGE["prompt_tokens"],
+                                   completion_tokens=USAGE["completion_tokens"])
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+
+def reset_stub(rate_limited: int = 0):
+    StubProvider.rate_limited = rate_limited
+    StubProvider.requests = 0
+    StubProvider.max_in_flight = 0
+
+
+async def ask(model):
+    return await model([{"role": "user", "content": [{"type": "text", "text": "What is the capital of France?"}]}])
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate_per_minute=60)
+    assert bucket.wait_time(60, 60) == 0.0
+    bucket.consume(60)
+    assert 0.9 < bucket.wait_time(1, 60) <= 1.0
+    # Halving the rate doubles the wait
+    assert 1.9 < bucket.wait_time(1, 30) <= 2.0
+    bucket.adjust(30)
+    assert bucket.wait_time(30, 60) == 0.0
+    bucket.adjust(1000)
+    assert bucket.tokens == bucket.capacity
+
+
+def test_provider_limiter():
+    limiter = ProviderLimiter("stub", requests_per_minute=600, tokens_per_minute=10000)
+    limiter.on_rate_limited(retry_after=2.0)
+    assert limiter.rate_factor == 0.5 and 1.9 < limiter.paused_until - time.monotonic() <= 2.0
+    for _ in range(10):
+        limiter.on_rate_limited(retry_after=None)
+    assert limiter.rate_factor == limiter.min_rate_factor
+    limiter.on_success()
+    assert abs(limiter.rate_factor - (limiter.min_rate_factor + 0.05)) < 1e-9
+
+    # The estimate reserved up front is settled against the reported usage
+    limiter.token_bucket.consume(1000)
+    limiter.settle(1000, 50)
+    assert limiter.token_bucket.tokens > 9900
+
+
+async def test_retry_after(model, rate_limiter):
+    """A 429 is retried once, by the limiter only, after the provider's Retry-After delay."""
+    reset_stub(rate_limited=1)
+    start = time.perf_counter()
+    message = await ask(model)
+    elapsed = time.perf_counter() - start
+    limiter = rate_limiter.get_limiter(model.endpoint)
+    assert message.content == "Paris"
+    assert StubProvider.requests == 2, StubProvider.requests
+    assert elapsed >= RETRY_AFTER and limiter.rate_limited == 1, (elapsed, rate_limiter.stats())
+    return elapsed
+
+
+async def test_settle_usage(model):
+    """The tokens reserved for a request are settled to the usage the provider reports."""
+    reset_stub()
+    model.rate_limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=60000)
+    limiter = model.rate_limiter.get_limiter(model.endpoint)
+    bucket = limiter.token_bucket
+    bucket.tokens, bucket.updated_at = bucket.capacity / 2, time.monotonic()
+    start_tokens, start_time = bucket.tokens, bucket.updated_at
+    await ask(model)
+    bucket.wait_time(0, limiter.tokens_per_minute)  # refill up to now
+    refilled = (bucket.updated_at - start_time) * limiter.tokens_per_minute / 60
+    assert abs(start_tokens + refilled - USAGE["total_tokens"] - bucket.tokens) < 1, bucket.tokens
+
+
+async def test_max_in_flight(model):
+    reset_stub()
+    start = time.perf_counter()
+    await asyncio.gather(*[ask(model) for _ in range(6)])
+    elapsed = time.perf_counter() - start
+    assert StubProvider.max_in_flight == 2, StubProvider.max_in_flight
+    assert elapsed >= 3 * STUB_LATENCY
+    return elapsed
+
+
+async def main():
+    test_token_bucket()
+    test_provider_limiter()
+
+    api_base = start_stub_server(StubProvider.respond)
+    # The clients keep their default retries: the limiter turns them off
+    client = AsyncOpenAI(api_key="stub", base_url=api_base)
+    models = {
+        "OpenAIServerModel": OpenAIServerModel(model_id="stub-model", http_client=client),
+        "LiteLLMModel": LiteLLMModel(model_id="openai/stub-model", http_client=client),
+    }
+    for name, model in models.items():
+        rate_limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=1000000, max_in_flight=2)
+        model.rate_limiter = rate_limiter
+        retried = await test_retry_after(model, rate_limiter)
+        concurrent = await test_max_in_flight(model)
+        await test_settle_usage(model)
+        print(f"{name:<18} 429 with Retry-After {RETRY_AFTER}s retried after {retried:.2f}s | "
+              f"6 requests at 2 in flight in {concurrent:.2f}s | {rate_limiter.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
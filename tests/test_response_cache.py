@@ -0,0 +1,119 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.logger import usage_scope, usage_tracker
+from src.models import OpenAIServerModel
+from src.models.cache import ResponseCache, get_request_key
+
+MESSAGES = [{"role": "user", "content": [{"type": "text", "text": "What is the capital of France?"}]}]
+
+
+def make_response(answer: str) -> dict:
+    return {
+        "choices": [{"message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1000, "completion_tokens": 20},
+    }
+
+
+def test_request_key():
+    request = {
+        "model": "gpt-4.1",
+        "messages": [{"role": "user", "content": [{"type": "text", "text": "What is the capital of France?"}]}],
+        "temperature": 0.0,
+    }
+    key = get_request_key(request)
+    # Transport settings do not change the answer
+    assert get_request_key({**request, "api_key": "other", "api_base": "http://replica:8000/v1", "timeout": 60,
+                            "client": object(), "num_retries": 0}) == key
+    # Every generation parameter does
+    for field, value in [("max_tokens", 16), ("response_format", {"type": "json_object"}),
+                         ("reasoning_effort", "high"), ("top_p", 0.5), ("seed", 7)]:
+        assert get_request_key({**request, field: value}) != key, field
+
+
+async def test_modes(directory: str):
+    path = os.path.join(directory, "modes.sqlite")
+    await ResponseCache(path).set("shared", make_response("Paris"))
+
+    read_only = ResponseCache(path, mode="read_only")
+    assert (await read_only.get("shared"))["choices"][0]["message"]["content"] == "Paris"
+    await read_only.set("new", make_response("Lima"))
+    assert await read_only.get("new") is None and read_only.writes == 0
+
+    write_only = ResponseCache(path, mode="write_only")
+    assert await write_only.get("shared") is None
+    await write_only.set("new", make_response("Lima"))
+    assert write_only.writes == 1 and await read_only.get("new") is not None
+
+    assert not ResponseCache(path, mode="off").enabled
+
+
+async def test_hits_spend_no_tokens(directory: str):
+    cache = ResponseCache(os.path.join(directory, "usage.sqlite"))
+    model = OpenAIServerModel(model_id="stub-model", api_key="stub", response_cache=cache)
+    provider_calls = []
+
+    async def call_provider(completion_kwargs):
+        provider_calls.append(completion_kwargs)
+        return make_response("Paris")
+
+    model._call_provider = call_provider
+    with usage_scope(call_site="cached"):
+        first, second = [await model(MESSAGES) for _ in range(2)]
+    assert len(provider_calls) == 1 and second.content == "Paris"
+    # The hit is recorded as a call that spent no tokens
+    assert first.token_usage.input_tokens == 1000 and second.token_usage.total_tokens == 0
+    usage = [row for row in usage_tracker.summary() if row["call_site"] == "cached"]
+    assert usage[0]["calls"] == 2 and usage[0]["input_tokens"] == 1000, usage
+    assert cache.stats()["saved_input_tokens"] == 1000
+
+
+async def test_ttl(directory: str):
+    cache = ResponseCache(os.path.join(directory, "ttl.sqlite"), ttl_seconds=0.2)
+    await cache.set("key", make_response("Paris"), latency=3.0)
+    assert await cache.get("key") is not None
+    await asyncio.sleep(0.3)
+    assert await cache.get("key") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert cache.stats()["saved_latency_seconds"] == 3.0 and cache.stats()["saved_input_tokens"] == 1000
+
+
+async def test_lru_eviction(directory: str):
+    probe = ResponseCache(os.path.join(directory, "size.sqlite"))
+    await probe.set("probe", make_response("answer 0"))
+    entry_size = probe.store.size_bytes
+
+    # Room for three entries: writing a fourth evicts the least recently used one
+    cache = ResponseCache(os.path.join(directory, "lru.sqlite"), max_size_bytes=int(entry_size * 3.5))
+    for i in range(3):
+        await cache.set(f"key {i}", make_response(f"answer {i}"))
+        time.sleep(0.01)
+    assert await cache.get("key 0") is not None  # now more recently used than "key 1"
+    await cache.set("key 3", make_response("answer 3"))
+    assert await cache.get("key 1") is None
+    assert all([await cache.get(key) is not None for key in ("key 0", "key 2", "key 3")])
+    assert cache.stats()["evictions"] >= 1 and cache.store.size_bytes <= cache.store.max_size_bytes
+
+
+async def main():
+    test_request_key()
+    with tempfile.TemporaryDirectory() as directory:
+        await test_modes(directory)
+        await test_hits_spend_no_tokens(directory)
+        await test_ttl(directory)
+        await test_lru_eviction(directory)
+    print("Response cache: request keys, modes, TTL expiry and LRU eviction OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
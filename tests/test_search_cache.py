@@ -0,0 +1,107 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import List
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.tools.search import SearchItem, WebSearchEngine
+from src.tools.search.cache import SearchCache, get_search_key
+from src.tools.web_searcher import WebSearcherTool
+
+# A scraped results page takes seconds
+SEARCH_LATENCY = 0.5
+
+
+class CountingEngine(WebSearchEngine):
+    calls: int = 0
+    latency: float = SEARCH_LATENCY
+
+    async def perform_search(self, query: str, num_results: int = 10, *args, **kwargs) -> List[SearchItem]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return [SearchItem(title=f"{query} {i} v{self.calls}", url=f"https://example.com/{i}") for i in range(num_results)]
+
+
+def test_search_key():
+    key = get_search_key("Google", "  Observatory   FOUNDED ", "en", "us", None, 5)
+    assert key == get_search_key("google", "observatory founded", "en", "us", None, 5)
+    assert key != get_search_key("bing", "observatory founded", "en", "us", None, 5)
+    assert key != get_search_key("google", "observatory founded", "en", "us", 2020, 5)
+    assert key != get_search_key("google", "observatory founded", "en", "us", None, 10)
+
+
+async def test_stale_while_revalidate(directory: str):
+    cache = SearchCache(f"{directory}/swr.sqlite", ttl_seconds=0.2, engine_ttl_seconds={"Bing": 60}, stale_seconds=0.5)
+    engine = CountingEngine(latency=0.05)
+    key = get_search_key("google", "observatory", num_results=2)
+    search = lambda: engine.perform_search("observatory", num_results=2)
+
+    assert (await cache.search(key, "google", search))[0].title == "observatory 0 v1"
+    assert (await cache.search(key, "google", search))[0].title == "observatory 0 v1"
+    assert engine.calls == 1 and cache.hits == 1
+
+    # Expired: the stale results are served at once and refreshed in the background
+    await asyncio.sleep(0.25)
+    assert (await cache.search(key, "google", search))[0].title == "observatory 0 v1"
+    assert cache.stale_hits == 1
+    await asyncio.gather(*cache.revalidating.values())
+    assert (await cache.search(key, "google", search))[0].title == "observatory 0 v2"
+    assert cache.revalidations == 1
+
+    # Past the stale window: a miss
+    await asyncio.sleep(0.8)
+    assert (await cache.search(key, "google", search))[0].title == "observatory 0 v3"
+
+    # Empty results are not cached, engines have their own time to live
+    assert await cache.search(get_search_key("google", "nothing"), "google", lambda: asyncio.sleep(0, [])) == []
+    assert cache.get_ttl("bing") == 60 and cache.get_ttl("google") == 0.2
+
+
+async def test_eviction(directory: str):
+    cache = SearchCache(f"{directory}/evict.sqlite", max_size_bytes=20_000)
+    engine = CountingEngine(latency=0)
+    for i in range(100):
+        await cache.search(get_search_key("google", f"query {i}"), "google", lambda i=i: engine.perform_search(f"query {i}", 5))
+    assert cache.store.size_bytes <= 20_000 and cache.store.evictions > 0
+
+
+async def run_benchmark(directory: str):
+    """The queries of two runs of a benchmark: the second one hits the cache."""
+    queries = [f"query {i % 12}" for i in range(30)]
+    results = {}
+    for cached in (False, True):
+        engine = CountingEngine()
+        tool = WebSearcherTool()
+        tool._search_engine = {"google": engine}
+        tool.search_cache = SearchCache(f"{directory}/benchmark.sqlite") if cached else None
+        elapsed = []
+        for run in range(2):
+            start = time.perf_counter()
+            await asyncio.gather(*[tool._try_all_engines(query, 5, {"lang": "en", "country": "us"}) for query in queries])
+            elapsed.append(time.perf_counter() - start)
+        results[cached] = (elapsed, engine.calls, tool.search_cache.stats() if cached else None)
+    return results
+
+
+async def main():
+    test_search_key()
+    with tempfile.TemporaryDirectory() as directory:
+        await test_stale_while_revalidate(directory)
+        await test_eviction(directory)
+        results = await run_benchmark(directory)
+
+    (uncached, uncached_calls, _), (cached, cached_calls, stats) = results[False], results[True]
+    assert cached_calls == 12 and uncached_calls == 60
+    print(f"Without cache: runs in {uncached[0]:.2f}s, {uncached[1]:.2f}s | {uncached_calls} engine searches")
+    print(f"With cache:    runs in {cached[0]:.2f}s, {cached[1]:.2f}s | {cached_calls} engine searches | {stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import os
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+import httpx
+import requests
+
+os.environ.pop("SKYWORK_GOOGLE_SEARCH_API", None)
+from src.tools.search import BingSearchEngine, GoogleSearchEngine, SearchItem, WebSearchEngine
+from stub_server import start_stub_server
+
+# Time a search engine takes to answer a results page
+SERP_LATENCY = 0.2
+NUM_QUERIES = 16
+
+
+def google_page(query: str, num: int) -> str:
+    results = "".join(
+        f'<div class="ezO2md"><a href="/url?q=https://example.com/{query}/{i}&sa=U">'
+        f'<span class="CVA68e">{query} result {i}</span></a><span class="FrIlee">About {query} {i}</span></div>'
+        for i in range(num)
+    )
+    return f"<html><body>{results}</body></html>"
+
+
+def bing_page(query: str) -> str:
+    results = "".join(
+        f'<li class="b_algo"><h2><a href="https://example.com/{query}/{i}">{query} result {i}</a></h2><p>About {query} {i}</p></li>'
+        for i in range(10)
+    )
+    return f'<html><body><ol id="b_results">{results}</ol></body></html>'
+
+
+def serp(request):
+    if request.path == "/google":
+        return google_page(request.params["q"], int(request.params["num"]) - 2)
+    # Bing is down for this query
+    return 503 if request.params.get("q") == "overloaded" else 200, bing_page(request.params["q"])
+
+
+class BlockingGoogleSearchEngine(GoogleSearchEngine):
+    """The engine as it was: a blocking request inside `perform_search`."""
+
+    async def perform_search(self, query: str, num_results: int = 10, *args, **kwargs):
+        response = requests.get(self.search_url, params={"q": query, "num": num_results + 2})
+        return [SearchItem(title=query, url=self.search_url) for _ in range(num_results)] if response.ok else []
+
+
+class SyncLibrarySearchEngine(WebSearchEngine):
+    """An engine wrapping a sync-only library, like DuckDuckGo and Baidu."""
+
+    async def perform_search(self, query: str, num_results: int = 10, *args, **kwargs):
+        def search(query):
+            time.sleep(SERP_LATENCY)
+            return [{"title": query, "url": "https://example.com"}] * num_results
+
+        return [SearchItem(**item) for item in await self.run_sync(search, query)]
+
+
+async def run_searches(engine: WebSearchEngine) -> dict:
+    """Search `NUM_QUERIES` queries concurrently while a heartbeat measures how long the event loop stalls."""
+    lags = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - start - 0.01)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*[engine.perform_search(f"query{i}", num_results=5) for i in range(NUM_QUERIES)])
+    elapsed = time.perf_counter() - start
+    done.set()
+    await beat
+    assert all(len(items) == 5 for items in results), [len(items) for items in results]
+    return {"elapsed": elapsed, "max_loop_stall": max(lags, default=elapsed)}
+
+
+async def main():
+    host = start_stub_server(serp, latency=SERP_LATENCY, path="")
+
+    google = GoogleSearchEngine(search_url=f"{host}/google", max_concurrency=NUM_QUERIES)
+    items = await google.perform_search("observatory", num_results=5)
+    assert [item.url for item in items] == [f"https://example.com/observatory/{i}" for i in range(5)]
+    items = await BingSearchEngine(host_url=host).perform_search("observatory", num_results=5)
+    assert items[0].url == "https://example.com/observatory/0" and items[0].description == "About observatory 0"
+    # A failing engine fails the search, so that its health registers the failure: it is not a search without results
+    try:
+        await BingSearchEngine(host_url=host).perform_search("overloaded")
+        raise AssertionError("A 5xx is raised")
+    except httpx.HTTPStatusError:
+        pass
+
+    benchmarks = {
+        "blocking google": BlockingGoogleSearchEngine(search_url=f"{host}/google"),
+        "async google": google,
+        "async google (4 in flight)": GoogleSearchEngine(search_url=f"{host}/google", max_concurrency=4),
+        "async bing": BingSearchEngine(host_url=host, max_concurrency=NUM_QUERIES),
+        "sync library on threads": SyncLibrarySearchEngine(max_concurrency=8),
+    }
+    results = {name: await run_searches(engine) for name, engine in benchmarks.items()}
+    for name, result in results.items():
+        print(f"{name:<28} {NUM_QUERIES} concurrent searches in {result['elapsed']:.2f}s | "
+              f"event loop stalled up to {result['max_loop_stall'] * 1000:.0f} ms")
+
+    assert results["async google"]["elapsed"] < results["blocking google"]["elapsed"] / 4
+    assert results["async google"]["max_loop_stall"] < SERP_LATENCY
+    # The engine's concurrency limit queues the searches beyond it
+    assert results["async google (4 in flight)"]["elapsed"] >= SERP_LATENCY * NUM_QUERIES / 4
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+from typing import List
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+import httpx
+
+from src.tools.search import RateLimitedError, SearchItem, WebSearchEngine
+from src.tools.search.health import EngineHealth, EngineHealthRegistry
+from src.tools.web_searcher import WebSearcherTool
+import src.tools.web_searcher as web_searcher
+
+NUM_SEARCHES = 10
+
+
+class StubEngine(WebSearchEngine):
+    latency: float = 0.1
+    # "ok", "rate_limited", "timeout" or "empty"
+    behaviour: str = "ok"
+    calls: int = 0
+
+    async def perform_search(self, query: str, num_results: int = 10, *args, **kwargs) -> List[SearchItem]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.behaviour == "rate_limited":
+            raise RateLimitedError("CAPTCHA")
+        if self.behaviour == "timeout":
+            raise httpx.ReadTimeout("timed out")
+        if self.behaviour == "empty":
+            return []
+        return [SearchItem(title=query, url=f"https://example.com/{i}") for i in range(num_results)]
+
+
+def make_tool(engines: dict) -> WebSearcherTool:
+    web_searcher.engine_health = EngineHealthRegistry(cooldown_seconds=60, max_cooldown_seconds=900, failure_threshold=3)
+    tool = WebSearcherTool()
+    tool._search_engine = engines
+    tool.search_cache = None
+    tool.strategy = "sequential"
+    tool.retry_delay = 0.2
+    tool.max_retry_delay = 1.0
+    return tool
+
+
+def test_engine_health():
+    health = EngineHealth("google", cooldown_seconds=10, max_cooldown_seconds=25)
+    health.record_success(0.5)
+    assert not health.cooling_down and health.expected_latency == 0.5
+
+    health.record_failure(0.1, retry_after=0.0)
+    assert health.cooling_down and 9 < health.cooldown_remaining <= 10
+    health.record_failure(0.1, retry_after=0.0)
+    assert 19 < health.cooldown_remaining <= 20
+    health.record_failure(0.1, retry_after=0.0)
+    assert 24 < health.cooldown_remaining <= 25
+    health.record_failure(0.1, retry_after=120)
+    assert health.cooldown_remaining > 100
+
+    # Failures in a row cool the engine down, searches without results only lower its rank
+    health = EngineHealth("bing", failure_threshold=2)
+    health.record_empty(1.0)
+    health.record_empty(1.0)
+    assert not health.cooling_down and health.error_rate > 0.5
+    health.record_failure(1.0)
+    health.record_failure(1.0)
+    assert health.cooling_down
+
+    registry = EngineHealthRegistry()
+    registry.get("google").record_success(3.0)
+    registry.get("bing").record_success(0.5)
+    registry.get("baidu").record_failure(0.2, retry_after=0.0)
+    assert registry.order(["google", "bing", "baidu", "duckduckgo"]) == ["bing", "duckduckgo", "google"]
+
+
+async def search_all(tool: WebSearcherTool) -> float:
+    start = time.perf_counter()
+    for i in range(NUM_SEARCHES):
+        results = await tool._try_all_engines(f"query {i}", 5, {})
+        assert results and results[0].source == "bing"
+    return time.perf_counter() - start
+
+
+async def main():
+    test_engine_health()
+
+    # The primary engine serves CAPTCHAs: it is tried once, then skipped for its cooldown
+    google = StubEngine(behaviour="rate_limited")
+    bing = StubEngine(latency=0.2)
+    elapsed = await search_all(make_tool({"google": google, "bing": bing}))
+    assert google.calls == 1
+    print(f"Rate limited primary: {NUM_SEARCHES} searches in {elapsed:.2f}s, {google.calls} call to the rate limited engine")
+
+    # A timeout is retried once, then the failing engine ranks after the healthy one
+    google = StubEngine(behaviour="timeout")
+    tool = make_tool({"google": google, "bing": StubEngine(latency=0.2)})
+    tool.engine_retries = 1
+    elapsed = await search_all(tool)
+    assert google.calls == 2, google.calls
+    print(f"Timing out primary:   {NUM_SEARCHES} searches in {elapsed:.2f}s, {google.calls} calls to the timing out engine")
+    print(f"Engine health: {web_searcher.engine_health.stats()}")
+
+    # All engines down: the retries wait without blocking the event loop
+    tool = make_tool({"google": StubEngine(behaviour="empty", latency=0.01)})
+    tool.max_retries = 3
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    beat = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    response = await tool.forward("nothing to find")
+    elapsed = time.perf_counter() - start
+    beat.cancel()
+    assert response.error and ticks >= elapsed / 0.01 * 0.5, (ticks, elapsed)
+    print(f"All engines failing:  gave up after {elapsed:.2f}s, the event loop ticked {ticks} times meanwhile")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
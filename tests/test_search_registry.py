@@ -0,0 +1,131 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import os
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+from typing import List
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.config import config
+from src.proxy import CONNECTION_STATS
+from src.registry import REGISTED_SEARCH_ENGINES, register_search_engine
+from src.tools.search import LazySearchEngineRegistry, RateLimitedError, SearchItem, SkyworkGoogleSearchEngine, WebSearchEngine
+from src.tools.search.health import EngineHealthRegistry
+from src.tools.web_searcher import WebSearcherTool
+import src.tools.web_searcher as web_searcher
+from stub_server import start_stub_server
+
+BUILT = []
+
+
+@register_search_engine("blocked_primary")
+class BlockedEngine(WebSearchEngine):
+    def __init__(self, **data):
+        super().__init__(**data)
+        BUILT.append("blocked_primary")
+
+    async def perform_search(self, query: str, num_results: int = 10, *args, **kwargs) -> List[SearchItem]:
+        raise RateLimitedError("CAPTCHA")
+
+
+@register_search_engine
+class ThirdPartyEngine(WebSearchEngine):
+    def __init__(self, **data):
+        super().__init__(**data)
+        BUILT.append("thirdpartyengine")
+
+    async def perform_search(self, query: str, num_results: int = 10, *args, **kwargs) -> List[SearchItem]:
+        return [SearchItem(title=query, url=f"https://example.com/{i}") for i in range(num_results)]
+
+
+class StubApi:
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    @classmethod
+    def respond(cls, request):
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.in_flight -= 1
+        if "nothing" in request.params.get("q", ""):
+            return {"searchParameters": {}}
+        return {"organic": [
+            {"title": "Observatory", "link": "https://example.com/observatory", "snippet": "Founded in 1967", "position": 1}
+        ]}
+
+
+def test_registry():
+    assert {"google", "bing", "duckduckgo", "baidu", "skywork_google"} <= set(REGISTED_SEARCH_ENGINES)
+    try:
+        register_search_engine("Google")(ThirdPartyEngine)
+        raise AssertionError("Engine IDs are unique")
+    except ValueError:
+        pass
+
+    engines = LazySearchEngineRegistry(["Blocked_Primary", "DuckDuckGo", "ThirdPartyEngine", "missing", "duckduckgo"])
+    assert list(engines) == ["blocked_primary", "duckduckgo", "thirdpartyengine"]
+    assert "missing" not in engines and BUILT == []
+
+
+async def test_fallbacks():
+    """The configured fallbacks take over from a blocked primary engine, each built when first needed."""
+    config.searcher_tool.engine = "Blocked_Primary"
+    config.searcher_tool.fallback_engines = ["ThirdPartyEngine"]
+    web_searcher.engine_health = EngineHealthRegistry()
+    tool, other_tool = WebSearcherTool(), WebSearcherTool()
+    tool.search_cache = None
+    assert BUILT == []
+
+    response = await tool.forward("observatory founded")
+    assert not response.error and response.results[0].source == "thirdpartyengine"
+    assert BUILT == ["blocked_primary", "thirdpartyengine"]
+    # Engines are shared by every tool
+    assert other_tool._search_engine["thirdpartyengine"] is tool._search_engine["thirdpartyengine"]
+    assert BUILT == ["blocked_primary", "thirdpartyengine"]
+    assert tool._get_engine_order() == ["thirdpartyengine"]
+
+
+async def test_skywork_google():
+    engine = SkyworkGoogleSearchEngine(api_url=start_stub_server(StubApi.respond, path="/search"))
+    requests = CONNECTION_STATS.requests
+    items = await engine.perform_search("observatory", num_results=1, filter_year=2020)
+    assert items[0].url == "https://example.com/observatory" and items[0].description == "Founded in 1967"
+    # The api is reached on the proxied client of the models
+    assert CONNECTION_STATS.requests == requests + 1
+    # No results is an answer, not a failure
+    assert await engine.perform_search("nothing to find") == []
+
+    # Requests go through the engine's concurrency limit
+    engine = SkyworkGoogleSearchEngine(api_url=engine.api_url, max_concurrency=2)
+    StubApi.max_in_flight = 0
+    await asyncio.gather(*[engine.perform_search(f"observatory {i}") for i in range(6)])
+    assert StubApi.max_in_flight == 2, StubApi.max_in_flight
+
+    os.environ.pop("SKYWORK_GOOGLE_SEARCH_API", None)
+    try:
+        await SkyworkGoogleSearchEngine().perform_search("observatory")
+        raise AssertionError("The api url is required")
+    except ValueError:
+        pass
+
+
+async def main():
+    test_registry()
+    await test_fallbacks()
+    await test_skywork_google()
+    print(f"Registered search engines: {', '.join(REGISTED_SEARCH_ENGINES)}")
+    print(f"Engine health: {web_searcher.engine_health.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import random
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import List
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.tools.search import SearchItem, WebSearchEngine
+from src.tools.search.cache import SearchCache
+from src.tools.web_searcher import SearchLatencyStats, WebSearcherTool, fuse_results
+import src.tools.web_searcher as web_searcher
+
+NUM_SEARCHES = 40
+
+
+class StubEngine(WebSearchEngine):
+    """An engine with a random latency, returning no results for a share of the queries (a block or a CAPTCHA)."""
+
+    name: str
+    min_latency: float
+    max_latency: float
+    failure_rate: float = 0.0
+    cancelled: int = 0
+
+    async def perform_search(self, query: str, num_results: int = 10, *args, **kwargs) -> List[SearchItem]:
+        try:
+            await asyncio.sleep(random.uniform(self.min_latency, self.max_latency))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if random.random() < self.failure_rate:
+            return []
+        return [
+            SearchItem(title=f"{self.name} {i}", url=f"https://example.com/{query}/{i}", description=f"{self.name} snippet {i}")
+            for i in range(num_results)
+        ]
+
+
+def make_tool(strategy: str) -> WebSearcherTool:
+    tool = WebSearcherTool()
+    tool.strategy = strategy
+    tool.concurrent_engines = 2
+    tool.merge_deadline_seconds = 0.6
+    tool._search_engine = {
+        # A primary engine with a long tail and regular blocks, and a steadier fallback
+        "google": StubEngine(name="google", min_latency=0.05, max_latency=1.0, failure_rate=0.3),
+        "bing": StubEngine(name="bing", min_latency=0.2, max_latency=0.4),
+    }
+    tool._get_engine_order = lambda: ["google", "bing"]
+    tool.search_cache = None
+    return tool
+
+
+def test_fuse_results():
+    results = fuse_results({
+        "google": [SearchItem(title="A", url="https://www.example.com/a/"), SearchItem(title="B", url="https://example.com/b")],
+        "bing": [SearchItem(title="B", url="https://example.com/b", description="longer"), SearchItem(title="C", url="https://example.com/c")],
+    }, num_results=3)
+    assert [result.url for result in results] == ["https://example.com/b", "https://www.example.com/a/", "https://example.com/c"]
+    assert results[0].source == "google+bing" and results[0].description == "longer"
+
+
+async def test_race_cancels_losers(directory: str):
+    """The losing engines' searches are cancelled, also when they run behind the search cache."""
+    for search_cache in (None, SearchCache(f"{directory}/race.sqlite")):
+        tool = make_tool("race")
+        tool.search_cache = search_cache
+        tool._search_engine["google"] = StubEngine(name="google", min_latency=5, max_latency=5)
+        results = await tool._try_all_engines("observatory", 5, {})
+        await asyncio.sleep(0.01)  # let the cancellations reach the engines
+        assert results[0].source == "bing" and tool._search_engine["google"].cancelled == 1
+        if search_cache is not None:
+            assert not search_cache.in_flight and not search_cache.waiters
+
+    # A search shared with another caller keeps running for it
+    search_cache = SearchCache(f"{directory}/shared.sqlite")
+    engine = StubEngine(name="google", min_latency=0.3, max_latency=0.3)
+    search = lambda: engine.perform_search("observatory", 5)
+    racing = asyncio.create_task(search_cache.search("key", "google", search))
+    waiting = asyncio.create_task(search_cache.search("key", "google", search))
+    await asyncio.sleep(0.1)
+    racing.cancel()
+    assert len(await waiting) == 5 and engine.cancelled == 0
+
+
+async def main():
+    random.seed(0)
+    test_fuse_results()
+    web_searcher.search_latency_stats = SearchLatencyStats()
+    with tempfile.TemporaryDirectory() as directory:
+        await test_race_cancels_losers(directory)
+
+    web_searcher.search_latency_stats = stats = SearchLatencyStats()
+    for strategy in ("sequential", "race", "fan-out-merge"):
+        tool = make_tool(strategy)
+        results = await asyncio.gather(*[tool._try_all_engines(f"query{i}", 5, {}) for i in range(NUM_SEARCHES)])
+        assert all(len(result) == 5 for result in results), strategy
+
+    for strategy, entry in stats.stats().items():
+        print(f"{strategy:<14} {entry}")
+    latency = stats.stats()
+    assert latency["race"]["p95_s"] < latency["sequential"]["p95_s"]
+    assert latency["fan-out-merge"]["p95_s"] <= 0.6 + 0.1
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
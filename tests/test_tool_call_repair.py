@@ -0,0 +1,112 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import time
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.models import ChatMessage
+from src.models.base import ApiModel, ChatMessageToolCall, ChatMessageToolCallDefinition, get_tool_call_from_text
+from src.utils import JsonRepairStats, parse_json_blob
+
+
+class SearchTool:
+    name = "web_searcher_tool"
+    inputs = {
+        "query": {"type": "string", "description": "The query."},
+        "num_results": {"type": "integer", "description": "Number of results.", "nullable": True},
+    }
+
+
+TOOLS = [SearchTool()]
+
+BROKEN_TOOL_CALLS = {
+    "trailing_comma": '{"function": {"name": "web_searcher_tool", "arguments": {"query": "observatory founded", "num_results": 5,},},}',
+    "newline": 'Action:\n{"function": {"name": "web_searcher_tool", "arguments": "{\\"query\\": \\"observatory\nfounded\\"}"}}',
+    "truncated": '{"function": {"name": "web_searcher_tool", "arguments": {"query": "observatory founded", "num_results": 5',
+    "truncated_key": '{"function": {"name": "web_searcher_tool", "arguments": {"query": "observatory founded", "num_res',
+    "code_fence": '{"function": {"name": "web_searcher_tool", "arguments": "```json\\n{\\"query\\": \\"observatory founded\\"}\\n```"}}',
+}
+
+
+def test_repairs():
+    stats = JsonRepairStats()
+    for kind, text in BROKEN_TOOL_CALLS.items():
+        tool_call = get_tool_call_from_text(text, "name", "arguments", TOOLS, stats=stats)
+        assert tool_call.function.name == "web_searcher_tool", kind
+        assert tool_call.function.arguments["query"].startswith("observatory"), kind
+    assert stats.repaired == len(BROKEN_TOOL_CALLS) - 1 and stats.parsed == 1, stats.stats()  # json5 takes trailing commas
+
+    # A repair that breaks the tool's schema is rejected: the agent retries as before
+    text = '{"function": {"name": "web_searcher_tool", "arguments": {"num_results": 5, "query'
+    try:
+        get_tool_call_from_text(text, "name", "arguments", TOOLS, stats=stats)
+        raise AssertionError("The repaired tool call should have been rejected")
+    except ValueError as e:
+        assert "missing the required argument 'query'" in str(e)
+    assert stats.rejected == 1
+
+    for text in [
+        "I will search the web.",
+        '{"name": "web_searcher_tool", "arguments": {"query": "observatory"}}',
+    ]:
+        try:
+            parse_json_blob(text)
+            raise AssertionError(f"There is no tool call to parse in {text}")
+        except ValueError:
+            pass
+
+    # Several tool calls in one action get the feedback to provide only one
+    for text in [
+        '{"function": {"name": "web_searcher_tool", "arguments": {"query": "a"}}},\n{"function": {"name": "final_answer", "arguments": {"answer": "b"}}}',
+        '[{"function": {"name": "web_searcher_tool", "arguments": {"query": "a"}}}, {"function": {"name": "final_answer", "arguments": {"answer": "b",}}}]',
+    ]:
+        try:
+            parse_json_blob(text)
+            raise AssertionError("Multiple tool calls are rejected")
+        except ValueError as e:
+            assert "PROVIDE ONLY ONE TOOL CALL" in str(e)
+    # Nested objects are one tool call
+    data, _ = parse_json_blob('{"function": {"name": "python", "arguments": {"options": {"a": 1}, "more": {"b": 2}}}}')
+    assert data["arguments"] == {"options": {"a": 1}, "more": {"b": 2}}
+
+    # Tool calls written as the memory shows them
+    data, _ = parse_json_blob("Calling tools:\n[{'id': '1', 'type': 'function', 'function': {'name': 'final_answer', 'arguments': {'answer': '1967'}}}]")
+    assert data == {"name": "final_answer", "arguments": {"answer": "1967"}}
+
+
+def test_native_tool_call_arguments():
+    model = ApiModel(model_id="stub", client=object())
+    message = ChatMessage(role="assistant", tool_calls=[ChatMessageToolCall(
+        id="1", type="function",
+        function=ChatMessageToolCallDefinition(name="web_searcher_tool", arguments='{"query": "observatory\nfounded", "num_results": 3'),
+    )])
+    message = model.postprocess_message(message, TOOLS)
+    assert message.tool_calls[0].function.arguments == {"query": "observatory\nfounded", "num_results": 3}
+
+    message = ChatMessage(role="assistant", content=BROKEN_TOOL_CALLS["truncated"])
+    message = model.postprocess_message(message, TOOLS)
+    assert message.tool_calls[0].function.arguments == {"query": "observatory founded", "num_results": 5}
+
+
+def main():
+    test_repairs()
+    test_native_tool_call_arguments()
+
+    # Every parse of a tool call the model wrote as text, broken or not
+    stats = JsonRepairStats()
+    texts = list(BROKEN_TOOL_CALLS.values()) + ['{"function": {"name": "web_searcher_tool", "arguments": {"query": "observatory founded"}}}'] * 5
+    start = time.perf_counter()
+    for _ in range(200):
+        for text in texts:
+            get_tool_call_from_text(text, "name", "arguments", TOOLS, stats=stats)
+    elapsed = (time.perf_counter() - start) * 1e6 / (200 * len(texts))
+    print(f"{elapsed:.0f} us per tool call parse | {stats.stats()}")
+    print(f"Model round trips saved: {stats.repaired} of {200 * len(texts)} tool calls")
+
+
+if __name__ == "__main__":
+    main()
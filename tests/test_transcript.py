@@ -0,0 +1,129 @@
+import warnings
+warnings.simplefilter("ignore", DeprecationWarning)
+
+import sys
+import json
+import argparse
+import asyncio
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.memory import ActionStep, AgentMemory, TaskStep, ToolCall
+from src.agent.transcript import TranscriptCompressor, get_step_record, render_full_step
+from src.utils.token_utils import TokenCounter
+
+MODEL_ID = "gpt-4o"
+
+
+def make_steps(num_steps: int = 12) -> list:
+    """A planning agent run: searches with long observations, one managed agent answer, then the final answer."""
+    steps = [TaskStep(task="Which year was the observatory on the island founded?")]
+    for step_number in range(1, num_steps + 1):
+        steps.append(ActionStep(
+            step_number=step_number,
+            tool_calls=[ToolCall(name="deep_researcher_agent", arguments={"task": f"search attempt {step_number}"}, id=str(step_number))],
+            observations=f"Search results {step_number}: " + "some page text " * 3000,
+        ))
+    steps.append(ActionStep(
+        step_number=num_steps + 1,
+        tool_calls=[ToolCall(name="browser_use_agent", arguments={"task": "open the history page"}, id="answer")],
+        observations="Here is the final answer from your managed agent 'browser_use_agent':\nThe observatory was founded in 1967.",
+    ))
+    steps.append(ActionStep(
+        step_number=num_steps + 2,
+        tool_calls=[ToolCall(name="final_answer", arguments={"answer": "1967"}, id="final")],
+        observations="1967",
+        action_output="1967",
+    ))
+    return steps
+
+
+def test_bounded_transcript():
+    compressor = TranscriptCompressor()
+    counter = TokenCounter()
+    steps = make_steps()
+
+    transcript = compressor.build(steps, token_budget=8000, model_id=MODEL_ID)
+    assert counter.count(transcript, MODEL_ID) <= 8000 + 100
+    assert "founded in 1967" in transcript
+    assert "Called final_answer" in transcript and "Final answer: 1967" in transcript
+    assert "earlier steps omitted" in transcript and "deep_researcher_agent" in transcript
+
+    misses = compressor.misses
+    compressor.build(steps, token_budget=8000, model_id=MODEL_ID)
+    assert compressor.misses == misses and compressor.hits >= len(steps)
+
+    # Step records give the same transcript as the steps they were taken from
+    records = [get_step_record(step) for step in steps]
+    assert compressor.build(records, token_budget=8000, model_id=MODEL_ID) == transcript
+
+
+async def measure(runs_path: str, token_budget: int, model_name: str | None):
+    """Input tokens of the full and condensed transcripts of recorded runs, and whether the answers agree."""
+    from src.agent.reformulator import prepare_response
+
+    model = None
+    if model_name is not None:
+        from src.config import config
+        from src.models import model_manager
+        config.init_config(str(Path(root) / "configs" / "config_gaia.toml"))
+        model_manager.init_models(use_local_proxy=True)
+        model = model_manager.registed_models[model_name]
+
+    compressor = TranscriptCompressor()
+    counter = TokenCounter()
+    full_tokens = condensed_tokens = runs = agreements = 0
+    with open(runs_path) as f:
+        for line in f:
+            run = json.loads(line)
+            records = run.get("transcript_steps")
+            if not records:
+                continue
+            runs += 1
+            full = "\n\n".join(render_full_step(record) for record in records)
+            condensed = compressor.build(records, token_budget=token_budget, model_id=MODEL_ID)
+            full_tokens += counter.count(full, MODEL_ID)
+            condensed_tokens += counter.count(condensed, MODEL_ID)
+            if model is not None:
+                task = run.get("augmented_question") or run["question"]
+                full_messages = [{"role": "user", "content": [{"type": "text", "text": full}]}]
+                full_answer = await prepare_response(task, full_messages, reformulation_model=model)
+                # The compressor condenses step records like the memory steps they were taken from
+                memory = AgentMemory(system_prompt="")
+                memory.steps = records
+                condensed_answer = await prepare_response(task, memory, reformulation_model=model, token_budget=token_budget)
+                agreements += full_answer.strip().lower() == condensed_answer.strip().lower()
+
+    if not runs:
+        print(f"No run with transcript_steps in {runs_path}")
+        return
+    print(f"Runs: {runs} | Input tokens: {full_tokens:,} full -> {condensed_tokens:,} condensed "
+          f"({1 - condensed_tokens / max(full_tokens, 1):.1%} fewer)")
+    if model is not None:
+        print(f"Answer agreement: {agreements}/{runs}")
+
+
+def main():
+    test_bounded_transcript()
+
+    steps = make_steps(num_steps=30)
+    full = "\n\n".join(render_full_step(get_step_record(step)) for step in steps)
+    counter = TokenCounter()
+    for token_budget in (4000, 16000, 64000):
+        condensed = TranscriptCompressor().build(steps, token_budget=token_budget, model_id=MODEL_ID)
+        print(f"budget={token_budget:<6} input tokens {counter.count(full, MODEL_ID):,} full -> "
+              f"{counter.count(condensed, MODEL_ID):,} condensed")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=str, default=None, help="JSONL answers of a run saved with record_transcript_steps")
+    parser.add_argument("--token-budget", type=int, default=16000)
+    parser.add_argument("--model", type=str, default=None, help="Reformulation model to compare the answers with")
+    args = parser.parse_args()
+    if args.runs is not None:
+        asyncio.run(measure(args.runs, args.token_budget, args.model))
+
+
+if __name__ == "__main__":
+    main()